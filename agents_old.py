@@ -1,6 +1,15 @@
 from get_board import get_scenario_board
 from rewards import reward_function
-from helper import pretty_print_board
+from helper import pretty_print_board, TrackedBoard
+from qtable import make_qtable, as_backend, bound_qtable, load_qtable, save_qtable, simplify_state, QTable, ZobristQTable, MappedQTable, BoundedTable
+from qnetwork import NeuralQTable
+from symmetry import canonical_frame, FramedBoard, to_frame, from_frame
+from checkpoint import QTableLog
+from opponents import MoveCache, CachedEngine
+from dataset import PositionDataset, write_scenario_dataset
+from replay import ReplayBuffer, encode_position
+from profiler import PhaseProfiler
+from tablebase import policy_accuracy
 
 import chess
 import random
@@ -8,15 +17,25 @@ import chess.engine
 import numpy as np
 import os
 import pickle
-from copy import deepcopy
+import asyncio
+import multiprocessing
 import colorama
 from colorama import Fore, Style
 colorama.init(autoreset=True)
 
 import matplotlib.pyplot as plt
 
+# Terminal rewards, also used as the bootstrapped value of finished games
+TERMINAL_REWARDS = {"win": 100, "draw": -20, "loss": -100}
+
+# Positions whose mate/stalemate status is remembered by _terminal_outcome
+TERMINAL_CACHE_SIZE = 200000
+
 
 class QLearningChess:
+    # Reward of the agent's move (an attribute so the profiler can time it)
+    _reward = staticmethod(reward_function)
+
     def __init__(
         self,
         alpha=0.05,
@@ -28,7 +47,22 @@ class QLearningChess:
         qtable_file="Q_table.pkl",
         stockfish_path="/usr/games/stockfish",
         train_as="white",
-        stockfish_skill=0
+        stockfish_skill=0,
+        qtable_backend="fen",
+        check_collisions=False,
+        symmetry=False,
+        move_cache=0,
+        move_cache_file=None,
+        move_cache_candidates=1,
+        opponent=None,
+        tablebase=None,
+        tracked_boards=False,
+        replay_capacity=0,
+        replay_ratio=4,
+        replay_prioritized=False,
+        qtable_capacity=None,
+        qtable_eviction="lru",
+        profile=False
     ):
         self.alpha = alpha
         self.gamma = gamma
@@ -38,13 +72,40 @@ class QLearningChess:
         self.epsilon_decay = epsilon_decay_after_win
         self.qtable_file = qtable_file
         self.train_as = train_as.lower()
+        self.qtable_backend = qtable_backend
+        self.check_collisions = check_collisions
+        self.qtable_capacity = qtable_capacity
+        self.qtable_eviction = qtable_eviction
+        self.symmetry = symmetry
+        self.stockfish_path = stockfish_path
+        self.stockfish_skill = stockfish_skill
+        self.move_cache_config = (move_cache, move_cache_file, move_cache_candidates)
+        self.opponent = opponent
+        self.tablebase = tablebase
+        self.tracked_boards = tracked_boards
+        self._terminal_cache = {}
+        # Experience replay: replay_ratio extra updates per transition, from a fixed-size buffer
+        self.replay = ReplayBuffer(replay_capacity, replay_prioritized) if replay_capacity else None
+        self.replay_ratio = replay_ratio
+        # Per-phase timing of training runs (see profiler.py)
+        self.profile = profile
+        self.profiler = None
         assert self.train_as in ["white", "black"], "train_as must be 'white' or 'black'"
         
         self.wins_before_decay = 0
 
-        self.engine = chess.engine.SimpleEngine.popen_uci(stockfish_path)
-        self.engine.configure({"Skill Level": stockfish_skill})
-        print(f"🤖 Stockfish initialized (Skill={stockfish_skill})")
+        # Optional cache of Stockfish replies (memory LRU + SQLite file)
+        self.move_cache = None
+        if move_cache or move_cache_file:
+            tag = f"skill={stockfish_skill}" if opponent is None else repr(opponent)
+            self.move_cache = MoveCache(move_cache, move_cache_file, move_cache_candidates, tag=tag)
+
+        # Stockfish is started on first use (see engine); train_async runs its own pool
+        self._engine = None
+        if opponent is not None:
+            # In-process opponent with the same play() interface (e.g. AlphaBetaOpponent)
+            self._engine = opponent if self.move_cache is None else CachedEngine(opponent, self.move_cache)
+            print(f"🤖 Opponent initialized ({opponent!r})")
 
         # Create agents directory if it doesn't exist
         os.makedirs('agents', exist_ok=True)
@@ -54,47 +115,344 @@ class QLearningChess:
             self.qtable_file = os.path.join('agents', qtable_file)
         else:
             self.qtable_file = qtable_file
+        if qtable_capacity and self.qtable_file.endswith(".qtb"):
+            # .qtb files hold no eviction metadata
+            raise ValueError("Bounded Q-tables are saved as .pkl files, not .qtb")
+
+        # Updates since the last full save, for crash recovery
+        self.log = QTableLog(self.qtable_file)
+        self._snapshot_synced = False
 
         # Single shared Q-table used by both agents
-        if load_existing and os.path.exists(self.qtable_file):
+        if load_existing and (os.path.exists(self.qtable_file) or os.path.exists(self.log.path)):
             print(f"🔁 Loading existing Q-table from {self.qtable_file}...")
             self.load(self.qtable_file)
         else:
             print("🆕 Starting new Q-table...")
-            self.Q_table = {}
+            self.Q_table = make_qtable(qtable_backend, check_collisions)
+            if qtable_capacity:
+                self.Q_table = bound_qtable(self.Q_table, qtable_capacity, qtable_eviction)
+
+    @property
+    def engine(self):
+        """The opponent, behind the move cache if there is one"""
+        if self._engine is None:
+            engine = chess.engine.SimpleEngine.popen_uci(self.stockfish_path)
+            engine.configure({"Skill Level": self.stockfish_skill})
+            print(f"🤖 Stockfish initialized (Skill={self.stockfish_skill})")
+            self._engine = engine if self.move_cache is None else CachedEngine(engine, self.move_cache)
+        return self._engine
+
+    def _new_board(self, fen):
+        """Training board for fen; a TrackedBoard keeps material and king edges up to date"""
+        return TrackedBoard(fen) if self.tracked_boards else chess.Board(fen)
 
     def _simplify_state(self, board):
         """Use simplified FEN without halfmove/fullmove counters"""
-        fen = board.fen()
-        parts = fen.split(' ')
-        return ' '.join(parts[:4])
+        return simplify_state(board)
+
+    def _canonical(self, board):
+        """Return (key, frame, framed board) of the board's canonical symmetry frame"""
+        frame, h = canonical_frame(board)
+        framed = FramedBoard(board, frame)
+        if isinstance(self.Q_table, ZobristQTable) and not self.Q_table.check_collisions:
+            # The canonical hash is the Zobrist key, no need to transform the board
+            return h, frame, framed
+        return self.Q_table.state_key(framed), frame, framed
+
+    def _state_key(self, board):
+        """State key in the format used by the Q-table backend.
+
+        With symmetry enabled this is a (canonical key, frame) pair, and the
+        Q methods below map moves into and out of that frame.
+        """
+        if self.symmetry:
+            key, frame, _ = self._canonical(board)
+            return key, frame
+        return self.Q_table.state_key(board)
 
     def _get_Q(self, state, action):
-        return self.Q_table.get((state, action), 0.0)
+        if self.symmetry:
+            state, frame = state
+            action = to_frame(action, frame)
+        return self.Q_table.get_q(state, action)
 
     def _set_Q(self, state, action, value):
-        self.Q_table[(state, action)] = value
-
-    def _max_Q_value(self, board):
-        legal_moves = list(board.legal_moves)
-        if not legal_moves:
-            return 0.0
-        state = self._simplify_state(board)
-        return max(self._get_Q(state, move.uci()) for move in legal_moves)
-
-    def _epsilon_greedy_action(self, board):
-        legal_moves = list(board.legal_moves)
-        if not legal_moves:
+        if self.symmetry:
+            state, frame = state
+            action = to_frame(action, frame)
+        self.Q_table.set_q(state, action, value)
+
+    def _max_Q_value(self, board, state=None):
+        if state is None and self.symmetry:
+            key, _, framed = self._canonical(board)
+            return self.Q_table.max_q(framed, key)
+        if state is None:
+            state = self._state_key(board)
+        if self.symmetry:
+            key, frame = state
+            return self.Q_table.max_q(FramedBoard(board, frame), key)
+        return self.Q_table.max_q(board, state)
+
+    def _epsilon_greedy_action(self, board, state=None):
+        if state is None:
+            state = self._state_key(board)
+        if self.symmetry:
+            key, frame = state
+            move = self.Q_table.epsilon_greedy(FramedBoard(board, frame), key, self.epsilon)
+            return None if move is None else from_frame(move, frame)
+        return self.Q_table.epsilon_greedy(board, state, self.epsilon)
+
+    def _is_agent_turn(self, board):
+        return (board.turn == chess.WHITE and self.train_as == "white") or \
+               (board.turn == chess.BLACK and self.train_as == "black")
+
+    def _outcome(self, result):
+        """'win', 'draw' or 'loss' from the agent's point of view"""
+        if (result == "1-0" and self.train_as == "white") or \
+           (result == "0-1" and self.train_as == "black"):
+            return "win"
+        elif result == "1/2-1/2":
+            return "draw"
+        return "loss"
+
+    def _terminal_outcome(self, board):
+        """Agent's outcome if the game is over on board, else None.
+
+        Same rules as board.outcome(), evaluated once per position: mate,
+        stalemate and insufficient material only depend on the position and
+        are cached by its transposition key; the move-count and repetition
+        draws are checked on the board itself.
+        """
+        key = board._transposition_key()
+        result = self._terminal_cache.get(key, False)
+        if result is False:
+            if len(self._terminal_cache) >= TERMINAL_CACHE_SIZE:
+                self._terminal_cache.clear()
+            if not any(board.generate_legal_moves()):
+                result = ("0-1" if board.turn == chess.WHITE else "1-0") if board.is_check() else "1/2-1/2"
+            elif board.is_insufficient_material():
+                result = "1/2-1/2"
+            else:
+                result = None
+            self._terminal_cache[key] = result
+
+        # Five repetitions need at least 16 reversible plies; 8 keeps a margin
+        if result is None and (board.halfmove_clock >= 150 or
+                               board.halfmove_clock >= 8 and board.is_fivefold_repetition()):
+            result = "1/2-1/2"
+        if result is None:
+            return None
+        return self._outcome(result)
+
+    def _decided_outcome(self, board):
+        """Tablebase oracle: 'draw' or 'loss' once the agent (not to move) can no longer force a win"""
+        if self.tablebase is None:
+            return None
+        wdl = self.tablebase.probe_wdl(board)
+        if wdl is None or wdl < 0:
             return None
-        if np.random.rand() < self.epsilon:
-            return random.choice(legal_moves)
-        state = self._simplify_state(board)
-        q_values = [self._get_Q(state, move.uci()) for move in legal_moves]
-        max_q = max(q_values)
-        best_actions = [move for move, q in zip(legal_moves, q_values) if q == max_q]
-        return random.choice(best_actions)
-
-    def train(self, episodes=1000, custom_fens=None, verbose=False):
+        return "loss" if wdl > 0 else "draw"
+
+    def _q_target(self, state, action, reward, max_future=None, weight=1.0):
+        """(new Q-value, TD error) of a Q-learning update; max_future=None means
+        the action ended the game. weight scales the step (importance weights
+        of prioritized replay).
+        """
+        Qold = self._get_Q(state, action)
+        if max_future is None:
+            return reward, reward - Qold
+        error = reward + self.gamma * max_future - Qold
+        return Qold + self.alpha * weight * error, error
+
+    def _q_update(self, state, action, reward, max_future=None, weight=1.0):
+        """Q-learning update (see _q_target); returns the TD error"""
+        value, error = self._q_target(state, action, reward, max_future, weight)
+        self._set_Q(state, action, value)
+        return error
+
+    def _remember(self, position, action, reward, max_future=None, next_position=None):
+        """Add a transition to the replay buffer and replay a minibatch of stored ones.
+
+        The minibatch is one batched update: every target is computed from
+        the values before the batch (the neural backend evaluates all its
+        positions in a single forward pass), then all of them are written,
+        so a transition drawn twice gets the same target both times.
+        """
+        self.replay.add(position, action, reward, max_future, next_position)
+        indices, weights = self.replay.sample(self.replay_ratio)
+        batch = [self.replay.transition(i) for i in indices]
+        states, next_states = [], []
+        for board, _, _, _, next_board in batch:
+            state = self._state_key(board)
+            self._add_state(board, state)
+            states.append(state)
+            next_states.append(None if next_board is None else self._state_key(next_board))
+        keys = [state for state in states + next_states if state is not None]
+        self.Q_table.prefetch([key for key, _ in keys] if self.symmetry else keys)
+
+        targets = []
+        errors = np.empty(len(batch))
+        for j, (board, move, replay_reward, replay_future, next_board) in enumerate(batch):
+            if next_board is not None:
+                replay_future = self._max_Q_value(next_board, next_states[j])
+            value, errors[j] = self._q_target(states[j], move, replay_reward, replay_future, weights[j])
+            targets.append(value)
+        for state, (_, move, _, _, _), value in zip(states, batch, targets):
+            self._set_Q(state, move, value)
+        self.replay.update_priorities(indices, errors)
+
+    def _play_episode(self, board, verbose=False, transitions=None):
+        """Play one episode from board against self.engine, learning as it goes.
+
+        Returns (outcome, total_reward, moves_count); outcome is None when the
+        episode stops without a result. If transitions is a list, every update
+        is also appended to it as (fen, uci, reward, max_future, next_fen) so
+        another table can replay it (see _learn).
+        """
+        episode = self._episode(board, verbose, transitions)
+        try:
+            position = next(episode)
+            while True:
+                position = episode.send(self._opponent_move(position))
+        except StopIteration as stop:
+            return stop.value
+
+    def _opponent_move(self, board):
+        return self.engine.play(board, chess.engine.Limit(depth=1)).move
+
+    def _episode(self, board, verbose=False, transitions=None):
+        """Episode loop as a generator, independent of how the engine is driven.
+
+        Yields every position the opponent has to answer and expects its move
+        (or None) to be sent back; returns what _play_episode returns.
+        """
+        done = False
+        total_reward = 0
+        moves_count = 0
+        outcome = None
+
+        while not done and moves_count < 150:
+            if self._is_agent_turn(board):
+
+                state = self._state_key(board)
+                action = self._epsilon_greedy_action(board, state)
+                if action is None:
+                    break
+                if transitions is not None:
+                    fen = board.fen()
+                if self.replay is not None:
+                    position = encode_position(board)
+
+                # Execute agent's move
+                board.push(action)
+                moves_count += 1
+
+                if verbose:
+                    print(Fore.CYAN + f"[Agent] {action.uci()}")
+
+                # Check if game over after agent's move
+                outcome = self._terminal_outcome(board)
+                if outcome is None:
+                    outcome = self._decided_outcome(board)
+                if outcome is not None:
+                    done = True
+
+                    # Assign terminal reward based on result
+                    terminal_reward = TERMINAL_REWARDS[outcome]
+                    self._q_update(state, action, terminal_reward)
+                    total_reward += terminal_reward
+                    if transitions is not None:
+                        transitions.append((fen, action.uci(), terminal_reward, None, None))
+                    if self.replay is not None:
+                        self._remember(position, action, terminal_reward)
+                    break
+
+                # Intermediate reward, for the position after the agent's move
+                intermediate_reward = self._reward(board, action, board.turn)
+                total_reward += intermediate_reward
+
+                # Opponent's reply goes straight onto the real board, and the
+                # bootstrapped value is read from it (no lookahead copy)
+                opp_move = yield board
+                next_fen = None
+
+                if opp_move is None:
+                    maxQfuture = 0.0
+                    terminal = None
+                else:
+                    board.push(opp_move)
+                    moves_count += 1
+                    if verbose:
+                        print(Fore.LIGHTBLACK_EX + f"[Stockfish] {opp_move.uci()}")
+
+                    terminal = self._terminal_outcome(board)
+                    if terminal is not None:
+                        maxQfuture = TERMINAL_REWARDS[terminal]
+                    else:
+                        maxQfuture = self._max_Q_value(board)
+                        if transitions is not None:
+                            next_fen = board.fen()
+
+                # Q-learning update
+                self._q_update(state, action, intermediate_reward, maxQfuture)
+                if transitions is not None:
+                    transitions.append((fen, action.uci(), intermediate_reward, maxQfuture, next_fen))
+                if self.replay is not None:
+                    if opp_move is not None and terminal is None:
+                        self._remember(position, action, intermediate_reward, next_position=encode_position(board))
+                    else:
+                        self._remember(position, action, intermediate_reward, maxQfuture)
+
+            else:
+                # Stockfish moves first
+                stockfish_move = yield board
+                if stockfish_move is None:
+                    break
+                board.push(stockfish_move)
+                moves_count += 1
+                if verbose:
+                    print(Fore.LIGHTBLACK_EX + f"[Stockfish] {stockfish_move.uci()}")
+                terminal = self._terminal_outcome(board)
+
+            # Check game over (evaluated once, right after the last push)
+            if terminal is not None:
+                done = True
+                outcome = terminal
+                break
+
+        return outcome, total_reward, moves_count
+
+    def _learn(self, transitions):
+        """Replay transitions recorded by _play_episode (possibly in another process)"""
+        for fen, uci, reward, max_future, next_fen in transitions:
+            board = chess.Board(fen)
+            move = chess.Move.from_uci(uci)
+            state = self._state_key(board)
+            self._add_state(board, state)
+            next_board = None
+            if next_fen is not None:
+                # Bootstrap from this table rather than the one that played the episode
+                next_board = chess.Board(next_fen)
+                max_future = self._max_Q_value(next_board)
+            self._q_update(state, move, reward, max_future)
+            if self.replay is not None:
+                if next_board is not None:
+                    self._remember(encode_position(board), move, reward, next_position=encode_position(next_board))
+                else:
+                    self._remember(encode_position(board), move, reward, max_future)
+
+    def _add_state(self, board, state):
+        if self.symmetry:
+            key, frame = state
+            self.Q_table.add_state(FramedBoard(board, frame), key)
+        else:
+            self.Q_table.add_state(board, state)
+
+    def _prepare_fens(self, custom_fens):
+        # Datasets decode positions on demand; episodes pick from them directly
+        if isinstance(custom_fens, PositionDataset):
+            return custom_fens
         if isinstance(custom_fens, str):
             custom_fens = [custom_fens]
         if not custom_fens:
@@ -109,14 +467,29 @@ class QLearningChess:
                 processed_fens.append(item)
             else:
                 raise ValueError(f"Invalid type in custom_fens: {type(item)}")
-        
-        custom_fens = processed_fens
 
-        print(f"\n🏁 Starting training for {episodes} episodes ({self.train_as.capitalize()} vs Stockfish)")
+        return processed_fens
+
+    def _start_training(self, episodes, checkpoint_every):
+        opponent_name = "Stockfish" if self.opponent is None else repr(self.opponent)
+        print(f"\n🏁 Starting training for {episodes} episodes ({self.train_as.capitalize()} vs {opponent_name})")
         print(f"   α={self.alpha}, γ={self.gamma}, ε={self.epsilon}\n")
         print(f"   Q-table size at start: {len(self.Q_table)} entries")
 
-        wins, losses, draws = 0, 0, 0
+        if checkpoint_every:
+            # The log only holds changes, so the snapshot on disk must match the table
+            self.Q_table.track_changes()
+            if self._snapshot_synced:
+                self.log.reset()
+            else:
+                self.save()
+
+        self.wins, self.losses, self.draws = 0, 0, 0
+        if self.move_cache is not None:
+            self.move_cache.reset_stats()
+        if self.profile:
+            self.profiler = PhaseProfiler()
+            self.profiler.attach(self)
 
         # Track metrics per episode
         self.episode_rewards = []
@@ -126,159 +499,350 @@ class QLearningChess:
         self.episode_lengths = []
         self.episode_epsilon = []  # NEW: Track epsilon decay
         self.episode_qtable_size = []  # NEW: Track Q-table growth
+        self.episode_evictions = []  # Entries evicted so far (bounded tables)
 
-        for ep in range(1, episodes + 1):
-            board = chess.Board(random.choice(custom_fens))
-            done = False
-            total_reward = 0
-            moves_count = 0
-
-            while not done and moves_count < 150:
-                if (board.turn == chess.WHITE and self.train_as == "white") or \
-                   (board.turn == chess.BLACK and self.train_as == "black"):
-
-                    state = self._simplify_state(board)
-                    action = self._epsilon_greedy_action(board)
-                    if action is None:
-                        break
-
-                    # Execute agent's move
-                    board.push(action)
-                    moves_count += 1
-
-                    if verbose and ep % 500 == 0:
-                        print(Fore.CYAN + f"[Agent] {action.uci()}")
-
-                    # Check if game over after agent's move
-                    if board.is_game_over():
-                        done = True
-                        result = board.result()
-                        
-                        # Assign terminal reward based on result
-                        if (result == "1-0" and self.train_as == "white") or \
-                           (result == "0-1" and self.train_as == "black"):
-                            terminal_reward = 100
-                            wins += 1
-                        elif result == "1/2-1/2":
-                            terminal_reward = -20
-                            draws += 1
-                        else:
-                            terminal_reward = -100
-                            losses += 1
-                        
-                        self._set_Q(state, action.uci(), terminal_reward)
-                        total_reward += terminal_reward
-                        break
-
-                    # Simulate opponent's move in copy
-                    env_copy = deepcopy(board)
-                    opp_result = self.engine.play(env_copy, chess.engine.Limit(depth=1))
-                    opp_move = opp_result.move
-                    
-                    if opp_move is None:
-                        maxQfuture = 0.0
-                    else:
-                        env_copy.push(opp_move)
-                        
-                        if env_copy.is_game_over():
-                            result_copy = env_copy.result()
-                            if (result_copy == "1-0" and self.train_as == "white") or \
-                               (result_copy == "0-1" and self.train_as == "black"):
-                                maxQfuture = 100
-                            elif result_copy == "1/2-1/2":
-                                maxQfuture = -20
-                            else:
-                                maxQfuture = -100
-                        else:
-                            maxQfuture = self._max_Q_value(env_copy)
-
-                    # Intermediate reward
-                    intermediate_reward = reward_function(board, action, board.turn)
-                    total_reward += intermediate_reward
-
-                    # Q-learning update
-                    Qold = self._get_Q(state, action.uci())
-                    Qnew = Qold + self.alpha * (intermediate_reward + self.gamma * maxQfuture - Qold)
-                    self._set_Q(state, action.uci(), Qnew)
-
-                    # Execute opponent's move on real board
-                    if opp_move is not None:
-                        board.push(opp_move)
-                        moves_count += 1
-                        if verbose and ep % 500 == 0:
-                            print(Fore.LIGHTBLACK_EX + f"[Stockfish] {opp_move.uci()}")
-
-                else:
-                    # Stockfish moves first
-                    result = self.engine.play(board, chess.engine.Limit(depth=1))
-                    stockfish_move = result.move
-                    if stockfish_move is None:
-                        break
-                    board.push(stockfish_move)
-                    moves_count += 1
-                    if verbose and ep % 500 == 0:
-                        print(Fore.LIGHTBLACK_EX + f"[Stockfish] {stockfish_move.uci()}")
-
-                # Check game over
-                if board.is_game_over():
-                    result = board.result()
-                    done = True
-                    if (result == "1-0" and self.train_as == "white") or \
-                       (result == "0-1" and self.train_as == "black"):
-                        wins += 1
-                    elif result == "1/2-1/2":
-                        draws += 1
-                    else:
-                        losses += 1
-                    break
-
-            # Track metrics per episode
-            self.episode_rewards.append(total_reward)
-            self.episode_wins.append(wins)
-            self.episode_losses.append(losses)
-            self.episode_draws.append(draws)
-            self.episode_lengths.append(moves_count)
-            self.episode_epsilon.append(self.epsilon)  # NEW
-            self.episode_qtable_size.append(len(self.Q_table))  # NEW
-
-            # Epsilon decay after first win
-            if wins > self.wins_before_decay:
-                if self.epsilon > self.epsilon_min:
-                    self.epsilon -= self.epsilon_decay
-                    self.epsilon = max(self.epsilon, self.epsilon_min)
-
-            if ep % 100 == 0 or ep == episodes:
-                avg_length = np.mean(self.episode_lengths[-100:]) if self.episode_lengths else 0
-                win_rate = wins / ep if ep > 0 else 0
-                print(Fore.YELLOW + f"Ep {ep}/{episodes} | ε={self.epsilon:.3f} | W={wins} L={losses} D={draws} | WR={win_rate:.1%} | AvgLen={avg_length:.1f}")
+    def _record_episode(self, outcome, total_reward, moves_count):
+        if outcome == "win":
+            self.wins += 1
+        elif outcome == "draw":
+            self.draws += 1
+        elif outcome == "loss":
+            self.losses += 1
 
+        # Track metrics per episode
+        self.episode_rewards.append(total_reward)
+        self.episode_wins.append(self.wins)
+        self.episode_losses.append(self.losses)
+        self.episode_draws.append(self.draws)
+        self.episode_lengths.append(moves_count)
+        self.episode_epsilon.append(self.epsilon)  # NEW
+        self.episode_qtable_size.append(len(self.Q_table))  # NEW
+        if self.profiler is not None:
+            self.profiler.end_episode()
+        if isinstance(self.Q_table, BoundedTable):
+            self.episode_evictions.append(self.Q_table.evictions)
+            self.Q_table.episode += 1
+        else:
+            self.episode_evictions.append(0)
+
+        # Epsilon decay after first win
+        if self.wins > self.wins_before_decay:
+            if self.epsilon > self.epsilon_min:
+                self.epsilon -= self.epsilon_decay
+                self.epsilon = max(self.epsilon, self.epsilon_min)
+
+    def _end_episode(self, ep, episodes, checkpoint_every):
+        if checkpoint_every and ep % checkpoint_every == 0:
+            self.checkpoint()
+
+        if ep % 100 == 0 or ep == episodes:
+            avg_length = np.mean(self.episode_lengths[-100:]) if self.episode_lengths else 0
+            win_rate = self.wins / ep if ep > 0 else 0
+            print(Fore.YELLOW + f"Ep {ep}/{episodes} | ε={self.epsilon:.3f} | W={self.wins} L={self.losses} D={self.draws} | WR={win_rate:.1%} | AvgLen={avg_length:.1f}")
+            if self.profiler is not None:
+                print(self.profiler.window_line())
+
+    def _finish_training(self):
+        wins, losses, draws = self.wins, self.losses, self.draws
         self.last_stats = (wins, losses, draws)
         print(Fore.GREEN + f"✅ Training done. Wins={wins}, Losses={losses}, Draws={draws}")
         print(f"   Q-table size at end: {len(self.Q_table)} entries")
+        if self.move_cache is not None:
+            self.move_cache.flush()
+            print(f"   Move cache: {self.move_cache.summary()}")
+        if isinstance(self.Q_table, BoundedTable):
+            print(f"   Evictions: {self.Q_table.summary()}")
+        if self.profiler is not None:
+            self.profiler.detach(self)
+            profile_file = self.qtable_file + ".profile.json"
+            self.profiler.save(profile_file)
+            self.profile_summary = self.profiler.summary()
+            self.episode_profiles = self.profiler.episodes
+            print(f"   Profile: {self.profiler.breakdown()} (saved to {profile_file})")
+            self.profiler = None
+        if self.replay is not None:
+            print(f"   Replay buffer: {len(self.replay)}/{self.replay.capacity} transitions, "
+                  f"{self.replay.nbytes / 1e6:.1f} MB, {self.replay_ratio} replayed updates per transition")
         self.save()
 
+    def train(self, episodes=1000, custom_fens=None, verbose=False, checkpoint_every=0):
+        custom_fens = self._prepare_fens(custom_fens)
+        self._start_training(episodes, checkpoint_every)
+
+        for ep in range(1, episodes + 1):
+            board = self._new_board(random.choice(custom_fens))
+            outcome, total_reward, moves_count = self._play_episode(board, verbose=verbose and ep % 500 == 0)
+            self._record_episode(outcome, total_reward, moves_count)
+            self._end_episode(ep, episodes, checkpoint_every)
+
+        self._finish_training()
+
+    def train_parallel(self, episodes=1000, custom_fens=None, workers=4, episodes_per_task=10,
+                       sync_every=1, checkpoint_every=0):
+        """Train with worker processes that each play against their own Stockfish.
+
+        Every round hands one task of episodes_per_task episodes to each worker.
+        A worker plays them with its own copy of the Q-table (learning from its
+        own moves) and ships back the transitions; the learner replays them into
+        self.Q_table and records the metrics in episode order, exactly as train()
+        does. Workers reload the learner's table every sync_every rounds.
+        Exploration uses the learner's epsilon at the start of each round.
+        """
+        custom_fens = self._prepare_fens(custom_fens)
+        self._start_training(episodes, checkpoint_every)
+
+        sync_path = self.qtable_file + ".sync"
+        config = {
+            "alpha": self.alpha,
+            "gamma": self.gamma,
+            "qtable_file": self.qtable_file,
+            "stockfish_path": self.stockfish_path,
+            "train_as": self.train_as,
+            "stockfish_skill": self.stockfish_skill,
+            "qtable_backend": self.qtable_backend,
+            "check_collisions": self.check_collisions,
+            "symmetry": self.symmetry,
+            "opponent": self.opponent,
+            "tablebase": self.tablebase,
+            "tracked_boards": self.tracked_boards,
+            "qtable_capacity": self.qtable_capacity,
+            "qtable_eviction": self.qtable_eviction,
+        }
+        if self.move_cache is not None:
+            config["move_cache"], config["move_cache_file"], config["move_cache_candidates"] = self.move_cache_config
+
+        ep = 0
+        rounds = 0
+        version = 0
+        try:
+            with multiprocessing.Pool(workers, initializer=_init_worker, initargs=(config,)) as pool:
+                while ep < episodes:
+                    if rounds % sync_every == 0:
+                        with open(sync_path, "wb") as f:
+                            pickle.dump(self.Q_table, f)
+                        version += 1
+                    rounds += 1
+
+                    tasks = []
+                    remaining = episodes - ep
+                    while remaining > 0 and len(tasks) < workers:
+                        count = min(episodes_per_task, remaining)
+                        fens = [random.choice(custom_fens) for _ in range(count)]
+                        tasks.append((fens, self.epsilon, sync_path, version, random.getrandbits(32)))
+                        remaining -= count
+
+                    for results, cache_stats in pool.map(_run_worker_task, tasks):
+                        if cache_stats and self.move_cache is not None:
+                            self.move_cache.merge_stats(cache_stats)
+                        for outcome, total_reward, moves_count, transitions in results:
+                            ep += 1
+                            self._learn(transitions)
+                            self._record_episode(outcome, total_reward, moves_count)
+                            self._end_episode(ep, episodes, checkpoint_every)
+        finally:
+            if os.path.exists(sync_path):
+                os.remove(sync_path)
+
+        self._finish_training()
+
+    def train_async(self, episodes=1000, custom_fens=None, engines=4, concurrency=16,
+                    verbose=False, checkpoint_every=0):
+        """Train with many episodes in flight over a pool of asyncio engines.
+
+        Runs `concurrency` episodes as coroutines that share `engines` Stockfish
+        processes (started with chess.engine.popen_uci), so the agent's own
+        work overlaps with outstanding engine requests. Metrics are recorded in
+        episode order; episodes use the epsilon current when they take a step.
+        """
+        if engines < 1 and self.opponent is None:
+            raise ValueError("train_async needs at least one engine")
+        asyncio.run(self._train_async(episodes, custom_fens, engines, concurrency, verbose, checkpoint_every))
+
+    async def _train_async(self, episodes, custom_fens, engines, concurrency, verbose, checkpoint_every):
+        custom_fens = self._prepare_fens(custom_fens)
+        self._start_training(episodes, checkpoint_every)
+
+        pool = asyncio.Queue()
+        # An in-process opponent answers directly, no engine processes needed
+        for _ in range(engines if self.opponent is None else 0):
+            _, engine = await chess.engine.popen_uci(self.stockfish_path)
+            await engine.configure({"Skill Level": self.stockfish_skill})
+            pool.put_nowait(engine)
+
+        cache = self.move_cache
+        limit = chess.engine.Limit(depth=1)
+
+        async def play(board, verbose):
+            episode = self._episode(board, verbose)
+            try:
+                position = next(episode)
+                while True:
+                    move = cache.get(position, limit) if cache is not None else None
+                    if move is None:
+                        if self.opponent is not None:
+                            result = self.opponent.play(position, limit)
+                        else:
+                            engine = await pool.get()
+                            try:
+                                result = await engine.play(position, limit)
+                            finally:
+                                pool.put_nowait(engine)
+                        move = result.move
+                        if cache is not None:
+                            cache.put(position, limit, move)
+                    position = episode.send(move)
+            except StopIteration as stop:
+                return stop.value
+
+        finished = {}
+        recorded = 0
+        episode_numbers = iter(range(1, episodes + 1))
+
+        async def runner():
+            nonlocal recorded
+            for ep in episode_numbers:
+                board = self._new_board(random.choice(custom_fens))
+                finished[ep] = await play(board, verbose and ep % 500 == 0)
+                # Record finished episodes in order
+                while recorded + 1 in finished:
+                    recorded += 1
+                    self._record_episode(*finished.pop(recorded))
+                    self._end_episode(recorded, episodes, checkpoint_every)
+
+        try:
+            await asyncio.gather(*(runner() for _ in range(concurrency)))
+        finally:
+            while not pool.empty():
+                await pool.get_nowait().quit()
+
+        self._finish_training()
+
+    def tablebase_accuracy(self, tablebase, custom_fens):
+        """Compare greedy moves with tablebase moves on positions where the agent moves.
+
+        Returns the counts from tablebase.policy_accuracy.
+        """
+        boards = [chess.Board(fen) for fen in self._prepare_fens(custom_fens)]
+        boards = [board for board in boards if self._is_agent_turn(board)]
+        epsilon = self.epsilon
+        self.epsilon = 0.0
+        try:
+            return policy_accuracy(tablebase, boards, self._epsilon_greedy_action)
+        finally:
+            self.epsilon = epsilon
+
     def save(self):
-        with open(self.qtable_file, "wb") as f:
-            pickle.dump(self.Q_table, f)
+        # A full snapshot makes the pending changes and the update log redundant
+        tracking = self.Q_table.dirty is not None
+        if tracking:
+            self.Q_table.dirty.clear()
+            if isinstance(self.Q_table, BoundedTable):
+                self.Q_table.deleted.clear()
+        # .qtb files use the memory-mapped binary format, anything else is pickled
+        save_qtable(self.Q_table, self.qtable_file)
+        if self.qtable_file.endswith(".qtb") and not isinstance(self.Q_table, MappedQTable):
+            # Go on from the file in the form load() gives back, so that the
+            # update log is written in the format it is replayed into
+            self.Q_table = self._adopt(load_qtable(self.qtable_file, self.check_collisions))
+            if tracking:
+                self.Q_table.track_changes()
+        self.log.reset()
+        self._snapshot_synced = True
         print(f"💾 Saved Q-table to {self.qtable_file} ({len(self.Q_table)} entries)")
 
+    def checkpoint(self):
+        """Append entries changed since the last checkpoint to the update log.
+
+        Cost scales with the number of changed entries; once the log outgrows
+        the snapshot it is compacted into a new full snapshot instead.
+        """
+        self.log.append(self.Q_table.changes())
+        if os.path.getsize(self.log.path) > os.path.getsize(self.qtable_file):
+            self.save()
+
     def load(self, qtable_file=None):
         qtable_file = qtable_file or self.qtable_file
+        log = QTableLog(qtable_file)
         if os.path.exists(qtable_file):
-            with open(qtable_file, "rb") as f:
-                self.Q_table = pickle.load(f)
-            print(f"✅ Loaded Q-table from {qtable_file} ({len(self.Q_table)} entries)")
+            table = load_qtable(qtable_file, self.check_collisions)
         else:
             print(f"⚠️  File {qtable_file} not found, starting with empty Q-table")
-            self.Q_table = {}
+            table = make_qtable(self.qtable_backend, self.check_collisions)
+
+        # Replay in the format the log was written in, before any conversion.
+        # After saving a .qtb the agent goes on with the converted table (see
+        # save), so that is the format of its log.
+        if qtable_file.endswith(".qtb"):
+            table = self._adopt(table)
+        replayed = log.replay(table) if isinstance(table, (QTable, NeuralQTable)) else 0
+        if replayed:
+            print(f"🩹 Recovered {replayed} logged updates from {log.path}")
+        self.Q_table = self._adopt(table)
+        if qtable_file == self.qtable_file:
+            # A converted table no longer matches the snapshot a log would extend
+            self._snapshot_synced = not replayed and self.Q_table is table
+        print(f"✅ Loaded Q-table from {qtable_file} ({len(self.Q_table)} entries)")
+
+    def _adopt(self, table):
+        """table converted to the configured backend (and capacity)"""
+        table = as_backend(table, self.qtable_backend, self.check_collisions)
+        if self.qtable_capacity:
+            table = bound_qtable(table, self.qtable_capacity, self.qtable_eviction)
+        return table
 
     def __del__(self):
         try:
-            self.engine.quit()
+            if self._engine is not None:
+                self._engine.quit()
         except:
             pass
 
 
+# Worker process state for QLearningChess.train_parallel
+_worker_agent = None
+_worker_version = 0
+
+
+def _init_worker(config):
+    global _worker_agent
+    _worker_agent = QLearningChess(load_existing=False, **config)
+
+
+def _run_worker_task(task):
+    """Play a batch of episodes in a worker.
+
+    Returns the per-episode results with transitions, and the worker's move
+    cache counters for the batch (None without a cache).
+    """
+    global _worker_version
+    fens, epsilon, sync_path, version, seed = task
+    agent = _worker_agent
+    if version != _worker_version:
+        with open(sync_path, "rb") as f:
+            agent.Q_table = pickle.load(f)
+        _worker_version = version
+
+    random.seed(seed)
+    np.random.seed(seed)
+    # Every worker unpickled the same opponent, random state included
+    rng = getattr(agent.opponent, "rng", None)
+    if rng is not None:
+        rng.seed(seed)
+    agent.epsilon = epsilon
+    results = []
+    for fen in fens:
+        transitions = []
+        outcome, total_reward, moves_count = agent._play_episode(agent._new_board(fen), transitions=transitions)
+        results.append((outcome, total_reward, moves_count, transitions))
+
+    cache_stats = None
+    if agent.move_cache is not None:
+        agent.move_cache.flush()
+        cache_stats = agent.move_cache.stats()
+        agent.move_cache.reset_stats()
+    return results, cache_stats
+
+
 def plot_results(agent_white, agent_black, scenario_num):
     """Plot training results for both agents - ALL 12 PLOTS (6 original + 6 new)"""
     # Create images directory if it doesn't exist
@@ -505,6 +1069,11 @@ def plot_results(agent_white, agent_black, scenario_num):
     
     if agent_black and len(agent_black.episode_qtable_size) > 0:
         ax11.plot(agent_black.episode_qtable_size, color='red', linewidth=2, label='Black')
+
+    # Cumulative evictions of capacity-bounded tables
+    for agent, color, name in ((agent_white, 'blue', 'White'), (agent_black, 'red', 'Black')):
+        if agent and any(getattr(agent, 'episode_evictions', ())):
+            ax11.plot(agent.episode_evictions, color=color, linestyle='--', linewidth=1, label=f'{name} evictions')
     
     ax11.set_xlabel("Episodes", fontsize=10)
     ax11.set_ylabel("Q-table Size (entries)", fontsize=10)
@@ -545,17 +1114,29 @@ def plot_results(agent_white, agent_black, scenario_num):
     plt.close()
 
 
-def train_scenario(scenario_num, num_positions=50, episodes=5000):
-    """Train both White and Black agents for a given scenario using shared Q-table"""
+def train_scenario(scenario_num, num_positions=50, episodes=5000, positions_file=None):
+    """Train both White and Black agents for a given scenario using shared Q-table.
+
+    With positions_file (a .npy position dataset), the training positions are
+    generated once, saved there and reused by later runs.
+    """
     print(f"\n{'='*60}")
     print(f"SCENARIO {scenario_num}")
     print(f"{'='*60}")
     
-    # Generate training positions
-    print(f"\n📋 Generating {num_positions} training positions for Scenario {scenario_num}...")
-    custom_boards = get_scenario_board(scenario_num, num_positions)
-    custom_scenarios = [board.fen() for board in custom_boards]
-    print(f"✅ Generated {len(custom_scenarios)} positions\n")
+    if positions_file and os.path.exists(positions_file):
+        custom_scenarios = PositionDataset(positions_file)
+        print(f"\n📂 Loaded {len(custom_scenarios)} training positions from {positions_file}\n")
+    elif positions_file:
+        print(f"\n📋 Generating {num_positions} training positions for Scenario {scenario_num}...")
+        custom_scenarios = write_scenario_dataset(positions_file, [scenario_num], num_positions)
+        print(f"✅ Saved {len(custom_scenarios)} positions to {positions_file}\n")
+    else:
+        # Generate training positions
+        print(f"\n📋 Generating {num_positions} training positions for Scenario {scenario_num}...")
+        custom_boards = get_scenario_board(scenario_num, num_positions)
+        custom_scenarios = [board.fen() for board in custom_boards]
+        print(f"✅ Generated {len(custom_scenarios)} positions\n")
 
     # Single Q-table file for this scenario (will be saved in agents folder)
     qtable_file = f"Q_table_scenario_{scenario_num}.pkl"
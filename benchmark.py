@@ -0,0 +1,209 @@
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import random
+import shutil
+import sys
+import tempfile
+import time
+
+import chess
+import chess.engine
+import numpy as np
+
+from agents_old import QLearningChess
+from get_board import get_scenario_board
+from opponents import AlphaBetaOpponent
+
+DEFAULT_SCENARIOS = [2, 3, 4, 10, 17]
+
+# Metrics where a larger value is better; for the others smaller is better
+HIGHER_IS_BETTER = {"episodes_per_s", "plies_per_s", "generator_positions_per_s"}
+
+
+class CountingEngine:
+    """Engine wrapper counting play() calls"""
+
+    def __init__(self, engine):
+        self.engine = engine
+        self.calls = 0
+
+    def play(self, board, limit, **kwargs):
+        self.calls += 1
+        return self.engine.play(board, limit, **kwargs)
+
+    def __getattr__(self, name):
+        return getattr(self.engine, name)
+
+
+def find_stockfish(path=None):
+    path = path or shutil.which("stockfish") or "/usr/games/stockfish"
+    return path if os.path.exists(path) else None
+
+
+def make_opponent(stockfish_path, seed):
+    """Stockfish if it is installed, else the deterministic in-process alpha-beta opponent"""
+    if stockfish_path:
+        engine = chess.engine.SimpleEngine.popen_uci(stockfish_path)
+        engine.configure({"Skill Level": 0})
+        return engine, "stockfish"
+    return AlphaBetaOpponent(depth=1, seed=seed), "alphabeta(depth=1)"
+
+
+def bench_training(scenario, episodes, positions, seed, backend, stockfish_path):
+    """Train one agent from scratch and return its throughput metrics"""
+    random.seed(seed)
+    np.random.seed(seed)
+    fens = [board.fen() for board in get_scenario_board(scenario, positions)]
+    engine, engine_name = make_opponent(stockfish_path, seed)
+    engine = CountingEngine(engine)
+
+    workdir = tempfile.mkdtemp(prefix="chess_bench_")
+    cwd = os.getcwd()
+    os.chdir(workdir)
+    try:
+        with contextlib.redirect_stdout(io.StringIO()):
+            agent = QLearningChess(opponent=engine, qtable_backend=backend, qtable_file="bench.pkl",
+                                   epsilon=0.5, epsilon_decay_after_win=0)
+            start = time.perf_counter()
+            agent.train(episodes=episodes, custom_fens=fens)
+            elapsed = time.perf_counter() - start
+        size = os.path.getsize(agent.qtable_file)
+    finally:
+        os.chdir(cwd)
+        shutil.rmtree(workdir, ignore_errors=True)
+        engine.quit()
+
+    plies = sum(agent.episode_lengths)
+    entries = len(agent.Q_table)
+    return {
+        "episodes_per_s": episodes / elapsed,
+        "plies_per_s": plies / elapsed,
+        "engine_calls_per_ply": engine.calls / plies if plies else 0.0,
+        "qtable_bytes_per_entry": size / entries if entries else 0.0,
+        "plies": plies,
+        "wins": agent.wins,
+    }, engine_name
+
+
+def bench_generator(scenario, n, seed):
+    random.seed(seed)
+    start = time.perf_counter()
+    boards = get_scenario_board(scenario, n)
+    return len(boards) / (time.perf_counter() - start)
+
+
+def run(scenarios, episodes, positions, generator_positions, seed, backend, repeat, stockfish_path):
+    results = {}
+    engine_name = None
+    for scenario in scenarios:
+        runs = []
+        for _ in range(repeat):
+            metrics, engine_name = bench_training(scenario, episodes, positions, seed, backend, stockfish_path)
+            metrics["generator_positions_per_s"] = bench_generator(scenario, generator_positions, seed)
+            runs.append(metrics)
+        # Best of the repeats for rates, they only differ by timing noise
+        best = dict(runs[0])
+        for metrics in runs[1:]:
+            for name in HIGHER_IS_BETTER:
+                best[name] = max(best[name], metrics[name])
+        results[f"scenario_{scenario}"] = best
+        print(f"⏱  Scenario {scenario}: {best['episodes_per_s']:.1f} episodes/s, {best['plies_per_s']:.0f} plies/s, "
+              f"{best['engine_calls_per_ply']:.3f} engine calls/ply, {best['qtable_bytes_per_entry']:.1f} B/entry, "
+              f"{best['generator_positions_per_s']:.0f} positions/s", file=sys.stderr)
+
+    return {
+        "config": {
+            "scenarios": scenarios,
+            "episodes": episodes,
+            "positions": positions,
+            "generator_positions": generator_positions,
+            "seed": seed,
+            "backend": backend,
+            "engine": engine_name,
+        },
+        "environment": {
+            "python": platform.python_version(),
+            "python_chess": chess.__version__,
+            "numpy": np.__version__,
+            "machine": platform.machine(),
+            "cpus": os.cpu_count(),
+        },
+        "results": results,
+    }
+
+
+def compare(report, baseline, threshold):
+    """Regressions of report against baseline, as (scenario, metric, baseline value, value) tuples.
+
+    Rates may drop, and costs may grow, by at most threshold (a fraction).
+    """
+    if report["config"] != baseline["config"]:
+        print("⚠️  Benchmark configuration differs from the baseline; comparing anyway", file=sys.stderr)
+    regressions = []
+    for scenario, metrics in report["results"].items():
+        reference = baseline["results"].get(scenario)
+        if reference is None:
+            continue
+        for name in sorted(HIGHER_IS_BETTER | {"engine_calls_per_ply", "qtable_bytes_per_entry"}):
+            old, new = reference.get(name), metrics.get(name)
+            if old is None or new is None:
+                continue
+            if name in HIGHER_IS_BETTER:
+                worse = new < old * (1 - threshold)
+            else:
+                worse = new > old * (1 + threshold)
+            if worse:
+                regressions.append((scenario, name, old, new))
+    return regressions
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Training throughput benchmark")
+    parser.add_argument("--scenarios", type=int, nargs="*", default=DEFAULT_SCENARIOS)
+    parser.add_argument("--episodes", type=int, default=200, help="training episodes per scenario")
+    parser.add_argument("--positions", type=int, default=100, help="training start positions per scenario")
+    parser.add_argument("--generator-positions", type=int, default=10000,
+                        help="positions generated per scenario for the generator rate")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--backend", default="zobrist", help="Q-table backend")
+    parser.add_argument("--repeat", type=int, default=3, help="runs per scenario; rates keep the best")
+    parser.add_argument("--stockfish", default=None,
+                        help="Stockfish binary (default: from PATH; the alpha-beta stand-in if not installed)")
+    parser.add_argument("--offline", action="store_true", help="always use the alpha-beta stand-in")
+    parser.add_argument("--output", default=None, help="write the JSON results here (default: stdout)")
+    parser.add_argument("--baseline", default="benchmarks/baseline.json")
+    parser.add_argument("--save-baseline", action="store_true", help="store the results as the new baseline")
+    parser.add_argument("--threshold", type=float, default=0.1, help="allowed regression (fraction, default 0.1)")
+    args = parser.parse_args()
+
+    stockfish_path = None if args.offline else find_stockfish(args.stockfish)
+    report = run(args.scenarios, args.episodes, args.positions, args.generator_positions, args.seed,
+                 args.backend, args.repeat, stockfish_path)
+
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+
+    if args.save_baseline:
+        os.makedirs(os.path.dirname(args.baseline) or ".", exist_ok=True)
+        with open(args.baseline, "w") as f:
+            f.write(text + "\n")
+        print(f"💾 Saved baseline to {args.baseline}", file=sys.stderr)
+    elif os.path.exists(args.baseline):
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        regressions = compare(report, baseline, args.threshold)
+        for scenario, name, old, new in regressions:
+            print(f"❌ {scenario} {name}: {old:.4g} -> {new:.4g}", file=sys.stderr)
+        if regressions:
+            sys.exit(1)
+        print(f"✅ No regressions beyond {args.threshold:.0%} against {args.baseline}", file=sys.stderr)
+    else:
+        print(f"ℹ️  No baseline at {args.baseline}; run with --save-baseline to store one", file=sys.stderr)
@@ -0,0 +1,140 @@
+import os
+import pickle
+
+
+def snapshot_id(path):
+    """Identify a snapshot file by size and modification time (None if missing)"""
+    try:
+        st = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return (st.st_size, st.st_mtime_ns)
+
+
+class QTableLog:
+    """Append-only log of Q-table updates made since the last full snapshot.
+
+    The log starts with the id of the snapshot it extends, followed by one
+    pickled batch of change records per flush. A log whose id does not match
+    the snapshot on disk predates it (the process stopped between writing a
+    snapshot and resetting the log) and is ignored. A batch cut short by a
+    crash is dropped on replay.
+    """
+
+    def __init__(self, snapshot_path):
+        self.snapshot_path = snapshot_path
+        self.path = snapshot_path + ".log"
+
+    def reset(self):
+        """Start an empty log for the current snapshot (compaction)"""
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "wb") as f:
+            pickle.dump(snapshot_id(self.snapshot_path), f)
+        os.replace(tmp_path, self.path)
+
+    def append(self, records):
+        """Append one batch of records and make it durable; returns bytes written"""
+        if not records:
+            return 0
+        if not os.path.exists(self.path):
+            self.reset()
+        with open(self.path, "ab") as f:
+            start = f.tell()
+            pickle.dump(records, f, protocol=pickle.HIGHEST_PROTOCOL)
+            f.flush()
+            os.fsync(f.fileno())
+            return f.tell() - start
+
+    def replay(self, table):
+        """Apply logged batches to a freshly loaded snapshot; returns records applied"""
+        if not os.path.exists(self.path):
+            return 0
+        applied = 0
+        with open(self.path, "rb") as f:
+            try:
+                if pickle.load(f) != snapshot_id(self.snapshot_path):
+                    return 0
+                while True:
+                    records = pickle.load(f)
+                    table.apply_changes(records)
+                    applied += len(records)
+            except (EOFError, pickle.UnpicklingError):
+                pass
+        return applied
+
+
+def _entry_values(table):
+    """{(hash, move code): value} of any tabular Q-table"""
+    from qtable import _table_entries
+    hashes, codes, values = _table_entries(table)
+    found = {}
+    for key, value in zip(zip(hashes.tolist(), codes.tolist()), values.tolist()):
+        found.setdefault(key, value)  # in-memory updates come first and win
+    return found
+
+
+def check_recovery(backend, qtable_file, capacity=None, episodes=12, checkpoint_every=5, runs=2, seed=0):
+    """Train with checkpoints, drop the agent without saving (a crash), reload it
+    and compare with the table at the last checkpoint. Each of the runs goes on
+    from the table recovered by the previous one. Returns the entry count.
+    """
+    import contextlib
+    import io
+    import random
+    import shutil
+    import tempfile
+
+    import numpy as np
+
+    from agents_old import QLearningChess
+    from get_board import get_scenario_board
+    from opponents import AlphaBetaOpponent
+
+    random.seed(seed)
+    np.random.seed(seed)
+    fens = [board.fen() for board in get_scenario_board(2, 20)]
+    options = dict(qtable_backend=backend, qtable_file=qtable_file, qtable_capacity=capacity, epsilon=0.5)
+
+    workdir = tempfile.mkdtemp(prefix="chess_recovery_")
+    cwd = os.getcwd()
+    os.chdir(workdir)
+    try:
+        for run in range(1, runs + 1):
+            with contextlib.redirect_stdout(io.StringIO()):
+                agent = QLearningChess(opponent=AlphaBetaOpponent(depth=1, seed=seed), load_existing=True, **options)
+                agent._start_training(episodes, checkpoint_every)
+                for ep in range(1, episodes + 1):
+                    board = agent._new_board(random.choice(fens))
+                    agent._record_episode(*agent._play_episode(board))
+                    agent._end_episode(ep, episodes, checkpoint_every)
+                    if ep % checkpoint_every == 0:
+                        expected = _entry_values(agent.Q_table)
+                        if capacity:
+                            metadata = dict(agent.Q_table.visits), dict(agent.Q_table.last_touch)
+                del agent
+                reloaded = QLearningChess(opponent=AlphaBetaOpponent(depth=1, seed=seed), load_existing=True, **options)
+            found = _entry_values(reloaded.Q_table)
+            if found != expected:
+                raise AssertionError(f"{backend} {qtable_file}, run {run}: reloaded {len(found)} entries, "
+                                     f"last checkpoint had {len(expected)}")
+            if capacity and (reloaded.Q_table.visits, reloaded.Q_table.last_touch) != metadata:
+                raise AssertionError(f"{backend} {qtable_file}, run {run}: eviction metadata differs")
+            del reloaded
+    finally:
+        os.chdir(cwd)
+        shutil.rmtree(workdir, ignore_errors=True)
+    return len(found)
+
+
+if __name__ == "__main__":
+    cases = [(backend, f"check.{ext}", None) for ext in ("qtb", "pkl") for backend in ("fen", "zobrist", "rows", "mmap")
+             if not (backend == "mmap" and ext == "pkl")]
+    # Bounded tables evict entries between checkpoints
+    cases += [("fen", "check_bounded.pkl", 150), ("zobrist", "check_bounded.pkl", 150)]
+    for backend, qtable_file, capacity in cases:
+        try:
+            count = check_recovery(backend, qtable_file, capacity)
+            print(f"✅ {backend} {qtable_file}{f' (capacity {capacity})' if capacity else ''}: "
+                  f"{count} entries restored from the last checkpoint")
+        except Exception as e:
+            print(f"❌ {backend} {qtable_file}: {type(e).__name__}: {e}")
@@ -0,0 +1,150 @@
+import os
+import random
+
+import chess
+import numpy as np
+
+from get_board import SCENARIO_MAP, ScenarioPositions, placement_bitboards, sample_scenario_bitboards
+
+# One fixed-size record per position: the occupied squares, one 4-bit piece
+# code per occupied square (in square order, first square in the low bits)
+# and the side to move. Up to 8 pieces; no castling rights or en passant.
+RECORD_DTYPE = np.dtype([("occupied", "<u8"), ("pieces", "<u4"), ("turn", "u1")])
+MAX_PIECES = 8
+
+# Piece code: piece type, plus 8 for white
+SYMBOLS = {piece_type | (8 if color else 0): chess.Piece(piece_type, color).symbol()
+           for piece_type in chess.PIECE_TYPES for color in chess.COLORS}
+
+
+def encode_bitboards(bitboards, turn):
+    """Records for positions given as placement_bitboards tuples.
+
+    bitboards is a sequence (or (n, 8) array) of (pawns, knights, bishops,
+    rooks, queens, kings, white, black); turn is one color or one per row.
+    """
+    masks = np.asarray(bitboards, dtype=np.uint64).reshape(-1, 8)
+    records = np.zeros(len(masks), dtype=RECORD_DTYPE)
+    white = masks[:, 6]
+    occupied = white | masks[:, 7]
+    records["occupied"] = occupied
+    records["turn"] = turn
+
+    one = np.uint64(1)
+    pieces = np.zeros(len(masks), dtype=np.uint64)
+    count = np.zeros(len(masks), dtype=np.uint64)
+    for square in chess.SQUARES:
+        bit = one << np.uint64(square)
+        here = (occupied & bit) != 0
+        if not here.any():
+            continue
+        code = np.where((white & bit) != 0, np.uint64(8), np.uint64(0))
+        for piece_type in chess.PIECE_TYPES:
+            code |= np.where((masks[:, piece_type - 1] & bit) != 0, np.uint64(piece_type), np.uint64(0))
+        pieces |= np.where(here, code << (np.uint64(4) * count), np.uint64(0))
+        count += here
+    if (count > MAX_PIECES).any():
+        raise ValueError(f"Positions with more than {MAX_PIECES} pieces can not be stored")
+    records["pieces"] = pieces
+    return records
+
+
+def encode_boards(boards):
+    """Records for chess.Board objects or FEN strings"""
+    boards = [chess.Board(board) if isinstance(board, str) else board for board in boards]
+    bitboards = [(board.pawns, board.knights, board.bishops, board.rooks, board.queens, board.kings,
+                  board.occupied_co[chess.WHITE], board.occupied_co[chess.BLACK]) for board in boards]
+    turns = np.array([board.turn for board in boards], dtype=np.uint8)
+    return encode_bitboards(bitboards, turns)
+
+
+def decode_fen(record):
+    """FEN of one record"""
+    occupied, pieces, turn = int(record["occupied"]), int(record["pieces"]), int(record["turn"])
+    symbols = [None] * 64
+    for square in chess.scan_forward(occupied):
+        symbols[square] = SYMBOLS[pieces & 15]
+        pieces >>= 4
+
+    rows = []
+    for rank in range(7, -1, -1):
+        row = ""
+        empty = 0
+        for symbol in symbols[rank * 8:rank * 8 + 8]:
+            if symbol is None:
+                empty += 1
+            else:
+                if empty:
+                    row += str(empty)
+                    empty = 0
+                row += symbol
+        if empty:
+            row += str(empty)
+        rows.append(row)
+    return "/".join(rows) + (" w" if turn else " b") + " - - 0 1"
+
+
+def save_positions(path, records):
+    np.save(path, np.asarray(records, dtype=RECORD_DTYPE))
+
+
+class PositionDataset:
+    """Positions stored in a .npy file of RECORD_DTYPE records, memory-mapped.
+
+    Behaves as a read-only sequence of FEN strings, decoded only when an item
+    is read, so it can be passed as train(custom_fens=...) and each episode
+    decodes just its starting position.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.records = np.load(path, mmap_mode="r")
+        if self.records.dtype != RECORD_DTYPE:
+            raise ValueError(f"{path} does not contain position records")
+
+    def __reduce__(self):
+        return PositionDataset, (self.path,)
+
+    def __repr__(self):
+        return f"PositionDataset({self.path!r}, {len(self)} positions)"
+
+    def __len__(self):
+        return len(self.records)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [decode_fen(record) for record in self.records[index]]
+        return decode_fen(self.records[index])
+
+    def __iter__(self):
+        for record in self.records:
+            yield decode_fen(record)
+
+    def board(self, index):
+        return chess.Board(self[index])
+
+
+def write_scenario_dataset(path, scenarios, n, uniform=False, cache_dir=None):
+    """Generate n unique positions per scenario and save them as one dataset.
+
+    Positions go straight from the batch samplers (or, with uniform, the
+    enumerated position spaces) to records without building chess.Board
+    objects. Returns the PositionDataset.
+    """
+    chunks = []
+    for scenario in scenarios:
+        spec = SCENARIO_MAP[scenario]
+        if uniform:
+            positions = ScenarioPositions(scenario, cache_dir)
+            rng = np.random.default_rng(random.getrandbits(64))
+            indices = rng.choice(len(positions), size=min(n, len(positions)), replace=False)
+            bitboards = placement_bitboards(spec.pieces, positions.squares(indices))
+        else:
+            bitboards = sample_scenario_bitboards(scenario, n)
+        chunks.append(encode_bitboards(bitboards, spec.turn))
+
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    save_positions(path, np.concatenate(chunks))
+    return PositionDataset(path)
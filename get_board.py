@@ -1,1513 +1,446 @@
+import os
 import chess
 import random
+import multiprocessing
+import numpy as np
+
+# Attack tables
+
+def _attack_masks(piece_type, color):
+    # Attacks on an empty board: placements ignore blockers
+    masks = []
+    for sq in chess.SQUARES:
+        if piece_type == chess.PAWN:
+            mask = chess.BB_PAWN_ATTACKS[color][sq]
+        elif piece_type == chess.KNIGHT:
+            mask = chess.BB_KNIGHT_ATTACKS[sq]
+        elif piece_type == chess.KING:
+            mask = chess.BB_KING_ATTACKS[sq]
+        else:
+            mask = 0
+            if piece_type in (chess.BISHOP, chess.QUEEN):
+                mask |= chess.BB_DIAG_ATTACKS[sq][0]
+            if piece_type in (chess.ROOK, chess.QUEEN):
+                mask |= chess.BB_RANK_ATTACKS[sq][0] | chess.BB_FILE_ATTACKS[sq][0]
+        masks.append(mask)
+    return np.array(masks, dtype=np.uint64)
+
+ATTACK_MASKS = {
+    (piece_type, color): _attack_masks(piece_type, color)
+    for piece_type in chess.PIECE_TYPES for color in chess.COLORS
+}
 
-# Helper functions
-
-# Check if a knight at knight_square attacks target_square
-def knight_attacks(knight_square, target_square):
-    knight_moves = [(-2, -1), (-2, 1), (-1, -2), (-1, 2), (1, -2), (1, 2), (2, -1), (2, 1)]
-    knight_file = chess.square_file(knight_square)
-    knight_rank = chess.square_rank(knight_square)
-    target_file = chess.square_file(target_square)
-    target_rank = chess.square_rank(target_square)
-
-    for df, dr in knight_moves:
-        if (knight_file + df == target_file) and (knight_rank + dr == target_rank):
-            return True
-    return False
-
-# Scenario 1: King vs King and Pawn
-def scenario_king_vs_king_and_pawn():
-    board = chess.Board()
-    board.clear_board()
-
-    while True:
-
-        board.clear_board()
-        # Place White King
-        white_king_square = random.choice(list(chess.SQUARES))
-
-        # Place Black King (not same and not adjacent)
-        possible_black_squares = [
-            sq for sq in chess.SQUARES
-            if sq != white_king_square and chess.square_distance(sq, white_king_square) > 1
-        ]
-        black_king_square = random.choice(possible_black_squares)
-
-        # Place White Pawn (not on 1st or 8th rank, not same as either king)
-        possible_pawn_squares = [
-            sq for sq in chess.SQUARES
-            if sq not in [white_king_square, black_king_square]
-            and 0 < chess.square_rank(sq) < 7
-        ]
-        white_pawn_square = random.choice(possible_pawn_squares)
-
-        # Check that pawn isn’t attacking the black king (so not illegal “check”)
-        pawn_attack_squares = list(chess.SquareSet(chess.BB_EMPTY))
-        # A white pawn attacks diagonally forward
-        if chess.square_rank(white_pawn_square) < 7:
-            file = chess.square_file(white_pawn_square)
-            rank = chess.square_rank(white_pawn_square)
-            if file > 0:
-                pawn_attack_squares.append(chess.square(file - 1, rank + 1))
-            if file < 7:
-                pawn_attack_squares.append(chess.square(file + 1, rank + 1))
-
-        if black_king_square in pawn_attack_squares:
-            continue  # illegal — pawn attacking king
-
-        # Construct board
-        board.clear_board()
-        board.set_piece_at(white_king_square, chess.Piece(chess.KING, chess.WHITE))
-        board.set_piece_at(black_king_square, chess.Piece(chess.KING, chess.BLACK))
-        board.set_piece_at(white_pawn_square, chess.Piece(chess.PAWN, chess.WHITE))
-
-        # Success: found a valid simple position
-        break
-
-    return board
-
-# Scenario 2: King and Rook vs King
-def scenario_king_and_rook_vs_king():
-    board = chess.Board()
-    board.clear_board()
-
-    while True:
-
-        board.clear_board()
-        # Place White King
-        white_king_square = random.choice(list(chess.SQUARES))
-
-        # Place Black King (not same and not adjacent)
-        possible_black_squares = [
-            sq for sq in chess.SQUARES
-            if sq != white_king_square and chess.square_distance(sq, white_king_square) > 1
-        ]
-        black_king_square = random.choice(possible_black_squares)
-
-        # Place White Rook (not same as either king)
-        possible_rook_squares = [
-            sq for sq in chess.SQUARES
-            if sq not in [white_king_square, black_king_square]
-        ]
-        white_rook_square = random.choice(possible_rook_squares)
-
-        # Check that rook isn’t attacking the black king (so not illegal “check”)
-        if chess.square_file(white_rook_square) == chess.square_file(black_king_square) or chess.square_rank(white_rook_square) == chess.square_rank(black_king_square):
-            continue  # illegal — rook attacking king
-
-        # Construct board
-        board.clear_board()
-        board.set_piece_at(white_king_square, chess.Piece(chess.KING, chess.WHITE))
-        board.set_piece_at(black_king_square, chess.Piece(chess.KING, chess.BLACK))
-        board.set_piece_at(white_rook_square, chess.Piece(chess.ROOK, chess.WHITE))
-
-        # Success: found a valid simple position
-        break
-
-    return board
-
-# Sceario 3: King and Queen vs King
-def scenario_king_and_queen_vs_king():
-    board = chess.Board()
-    board.clear_board()
-
-    while True:
-
-        board.clear_board()
-        # Place White King
-        white_king_square = random.choice(list(chess.SQUARES))
-
-        # Place Black King (not same and not adjacent)
-        possible_black_squares = [
-            sq for sq in chess.SQUARES
-            if sq != white_king_square and chess.square_distance(sq, white_king_square) > 1
-        ]
-        black_king_square = random.choice(possible_black_squares)
-
-        # Place White Queen (not same as either king)
-        possible_queen_squares = [
-            sq for sq in chess.SQUARES
-            if sq not in [white_king_square, black_king_square]
-        ]
-        white_queen_square = random.choice(possible_queen_squares)
-
-        # Check that queen isn’t attacking the black king (so not illegal “check”)
-        if (chess.square_file(white_queen_square) == chess.square_file(black_king_square) or
-            chess.square_rank(white_queen_square) == chess.square_rank(black_king_square) or
-            abs(chess.square_file(white_queen_square) - chess.square_file(black_king_square)) ==
-            abs(chess.square_rank(white_queen_square) - chess.square_rank(black_king_square))):
-            continue  # illegal — queen attacking king
-
-        # Construct board
-        board.clear_board()
-        board.set_piece_at(white_king_square, chess.Piece(chess.KING, chess.WHITE))
-        board.set_piece_at(black_king_square, chess.Piece(chess.KING, chess.BLACK))
-        board.set_piece_at(white_queen_square, chess.Piece(chess.QUEEN, chess.WHITE))
-
-        # Success: found a valid simple position
-        break
-
-    return board
-
-
-# Scenario 4: King, Queeen and Rook vs King
-def scenario_king_queen_rook_vs_king():
-    board = chess.Board()
-    board.clear_board()
-
-    while True:
-        board.clear_board()
-        # Place White King
-        white_king_square = random.choice(list(chess.SQUARES))
-        # Place Black King (not same and not adjacent)
-        possible_black_squares = [
-            sq for sq in chess.SQUARES
-            if sq != white_king_square and chess.square_distance(sq, white_king_square) > 1
-        ]
-        black_king_square = random.choice(possible_black_squares)
-
-        # Place White Queen (not same as either king)
-        possible_queen_squares = [
-            sq for sq in chess.SQUARES
-            if sq not in [white_king_square, black_king_square]
-        ]
-        white_queen_square = random.choice(possible_queen_squares)
-        # Place White Rook (not same as either king or queen)
-        possible_rook_squares = [
-            sq for sq in chess.SQUARES
-            if sq not in [white_king_square, black_king_square, white_queen_square]
-        ]
-        white_rook_square = random.choice(possible_rook_squares)
-
-        # Check that queen and rook aren’t attacking the black king (so not illegal “check”)
-        if (chess.square_file(white_queen_square) == chess.square_file(black_king_square) or
-            chess.square_rank(white_queen_square) == chess.square_rank(black_king_square) or
-            abs(chess.square_file(white_queen_square) - chess.square_file(black_king_square)) ==
-            abs(chess.square_rank(white_queen_square) - chess.square_rank(black_king_square)) or
-            chess.square_file(white_rook_square) == chess.square_file(black_king_square) or
-            chess.square_rank(white_rook_square) == chess.square_rank(black_king_square)):
-            continue  # illegal — queen or rook attacking king
-
-        # Construct board
-        board.clear_board()
-        board.set_piece_at(white_king_square, chess.Piece(chess.KING, chess.WHITE))
-        board.set_piece_at(black_king_square, chess.Piece(chess.KING, chess.BLACK))
-        board.set_piece_at(white_queen_square, chess.Piece(chess.QUEEN, chess.WHITE))
-        board.set_piece_at(white_rook_square, chess.Piece(chess.ROOK, chess.WHITE))
-
-        # Success: found a valid simple position
-        break  
-
-    return board
-
-# Scenario 5: King and Two Rooks vs King
-def scenario_king_and_two_rooks_vs_king():
-
-    board = chess.Board()
-    board.clear_board()
-
-    while True:
-        board.clear_board()
-        # Place White King
-        white_king_square = random.choice(list(chess.SQUARES))
-        # Place Black King (not same and not adjacent)
-        possible_black_squares = [
-            sq for sq in chess.SQUARES
-            if sq != white_king_square and chess.square_distance(sq, white_king_square) > 1
-        ]
-        black_king_square = random.choice(possible_black_squares)
-
-        # Place White Rook 1 (not same as either king)
-        possible_rook1_squares = [
-            sq for sq in chess.SQUARES
-            if sq not in [white_king_square, black_king_square]
-        ]
-        white_rook1_square = random.choice(possible_rook1_squares)
-        # Place White Rook 2 (not same as either king or rook 1)
-        possible_rook2_squares = [
-            sq for sq in chess.SQUARES
-            if sq not in [white_king_square, black_king_square, white_rook1_square]
-        ]
-        white_rook2_square = random.choice(possible_rook2_squares)
-
-        # Check that rooks aren’t attacking the black king (so not illegal “check”)
-        if (chess.square_file(white_rook1_square) == chess.square_file(black_king_square) or
-            chess.square_rank(white_rook1_square) == chess.square_rank(black_king_square) or
-            chess.square_file(white_rook2_square) == chess.square_file(black_king_square) or
-            chess.square_rank(white_rook2_square) == chess.square_rank(black_king_square)):
-            continue  # illegal — rook attacking king
-
-        # Construct board
-        board.clear_board()
-        board.set_piece_at(white_king_square, chess.Piece(chess.KING, chess.WHITE))
-        board.set_piece_at(black_king_square, chess.Piece(chess.KING, chess.BLACK))
-        board.set_piece_at(white_rook1_square, chess.Piece(chess.ROOK, chess.WHITE))
-        board.set_piece_at(white_rook2_square, chess.Piece(chess.ROOK, chess.WHITE))
-
-        # Success: found a valid simple position
-        break
-
-    return board
-
-#Scenario 6: King and two Bishops vs King
-def scenario_king_and_two_bishops_vs_king():
-
-    board = chess.Board()
-    board.clear_board()
-
-    while True:
-        board.clear_board()
-        # Place White King
-        white_king_square = random.choice(list(chess.SQUARES))
-        # Place Black King (not same and not adjacent)
-        possible_black_squares = [
-            sq for sq in chess.SQUARES
-            if sq != white_king_square and chess.square_distance(sq, white_king_square) > 1
-        ]
-        black_king_square = random.choice(possible_black_squares)
-
-        # Place White Bishop 1 (not same as either king)
-        possible_bishop1_squares = [
-            sq for sq in chess.SQUARES
-            if sq not in [white_king_square, black_king_square]
-        ]
-        white_bishop1_square = random.choice(possible_bishop1_squares)
-        # Place White Bishop 2 (not same as either king or bishop 1)
-        possible_bishop2_squares = [
-            sq for sq in chess.SQUARES
-            if sq not in [white_king_square, black_king_square, white_bishop1_square]
-        ]
-        white_bishop2_square = random.choice(possible_bishop2_squares)
-
-        # Check that bishops aren’t attacking the black king (so not illegal “check”)
-        if (abs(chess.square_file(white_bishop1_square) - chess.square_file(black_king_square)) ==
-            abs(chess.square_rank(white_bishop1_square) - chess.square_rank(black_king_square)) or
-            abs(chess.square_file(white_bishop2_square) - chess.square_file(black_king_square)) ==
-            abs(chess.square_rank(white_bishop2_square) - chess.square_rank(black_king_square))):
-            continue  # illegal — bishop attacking king
-
-        # Construct board
-        board.clear_board()
-        board.set_piece_at(white_king_square, chess.Piece(chess.KING, chess.WHITE))
-        board.set_piece_at(black_king_square, chess.Piece(chess.KING, chess.BLACK))
-        board.set_piece_at(white_bishop1_square, chess.Piece(chess.BISHOP, chess.WHITE))
-        board.set_piece_at(white_bishop2_square, chess.Piece(chess.BISHOP, chess.WHITE))
-
-        # Success: found a valid simple position
-        break
-
-    return board
-
-# Scenario 7: King, Knight and Bishop vs King
-def scenario_king_knight_bishop_vs_king():
-
-    board = chess.Board()
-    board.clear_board()
-
-    while True:
-        board.clear_board()
-        # Place White King
-        white_king_square = random.choice(list(chess.SQUARES))
-        # Place Black King (not same and not adjacent)
-        possible_black_squares = [
-            sq for sq in chess.SQUARES
-            if sq != white_king_square and chess.square_distance(sq, white_king_square) > 1
-        ]
-        black_king_square = random.choice(possible_black_squares)
-
-        # Place White Knight (not same as either king)
-        possible_knight_squares = [
-            sq for sq in chess.SQUARES
-            if sq not in [white_king_square, black_king_square]
-        ]
-        white_knight_square = random.choice(possible_knight_squares)
-        # Place White Bishop (not same as either king or knight)
-        possible_bishop_squares = [
-            sq for sq in chess.SQUARES
-            if sq not in [white_king_square, black_king_square, white_knight_square]
-        ]
-        white_bishop_square = random.choice(possible_bishop_squares)
-
-        # Check that knight and bishop aren’t attacking the black king (so not illegal “check”)
-        if (knight_attacks(white_knight_square, black_king_square) or
-            abs(chess.square_file(white_bishop_square) - chess.square_file(black_king_square)) ==
-            abs(chess.square_rank(white_bishop_square) - chess.square_rank(black_king_square))):
-            continue  # illegal — knight or bishop attacking king
-
-        # Construct board
-        board.clear_board()
-        board.set_piece_at(white_king_square, chess.Piece(chess.KING, chess.WHITE))
-        board.set_piece_at(black_king_square, chess.Piece(chess.KING, chess.BLACK))
-        board.set_piece_at(white_knight_square, chess.Piece(chess.KNIGHT, chess.WHITE))
-        board.set_piece_at(white_bishop_square, chess.Piece(chess.BISHOP, chess.WHITE))
-
-        # Success: found a valid simple position
-        break
-
-    return board
-
-# Scenario 8: King and Queen vs King and Bishop
-def scenario_king_queen_vs_king_bishop():
-    
-    board = chess.Board()
-    board.clear_board()
-
-    while True:
-        board.clear_board()
-        # Place White King
-        white_king_square = random.choice(list(chess.SQUARES))
-        # Place Black King (not same and not adjacent)
-        possible_black_squares = [
-            sq for sq in chess.SQUARES
-            if sq != white_king_square and chess.square_distance(sq, white_king_square) > 1
-        ]
-        black_king_square = random.choice(possible_black_squares)
-
-        # Place White Queen (not same as either king)
-        possible_queen_squares = [
-            sq for sq in chess.SQUARES
-            if sq not in [white_king_square, black_king_square]
-        ]
-        white_queen_square = random.choice(possible_queen_squares)
-        # Place Black Bishop (not same as either king or queen)
-        possible_bishop_squares = [
-            sq for sq in chess.SQUARES
-            if sq not in [white_king_square, black_king_square, white_queen_square]
-        ]
-        black_bishop_square = random.choice(possible_bishop_squares)
-
-        # Check that queen and bishop aren’t attacking the opposing kings (so not illegal “check”)
-        if (chess.square_file(white_queen_square) == chess.square_file(black_king_square) or
-            chess.square_rank(white_queen_square) == chess.square_rank(black_king_square) or
-            abs(chess.square_file(white_queen_square) - chess.square_file(black_king_square)) ==
-            abs(chess.square_rank(white_queen_square) - chess.square_rank(black_king_square)) or
-            abs(chess.square_file(black_bishop_square) - chess.square_file(white_king_square)) ==
-            abs(chess.square_rank(black_bishop_square) - chess.square_rank(white_king_square))):
-            continue  # illegal — queen or bishop attacking king
-
-        # check that the black bishop is not attacking the white king
-        if (abs(chess.square_file(black_bishop_square) - chess.square_file(white_king_square)) == 
-            abs(chess.square_rank(black_bishop_square) - chess.square_rank(white_king_square))):
-            continue  # illegal — bishop attacking king
-
-        # Construct board
-        board.clear_board()
-        board.set_piece_at(white_king_square, chess.Piece(chess.KING, chess.WHITE))
-        board.set_piece_at(black_king_square, chess.Piece(chess.KING, chess.BLACK))
-        board.set_piece_at(white_queen_square, chess.Piece(chess.QUEEN, chess.WHITE))
-        board.set_piece_at( black_bishop_square, chess.Piece(chess.BISHOP, chess.BLACK))
-
-        # Success: found a valid simple position
-        break
-
-    return board
-
-# Scenario 9: King and Queen Vs King and Knight
-def scenario_king_queen_vs_king_knight():
-    
-    board = chess.Board()
-    board.clear_board()
-
-    while True:
-        board.clear_board()
-        # Place White King
-        white_king_square = random.choice(list(chess.SQUARES))
-        # Place Black King (not same and not adjacent)
-        possible_black_squares = [
-            sq for sq in chess.SQUARES
-            if sq != white_king_square and chess.square_distance(sq, white_king_square) > 1
-        ]
-        black_king_square = random.choice(possible_black_squares)
-
-        # Place White Queen (not same as either king)
-        possible_queen_squares = [
-            sq for sq in chess.SQUARES
-            if sq not in [white_king_square, black_king_square]
-        ]
-        white_queen_square = random.choice(possible_queen_squares)
-        # Place Black Knight (not same as either king or queen)
-        possible_knight_squares = [
-            sq for sq in chess.SQUARES
-            if sq not in [white_king_square, black_king_square, white_queen_square]
-        ]
-        black_knight_square = random.choice(possible_knight_squares)
-
-        # Check that queen and knight aren’t attacking the opposing kings (so not illegal “check”)
-        if (chess.square_file(white_queen_square) == chess.square_file(black_king_square) or
-            chess.square_rank(white_queen_square) == chess.square_rank(black_king_square) or
-            abs(chess.square_file(white_queen_square) - chess.square_file(black_king_square)) ==
-            abs(chess.square_rank(white_queen_square) - chess.square_rank(black_king_square)) or
-            knight_attacks(black_knight_square, white_king_square)):
-            continue  # illegal — queen or knight attacking king
-
-        # Check that the black knight is not attacking the white king
-        if knight_attacks(black_knight_square, white_king_square):
-            continue  # illegal — knight attacking king
-
-        # Construct board
-        board.clear_board()
-        board.set_piece_at(white_king_square, chess.Piece(chess.KING, chess.WHITE))
-        board.set_piece_at(black_king_square, chess.Piece(chess.KING, chess.BLACK))
-        board.set_piece_at(white_queen_square, chess.Piece(chess.QUEEN, chess.WHITE))
-        board.set_piece_at( black_knight_square, chess.Piece(chess.KNIGHT, chess.BLACK))
-
-        # Success: found a valid simple position
-        break
-
-    return board
-
-# Scenario 10: King and Queen vs King and Rook
-def scenario_king_queen_vs_king_rook():
-    
-    board = chess.Board()
-    board.clear_board()
-
-    while True:
-        board.clear_board()
-        # Place White King
-        white_king_square = random.choice(list(chess.SQUARES))
-        # Place Black King (not same and not adjacent)
-        possible_black_squares = [
-            sq for sq in chess.SQUARES
-            if sq != white_king_square and chess.square_distance(sq, white_king_square) > 1
-        ]
-        black_king_square = random.choice(possible_black_squares)
-
-        # Place White Queen (not same as either king)
-        possible_queen_squares = [
-            sq for sq in chess.SQUARES
-            if sq not in [white_king_square, black_king_square]
-        ]
-        white_queen_square = random.choice(possible_queen_squares)
-        # Place Black Rook (not same as either king or queen)
-        possible_rook_squares = [
-            sq for sq in chess.SQUARES
-            if sq not in [white_king_square, black_king_square, white_queen_square]
-        ]
-        black_rook_square = random.choice(possible_rook_squares)
-
-        # Check that queen and rook aren’t attacking the opposing kings (so not illegal “check”)
-        if (chess.square_file(white_queen_square) == chess.square_file(black_king_square) or
-            chess.square_rank(white_queen_square) == chess.square_rank(black_king_square) or
-            abs(chess.square_file(white_queen_square) - chess.square_file(black_king_square)) ==
-            abs(chess.square_rank(white_queen_square) - chess.square_rank(black_king_square)) or
-            chess.square_file(black_rook_square) == chess.square_file(white_king_square) or
-            chess.square_rank(black_rook_square) == chess.square_rank(white_king_square)):
-            continue  # illegal — queen or rook attacking king
-
-        # Check that the black rook is not attacking the white king
-        if (chess.square_file(black_rook_square) == chess.square_file(white_king_square) or
-            chess.square_rank(black_rook_square) == chess.square_rank(white_king_square)):
-            continue  # illegal — rook attacking king
-
-        # Construct board
-        board.clear_board()
-        board.set_piece_at(white_king_square, chess.Piece(chess.KING, chess.WHITE))
-        board.set_piece_at(black_king_square, chess.Piece(chess.KING, chess.BLACK))
-        board.set_piece_at(white_queen_square, chess.Piece(chess.QUEEN, chess.WHITE))
-        board.set_piece_at( black_rook_square, chess.Piece(chess.ROOK, chess.BLACK))
-
-        # Success: found a valid simple position
-        break
-
-    return board
-
-# Scenario 11: King and Queen vs King, Knight and Bishop
-def scenario_king_queen_vs_king_knight_bishop():
-    
-    board = chess.Board()
-    board.clear_board()
-
-    while True:
-        board.clear_board()
-        # Place White King
-        white_king_square = random.choice(list(chess.SQUARES))
-        # Place Black King (not same and not adjacent)
-        possible_black_squares = [
-            sq for sq in chess.SQUARES
-            if sq != white_king_square and chess.square_distance(sq, white_king_square) > 1
-        ]
-        black_king_square = random.choice(possible_black_squares)
-
-        # Place White Queen (not same as either king)
-        possible_queen_squares = [
-            sq for sq in chess.SQUARES
-            if sq not in [white_king_square, black_king_square]
-        ]
-        white_queen_square = random.choice(possible_queen_squares)
-        # Place Black Knight (not same as either king or queen)
-        possible_knight_squares = [
-            sq for sq in chess.SQUARES
-            if sq not in [white_king_square, black_king_square, white_queen_square]
-        ]
-        black_knight_square = random.choice(possible_knight_squares)
-        # Place Black Bishop (not same as either king, queen or knight)
-        possible_bishop_squares = [
-            sq for sq in chess.SQUARES
-            if sq not in [white_king_square, black_king_square, white_queen_square, black_knight_square]
-        ]
-        black_bishop_square = random.choice(possible_bishop_squares)
-
-        # Check that queen, knight and bishop aren’t attacking the opposing kings (so not illegal “check”)
-        if (chess.square_file(white_queen_square) == chess.square_file(black_king_square) or
-            chess.square_rank(white_queen_square) == chess.square_rank(black_king_square) or
-            abs(chess.square_file(white_queen_square) - chess.square_file(black_king_square)) ==
-            abs(chess.square_rank(white_queen_square) - chess.square_rank(black_king_square)) or
-            knight_attacks(black_knight_square, white_king_square) or
-            abs(chess.square_file(black_bishop_square) - chess.square_file(white_king_square)) ==
-            abs(chess.square_rank(black_bishop_square) - chess.square_rank(white_king_square))):
-            continue  # illegal — queen, knight or bishop attacking king
-        
-        # Check that the black knight and bishop are not attacking the white king
-        if (knight_attacks(black_knight_square, white_king_square) or
-            abs(chess.square_file(black_bishop_square) - chess.square_file(white_king_square)) ==
-            abs(chess.square_rank(black_bishop_square) - chess.square_rank(white_king_square))):
-            continue  # illegal — knight or bishop attacking king   
-
-        # Construct board
-        board.clear_board()
-        board.set_piece_at(white_king_square, chess.Piece(chess.KING, chess.WHITE))
-        board.set_piece_at(black_king_square, chess.Piece(chess.KING, chess.BLACK))
-        board.set_piece_at(white_queen_square, chess.Piece(chess.QUEEN, chess.WHITE))
-        board.set_piece_at( black_knight_square, chess.Piece(chess.KNIGHT, chess.BLACK))
-        board.set_piece_at( black_bishop_square, chess.Piece(chess.BISHOP, chess.BLACK))
-
-        # Success: found a valid simple position
-        break   
-
-    return board
-
-#Scenario 12: King and Queen vs King and two knights
-def scenario_king_queen_vs_king_two_knights(): 
-
-    board = chess.Board()
-    board.clear_board()
-
-    while True:
-        board.clear_board()
-        # Place White King
-        white_king_square = random.choice(list(chess.SQUARES))
-        # Place Black King (not same and not adjacent)
-        possible_black_squares = [
-            sq for sq in chess.SQUARES
-            if sq != white_king_square and chess.square_distance(sq, white_king_square) > 1
-        ]
-        black_king_square = random.choice(possible_black_squares)
-
-        # Place White Queen (not same as either king)
-        possible_queen_squares = [
-            sq for sq in chess.SQUARES
-            if sq not in [white_king_square, black_king_square]
-        ]
-        white_queen_square = random.choice(possible_queen_squares)
-        # Place Black Knight 1 (not same as either king or queen)
-        possible_knight1_squares = [
-            sq for sq in chess.SQUARES
-            if sq not in [white_king_square, black_king_square, white_queen_square]
-        ]
-        black_knight1_square = random.choice(possible_knight1_squares)
-        # Place Black Knight 2 (not same as either king, queen or knight 1)
-        possible_knight2_squares = [
-            sq for sq in chess.SQUARES
-            if sq not in [white_king_square, black_king_square, white_queen_square, black_knight1_square]
-        ]
-        black_knight2_square = random.choice(possible_knight2_squares)
-
-        # Check that queen and knights aren’t attacking the opposing kings (so not illegal “check”)
-        if (chess.square_file(white_queen_square) == chess.square_file(black_king_square) or
-            chess.square_rank(white_queen_square) == chess.square_rank(black_king_square) or
-            abs(chess.square_file(white_queen_square) - chess.square_file(black_king_square)) ==
-            abs(chess.square_rank(white_queen_square) - chess.square_rank(black_king_square)) or
-            knight_attacks(black_knight1_square, white_king_square) or
-            knight_attacks(black_knight2_square, white_king_square)):
-            continue  # illegal — queen or knight attacking king
-
-        # Check that the black knights are not attacking the white king
-        if (knight_attacks(black_knight1_square, white_king_square) or
-            knight_attacks(black_knight2_square, white_king_square)):
-            continue  # illegal — knight attacking king
-
-        # Construct board
-        board.clear_board()
-        board.set_piece_at(white_king_square, chess.Piece(chess.KING, chess.WHITE))
-        board.set_piece_at(black_king_square, chess.Piece(chess.KING, chess.BLACK))
-        board.set_piece_at(white_queen_square, chess.Piece(chess.QUEEN, chess.WHITE))
-        board.set_piece_at(black_knight1_square, chess.Piece(chess.KNIGHT, chess.BLACK))
-        board.set_piece_at(black_knight2_square, chess.Piece(chess.KNIGHT, chess.BLACK))
-
-        # Success: found a valid simple position
-        break
-
-    return board
-
-# Scenario 13: King and Queen vs King and two bishops
-def scenario_king_queen_vs_king_two_bishops():
-
-    board = chess.Board()
-    board.clear_board()
-
-    while True:
-        board.clear_board()
-        # Place White King
-        white_king_square = random.choice(list(chess.SQUARES))
-        # Place Black King (not same and not adjacent)
-        possible_black_squares = [
-            sq for sq in chess.SQUARES
-            if sq != white_king_square and chess.square_distance(sq, white_king_square) > 1
-        ]
-        black_king_square = random.choice(possible_black_squares)
-
-        # Place White Queen (not same as either king)
-        possible_queen_squares = [
-            sq for sq in chess.SQUARES
-            if sq not in [white_king_square, black_king_square]
-        ]
-        white_queen_square = random.choice(possible_queen_squares)
-        # Place Black Bishop 1 (not same as either king or queen)
-        possible_bishop1_squares = [
-            sq for sq in chess.SQUARES
-            if sq not in [white_king_square, black_king_square, white_queen_square]
-        ]
-        black_bishop1_square = random.choice(possible_bishop1_squares)
-        # Place Black Bishop 2 (not same as either king, queen or bishop 1)
-        possible_bishop2_squares = [
-            sq for sq in chess.SQUARES
-            if sq not in [white_king_square, black_king_square, white_queen_square, black_bishop1_square]
-        ]
-        black_bishop2_square = random.choice(possible_bishop2_squares)
-
-        # Check that queen and bishops aren’t attacking the opposing kings (so not illegal “check”)
-        if (chess.square_file(white_queen_square) == chess.square_file(black_king_square) or
-            chess.square_rank(white_queen_square) == chess.square_rank(black_king_square) or
-            abs(chess.square_file(white_queen_square) - chess.square_file(black_king_square)) ==
-            abs(chess.square_rank(white_queen_square) - chess.square_rank(black_king_square)) or
-            abs(chess.square_file(black_bishop1_square) - chess.square_file(white_king_square)) ==
-            abs(chess.square_rank(black_bishop1_square) - chess.square_rank(white_king_square)) or
-            abs(chess.square_file(black_bishop2_square) - chess.square_file(white_king_square)) == 
-            abs(chess.square_rank(black_bishop2_square) - chess.square_rank(white_king_square))):
-            continue  # illegal — queen or bishop attacking king
-
-        # Check that the black bishops are not attacking the white king
-        if (abs(chess.square_file(black_bishop1_square) - chess.square_file(white_king_square)) ==
-            abs(chess.square_rank(black_bishop1_square) - chess.square_rank(white_king_square)) or
-            abs(chess.square_file(black_bishop2_square) - chess.square_file(white_king_square)) ==
-            abs(chess.square_rank(black_bishop2_square) - chess.square_rank(white_king_square))):
-            continue  # illegal — bishop attacking king
-
-        # Construct board
-        board.clear_board()
-        board.set_piece_at(white_king_square, chess.Piece(chess.KING, chess.WHITE))
-        board.set_piece_at(black_king_square, chess.Piece(chess.KING, chess.BLACK))
-        board.set_piece_at(white_queen_square, chess.Piece(chess.QUEEN, chess.WHITE))
-        board.set_piece_at(black_bishop1_square, chess.Piece(chess.BISHOP, chess.BLACK))
-        board.set_piece_at(black_bishop2_square, chess.Piece(chess.BISHOP, chess.BLACK))    
-
-        # Success: found a valid simple position
-        break   
-
-    return board
-
-# Scenario 14: King and two pawns vs King
-def scenario_king_and_two_pawns_vs_king():
-
-    board = chess.Board()
-    board.clear_board()
-
-    while True:
-        board.clear_board()
-        # Place White King
-        white_king_square = random.choice(list(chess.SQUARES))
-        # Place Black King (not same and not adjacent)
-        possible_black_squares = [
-            sq for sq in chess.SQUARES
-            if sq != white_king_square and chess.square_distance(sq, white_king_square) > 1
-        ]
-        black_king_square = random.choice(possible_black_squares)
-
-        # Place White Pawn 1 (not on 1st or 8th rank, not same as either king)
-        possible_pawn1_squares = [
-            sq for sq in chess.SQUARES
-            if sq not in [white_king_square, black_king_square]
-            and 0 < chess.square_rank(sq) < 7
-        ]
-        white_pawn1_square = random.choice(possible_pawn1_squares)
-        # Place White Pawn 2 (not on 1st or 8th rank, not same as either king or pawn 1)
-        possible_pawn2_squares = [
-            sq for sq in chess.SQUARES
-            if sq not in [white_king_square, black_king_square, white_pawn1_square]
-            and 0 < chess.square_rank(sq) < 7
-        ]
-        white_pawn2_square = random.choice(possible_pawn2_squares)
-
-        # Check that pawns aren’t attacking the black king (so not illegal “check”)
-        pawn1_attack_squares = list(chess.SquareSet(chess.BB_EMPTY))
-        pawn2_attack_squares = list(chess.SquareSet(chess.BB_EMPTY))
-        # A white pawn attacks diagonally forward
-        for pawn_square, attack_squares in [(white_pawn1_square, pawn1_attack_squares), (white_pawn2_square, pawn2_attack_squares)]:
-            if chess.square_rank(pawn_square) < 7:
-                file = chess.square_file(pawn_square)
-                rank = chess.square_rank(pawn_square)
-                if file > 0:
-                    attack_squares.append(chess.square(file - 1, rank + 1))
-                if file < 7:
-                    attack_squares.append(chess.square(file + 1, rank + 1))
-
-        if black_king_square in pawn1_attack_squares or black_king_square in pawn2_attack_squares:
-            continue  # illegal — pawn attacking king
-
-        # Construct board
-        board.clear_board()
-        board.set_piece_at(white_king_square, chess.Piece(chess.KING, chess.WHITE))
-        board.set_piece_at(black_king_square, chess.Piece(chess.KING, chess.BLACK))
-        board.set_piece_at(white_pawn1_square, chess.Piece(chess.PAWN, chess.WHITE))
-        board.set_piece_at(white_pawn2_square, chess.Piece(chess.PAWN, chess.WHITE))    
-
-        # Success: found a valid simple position
-        break   
-
-    return board
-
-#Scenario 15: King and Bishop vs King and Pawn
-def scenario_king_bishop_vs_king_pawn():
-
-    board = chess.Board()
-    board.clear_board()
-
-    while True:
-        board.clear_board()
-        # Place White King
-        white_king_square = random.choice(list(chess.SQUARES))
-        # Place Black King (not same and not adjacent)
-        possible_black_squares = [
-            sq for sq in chess.SQUARES
-            if sq != white_king_square and chess.square_distance(sq, white_king_square) > 1
-        ]
-        black_king_square = random.choice(possible_black_squares)
-
-        # Place White Bishop (not same as either king)
-        possible_bishop_squares = [
-            sq for sq in chess.SQUARES
-            if sq not in [white_king_square, black_king_square]
-        ]
-        white_bishop_square = random.choice(possible_bishop_squares)
-        # Place Black Pawn (not on 1st or 8th rank, not same as either king or bishop)
-        possible_pawn_squares = [
-            sq for sq in chess.SQUARES
-            if sq not in [white_king_square, black_king_square, white_bishop_square]
-            and 0 < chess.square_rank(sq) < 7
-        ]
-        black_pawn_square = random.choice(possible_pawn_squares)
-
-        # Check that bishop and pawn aren’t attacking the opposing kings (so not illegal “check”)
-        if (abs(chess.square_file(white_bishop_square) - chess.square_file(black_king_square)) ==
-            abs(chess.square_rank(white_bishop_square) - chess.square_rank(black_king_square))):
-            continue  # illegal — bishop attacking king
-
-        # A black pawn attacks diagonally forward
-        pawn_attack_squares = list(chess.SquareSet(chess.BB_EMPTY))
-        if chess.square_rank(black_pawn_square) > 0:
-            file = chess.square_file(black_pawn_square)
-            rank = chess.square_rank(black_pawn_square)
-            if file > 0:
-                pawn_attack_squares.append(chess.square(file - 1, rank - 1))
-            if file < 7:
-                pawn_attack_squares.append(chess.square(file + 1, rank - 1))
-
-        if white_king_square in pawn_attack_squares:
-            continue  # illegal — pawn attacking king
-
-        # Construct board
-        board.clear_board()
-        board.set_piece_at(white_king_square, chess.Piece(chess.KING, chess.WHITE))
-        board.set_piece_at(black_king_square, chess.Piece(chess.KING, chess.BLACK))
-        board.set_piece_at(white_bishop_square, chess.Piece(chess.BISHOP, chess.WHITE))
-        board.set_piece_at(black_pawn_square, chess.Piece(chess.PAWN, chess.BLACK)) 
-
-        # Success: found a valid simple position
-        break   
-
-    return board
-
-# Scenario 16: King and Knight vs King and Pawn
-def scenario_king_knight_vs_king_pawn():
-
-    board = chess.Board()
-    board.clear_board()
-
-    while True:
-        board.clear_board()
-        # Place White King
-        white_king_square = random.choice(list(chess.SQUARES))
-        # Place Black King (not same and not adjacent)
-        possible_black_squares = [
-            sq for sq in chess.SQUARES
-            if sq != white_king_square and chess.square_distance(sq, white_king_square) > 1
-        ]
-        black_king_square = random.choice(possible_black_squares)   
-        # Place White Knight (not same as either king)
-        possible_knight_squares = [
-            sq for sq in chess.SQUARES
-            if sq not in [white_king_square, black_king_square]
-        ]
-        white_knight_square = random.choice(possible_knight_squares)
-        # Place Black Pawn (not on 1st or 8th rank, not same as either king or knight)
-        possible_pawn_squares = [
-            sq for sq in chess.SQUARES
-            if sq not in [white_king_square, black_king_square, white_knight_square]
-            and 0 < chess.square_rank(sq) < 7
-        ]
-        black_pawn_square = random.choice(possible_pawn_squares)
-
-        # Check that knight and pawn aren’t attacking the opposing kings (so not illegal “check”)
-        if (knight_attacks(white_knight_square, black_king_square)):
-            continue  # illegal — knight attacking king
-
-        # A black pawn attacks diagonally forward
-        pawn_attack_squares = list(chess.SquareSet(chess.BB_EMPTY))
-        if chess.square_rank(black_pawn_square) > 0:    
-            file = chess.square_file(black_pawn_square)
-            rank = chess.square_rank(black_pawn_square)
-            if file > 0:
-                pawn_attack_squares.append(chess.square(file - 1, rank - 1))
-            if file < 7:
-                pawn_attack_squares.append(chess.square(file + 1, rank - 1))
-            
-        if white_king_square in pawn_attack_squares:
-            continue  # illegal — pawn attacking king
-
-        # Construct board
-        board.clear_board()
-        board.set_piece_at(white_king_square, chess.Piece(chess.KING, chess.WHITE))
-        board.set_piece_at(black_king_square, chess.Piece(chess.KING, chess.BLACK))
-        board.set_piece_at(white_knight_square, chess.Piece(chess.KNIGHT, chess.WHITE))
-        board.set_piece_at(black_pawn_square, chess.Piece(chess.PAWN, chess.BLACK))
-
-        # Success: found a valid simple position
-        break
-
-    return board
-
-#Scenario 17: King and Rook vs King and Pawn
-def scenario_king_rook_vs_king_pawn():
-
-    board = chess.Board()
-    board.clear_board()
-
-    while True:
-        board.clear_board()
-        # Place White King
-        white_king_square = random.choice(list(chess.SQUARES))
-        # Place Black King (not same and not adjacent)
-        possible_black_squares = [
-            sq for sq in chess.SQUARES
-            if sq != white_king_square and chess.square_distance(sq, white_king_square) > 1
-        ]
-        black_king_square = random.choice(possible_black_squares)
-        # Place White Rook (not same as either king)
-        possible_rook_squares = [
-            sq for sq in chess.SQUARES
-            if sq not in [white_king_square, black_king_square]
-        ]
-        white_rook_square = random.choice(possible_rook_squares)
-        # Place Black Pawn (not on 1st or 8th rank, not same as either king or rook)
-        possible_pawn_squares = [
-            sq for sq in chess.SQUARES
-            if sq not in [white_king_square, black_king_square, white_rook_square]
-            and 0 < chess.square_rank(sq) < 7
-        ]
-        black_pawn_square = random.choice(possible_pawn_squares)
-
-        # Check that rook and pawn aren’t attacking the opposing kings (so not illegal “check”)
-        if (chess.square_file(white_rook_square) == chess.square_file(black_king_square) or
-            chess.square_rank(white_rook_square) == chess.square_rank(black_king_square)):
-            continue  # illegal — rook attacking king
-
-        # A black pawn attacks diagonally forward
-        pawn_attack_squares = list(chess.SquareSet(chess.BB_EMPTY))
-        if chess.square_rank(black_pawn_square) > 0:    
-            file = chess.square_file(black_pawn_square)
-            rank = chess.square_rank(black_pawn_square)
-            if file > 0:
-                pawn_attack_squares.append(chess.square(file - 1, rank - 1))
-            if file < 7:
-                pawn_attack_squares.append(chess.square(file + 1, rank - 1))
-
-        if white_king_square in pawn_attack_squares:
-            continue  # illegal — pawn attacking king   
-
-        # Construct board
-        board.clear_board()
-        board.set_piece_at(white_king_square, chess.Piece(chess.KING, chess.WHITE))
-        board.set_piece_at(black_king_square, chess.Piece(chess.KING, chess.BLACK))
-        board.set_piece_at(white_rook_square, chess.Piece(chess.ROOK, chess.WHITE))
-        board.set_piece_at(black_pawn_square, chess.Piece(chess.PAWN, chess.BLACK))
-
-        # Success: found a valid simple position
-        break   
-
-    return board
-
-# Scenario 18: King and Queen Vs King and Pawn
-def scenario_king_queen_vs_king_pawn():
-
-    board = chess.Board()
-    board.clear_board()
-
-    while True:
-        board.clear_board()
-        # Place White King
-        white_king_square = random.choice(list(chess.SQUARES))
-        # Place Black King (not same and not adjacent)
-        possible_black_squares = [
-            sq for sq in chess.SQUARES
-            if sq != white_king_square and chess.square_distance(sq, white_king_square) > 1
-        ]
-        black_king_square = random.choice(possible_black_squares)
-        # Place White Queen (not same as either king)
-        possible_queen_squares = [
-            sq for sq in chess.SQUARES
-            if sq not in [white_king_square, black_king_square]
-        ]
-        white_queen_square = random.choice(possible_queen_squares)
-        # Place Black Pawn (not on 1st or 8th rank, not same as either king or queen)
-        possible_pawn_squares = [
-            sq for sq in chess.SQUARES
-            if sq not in [white_king_square, black_king_square, white_queen_square]
-            and 0 < chess.square_rank(sq) < 7
-        ]
-        black_pawn_square = random.choice(possible_pawn_squares)
-
-        # Check that queen and pawn aren’t attacking the opposing kings (so not illegal “check”)
-        if (chess.square_file(white_queen_square) == chess.square_file(black_king_square) or
-            chess.square_rank(white_queen_square) == chess.square_rank(black_king_square) or
-            abs(chess.square_file(white_queen_square) - chess.square_file(black_king_square)) ==
-            abs(chess.square_rank(white_queen_square) - chess.square_rank(black_king_square))):
-            continue  # illegal — queen attacking king
-
-        # A black pawn attacks diagonally forward
-        pawn_attack_squares = list(chess.SquareSet(chess.BB_EMPTY))
-        if chess.square_rank(black_pawn_square) > 0:    
-            file = chess.square_file(black_pawn_square)
-            rank = chess.square_rank(black_pawn_square)
-            if file > 0:
-                pawn_attack_squares.append(chess.square(file - 1, rank - 1))
-            if file < 7:
-                pawn_attack_squares.append(chess.square(file + 1, rank - 1))
-
-        if white_king_square in pawn_attack_squares:
-            continue  # illegal — pawn attacking king
-
-        # Construct board
-        board.clear_board()
-        board.set_piece_at(white_king_square, chess.Piece(chess.KING, chess.WHITE))
-        board.set_piece_at(black_king_square, chess.Piece(chess.KING, chess.BLACK))
-        board.set_piece_at(white_queen_square, chess.Piece(chess.QUEEN, chess.WHITE))
-        board.set_piece_at(black_pawn_square, chess.Piece(chess.PAWN, chess.BLACK))
-
-        # Success: found a valid simple position
-        break
-
-    return board
-
-# Scenario 19: King, Queen and Pawn vs King and Queen
-def scenario_king_queen_pawn_vs_king_queen():
-    
-    board = chess.Board()
-    board.clear_board()
-
-    while True:
-        board.clear_board()
-        # Place White King
-        white_king_square = random.choice(list(chess.SQUARES))
-        # Place Black King (not same and not adjacent)
-        possible_black_squares = [
-            sq for sq in chess.SQUARES
-            if sq != white_king_square and chess.square_distance(sq, white_king_square) > 1
-        ]
-        black_king_square = random.choice(possible_black_squares)
-        # Place White Queen (not same as either king)
-        possible_white_queen_squares = [
-            sq for sq in chess.SQUARES
-            if sq not in [white_king_square, black_king_square]
-        ]
-        white_queen_square = random.choice(possible_white_queen_squares)
-        # Place Black Queen (not same as either king or white queen)
-        possible_black_queen_squares = [
-            sq for sq in chess.SQUARES
-            if sq not in [white_king_square, black_king_square, white_queen_square]
-        ]
-        black_queen_square = random.choice(possible_black_queen_squares)
-        # Place White Pawn (not on 1st or 8th rank, not same as either king or either queen)
-        possible_pawn_squares = [
-            sq for sq in chess.SQUARES
-            if sq not in [white_king_square, black_king_square, white_queen_square, black_queen_square]
-            and 0 < chess.square_rank(sq) < 7
-        ]
-        white_pawn_square = random.choice(possible_pawn_squares)
-
-        # Check that queens and pawn aren’t attacking the opposing kings (so not illegal “check”)
-        if (chess.square_file(white_queen_square) == chess.square_file(black_king_square) or
-            chess.square_rank(white_queen_square) == chess.square_rank(black_king_square) or
-            abs(chess.square_file(white_queen_square) - chess.square_file(black_king_square)) ==
-            abs(chess.square_rank(white_queen_square) - chess.square_rank(black_king_square)) or
-            chess.square_file(black_queen_square) == chess.square_file(white_king_square) or
-            chess.square_rank(black_queen_square) == chess.square_rank(white_king_square) or
-            abs(chess.square_file(black_queen_square) - chess.square_file(white_king_square)) ==
-            abs(chess.square_rank(black_queen_square) - chess.square_rank(white_king_square))):
-            continue  # illegal — queen attacking king
-
-        # A white pawn attacks diagonally forward
-        pawn_attack_squares = list(chess.SquareSet(chess.BB_EMPTY))
-        if chess.square_rank(white_pawn_square) < 7:    
-            file = chess.square_file(white_pawn_square)
-            rank = chess.square_rank(white_pawn_square)
-            if file > 0:
-                pawn_attack_squares.append(chess.square(file - 1, rank + 1))
-            if file < 7:
-                pawn_attack_squares.append(chess.square(file + 1, rank + 1))
-
-        if black_king_square in pawn_attack_squares:
-            continue  # illegal — pawn attacking king
-
-        # Construct board
-        board.clear_board()
-        board.set_piece_at(white_king_square, chess.Piece(chess.KING, chess.WHITE))
-        board.set_piece_at(black_king_square, chess.Piece(chess.KING, chess.BLACK))
-        board.set_piece_at(white_queen_square, chess.Piece(chess.QUEEN, chess.WHITE))
-        board.set_piece_at(black_queen_square, chess.Piece(chess.QUEEN, chess.BLACK))
-        board.set_piece_at(white_pawn_square, chess.Piece(chess.PAWN, chess.WHITE))
-
-        # Success: found a valid simple position
-        break
+ALL_SQUARES = np.arange(64)
+
+# Squares the black king may take for each white king square (padded rows)
+BLACK_KING_SQUARES = np.zeros((64, 64), dtype=np.int64)
+BLACK_KING_COUNTS = np.zeros(64, dtype=np.int64)
+for _sq in chess.SQUARES:
+    _allowed = [sq for sq in chess.SQUARES if chess.square_distance(sq, _sq) > 1]
+    BLACK_KING_SQUARES[_sq, :len(_allowed)] = _allowed
+    BLACK_KING_COUNTS[_sq] = len(_allowed)
+BLACK_KING_LISTS = [BLACK_KING_SQUARES[sq, :BLACK_KING_COUNTS[sq]].tolist() for sq in chess.SQUARES]
+
+KINGS = [(chess.KING, chess.WHITE), (chess.KING, chess.BLACK)]
+
+
+# Scenario specifications
+
+class ScenarioSpec:
+    """A scenario as data, compiled into its position generators.
+
+    pieces lists the non-king pieces in placement order as FEN symbols
+    ("Qr": a white queen, then a black rook). Kings are always placed first,
+    the black king away from the white one; every piece then goes on a
+    uniformly chosen free square, pawns only on ranks pawn_ranks (inclusive,
+    0-based). A placement is rejected when a piece attacks the opposing king
+    on an empty board, or when one of constraints returns False for it.
+
+    A constraint takes an int array of placements, one row per placement and
+    one column per slot (white king, black king, then pieces), and returns a
+    bool array of the rows to keep.
+
+    Calling the spec returns one random board, like the hand-written
+    generators it replaces; sample() and enumerate() are the batch versions.
+    """
+
+    def __init__(self, name, pieces="", turn=chess.WHITE, pawn_ranks=(1, 6), constraints=()):
+        self.__name__ = name
+        self.symbols = pieces
+        self.pieces = [(chess.Piece.from_symbol(symbol).piece_type, symbol.isupper()) for symbol in pieces]
+        self.slots = KINGS + self.pieces
+        self.turn = turn
+        self.pawn_ranks = pawn_ranks
+        self.constraints = list(constraints)
+
+        low, high = pawn_ranks
+        pawn_squares = np.array([sq for sq in chess.SQUARES if low <= chess.square_rank(sq) <= high])
+        pawn_index = np.full(64, 64)
+        pawn_index[pawn_squares] = np.arange(pawn_squares.size)
+        # Squares each piece may take, and the index of every square among them (64 if not)
+        self.zones = [(pawn_squares, pawn_index) if piece_type == chess.PAWN else (ALL_SQUARES, ALL_SQUARES)
+                      for piece_type, _ in self.pieces]
+        self._zone_lists = [zone.tolist() for zone, _ in self.zones]
+        self._attacks = [ATTACK_MASKS[piece].tolist() for piece in self.pieces]
+        # Column of the king each piece must not attack
+        self._targets = [1 if color == chess.WHITE else 0 for _, color in self.pieces]
+
+    def __repr__(self):
+        return f"ScenarioSpec({self.__name__!r}, {self.symbols!r})"
+
+    def __call__(self):
+        """One random legal board"""
+        while True:
+            white_king = random.randrange(64)
+            squares = [white_king, random.choice(BLACK_KING_LISTS[white_king])]
+            for zone in self._zone_lists:
+                # Redrawing on a collision is uniform over the free squares
+                square = random.choice(zone)
+                while square in squares:
+                    square = random.choice(zone)
+                squares.append(square)
+
+            if any(attacks[square] >> squares[target] & 1
+                   for attacks, square, target in zip(self._attacks, squares[2:], self._targets)):
+                continue
+            if self.constraints and not self._keep(np.array([squares]))[0]:
+                continue
+
+            masks = [0] * 8
+            for square, (piece_type, color) in zip(squares, self.slots):
+                masks[piece_type - 1] |= 1 << square
+                masks[6 if color == chess.WHITE else 7] |= 1 << square
+            return self.board(masks)
+
+    def _keep(self, squares):
+        keep = np.ones(len(squares), dtype=bool)
+        for constraint in self.constraints:
+            keep &= constraint(squares)
+        return keep
+
+    def board(self, bitboards):
+        board = board_from_bitboards(bitboards)
+        board.turn = self.turn
+        return board
+
+    def sample(self, count, rng):
+        """Draw count placements and keep the legal ones.
+
+        Returns an int array with one row per legal placement (one column per
+        slot), drawn with the same distribution as calling the spec.
+        """
+        squares = np.empty((count, len(self.slots)), dtype=np.int64)
+        white_king = (rng.random(count) * 64).astype(np.int64)
+        squares[:, 0] = white_king
+        squares[:, 1] = BLACK_KING_SQUARES[white_king, (rng.random(count) * BLACK_KING_COUNTS[white_king]).astype(np.int64)]
+
+        # Each piece takes the k-th free square of its zone, k uniform: one draw per
+        # piece instead of redrawing collisions
+        for column, (zone, index_of) in enumerate(self.zones, start=2):
+            taken = np.sort(index_of[squares[:, :column]], axis=1)
+            free = zone.size - (taken < 64).sum(axis=1)
+            index = (rng.random(count) * free).astype(np.int64)
+            for j in range(column):
+                index += index >= taken[:, j]
+            squares[:, column] = zone[index]
+
+        legal = np.ones(count, dtype=bool)
+        for column, (piece, target) in enumerate(zip(self.pieces, self._targets), start=2):
+            king = squares[:, target].astype(np.uint64)
+            legal &= (ATTACK_MASKS[piece][squares[:, column]] >> king) & np.uint64(1) == 0
+        squares = squares[legal]
+        if self.constraints:
+            squares = squares[self._keep(squares)]
+        return squares
+
+    def enumeration_bound(self):
+        """Upper bound on the placements: king pairs times the squares of each piece"""
+        bound = int(BLACK_KING_COUNTS.sum())
+        for zone, _ in self.zones:
+            bound *= zone.size
+        return bound
+
+    def enumerate(self):
+        """Every legal placement, one per position, packed 6 bits per square.
+
+        Slots are packed in order, the white king in the low bits. Identical
+        pieces are kept in ascending square order, so every position appears
+        once.
+        """
+        bound = self.enumeration_bound()
+        if bound > MAX_ENUMERATION:
+            raise ValueError(f"{bound} placements to enumerate, more than MAX_ENUMERATION ({MAX_ENUMERATION})")
+
+        chunks = []
+        for white_king in chess.SQUARES:
+            black_kings = BLACK_KING_SQUARES[white_king, :BLACK_KING_COUNTS[white_king]]
+            rows = np.stack([np.full(black_kings.size, white_king), black_kings], axis=1)
+            for column, (piece, target, (zone, _)) in enumerate(zip(self.pieces, self._targets, self.zones), start=2):
+                squares = np.tile(zone, len(rows))
+                rows = np.concatenate([np.repeat(rows, zone.size, axis=0), squares[:, None]], axis=1)
+
+                keep = (rows[:, :column] != squares[:, None]).all(axis=1)
+                keep &= (ATTACK_MASKS[piece][squares] >> rows[:, target].astype(np.uint64)) & np.uint64(1) == 0
+                same = [c for c, other in enumerate(self.pieces[:column - 2], start=2) if other == piece]
+                if same:
+                    keep &= squares > rows[:, same[-1]]
+                rows = rows[keep]
+            if self.constraints:
+                rows = rows[self._keep(rows)]
+            chunks.append(pack_placements(rows))
+        return np.concatenate(chunks)
+
+
+# Scenario number -> spec (specs are called like the old per-scenario generator functions)
+SCENARIO_MAP = {
+    1: ScenarioSpec("scenario_king_vs_king_and_pawn", "P"),
+    2: ScenarioSpec("scenario_king_and_rook_vs_king", "R"),
+    3: ScenarioSpec("scenario_king_and_queen_vs_king", "Q"),
+    4: ScenarioSpec("scenario_king_queen_rook_vs_king", "QR"),
+    5: ScenarioSpec("scenario_king_and_two_rooks_vs_king", "RR"),
+    6: ScenarioSpec("scenario_king_and_two_bishops_vs_king", "BB"),
+    7: ScenarioSpec("scenario_king_knight_bishop_vs_king", "NB"),
+    8: ScenarioSpec("scenario_king_queen_vs_king_bishop", "Qb"),
+    9: ScenarioSpec("scenario_king_queen_vs_king_knight", "Qn"),
+    10: ScenarioSpec("scenario_king_queen_vs_king_rook", "Qr"),
+    11: ScenarioSpec("scenario_king_queen_vs_king_knight_bishop", "Qnb"),
+    12: ScenarioSpec("scenario_king_queen_vs_king_two_knights", "Qnn"),
+    13: ScenarioSpec("scenario_king_queen_vs_king_two_bishops", "Qbb"),
+    14: ScenarioSpec("scenario_king_and_two_pawns_vs_king", "PP"),
+    15: ScenarioSpec("scenario_king_bishop_vs_king_pawn", "Bp"),
+    16: ScenarioSpec("scenario_king_knight_vs_king_pawn", "Np"),
+    17: ScenarioSpec("scenario_king_rook_vs_king_pawn", "Rp"),
+    18: ScenarioSpec("scenario_king_queen_vs_king_pawn", "Qp"),
+    19: ScenarioSpec("scenario_king_queen_pawn_vs_king_queen", "QqP"),
+    20: ScenarioSpec("scenario_king_two_pawns_vs_king_pawn", "PPp"),
+    21: ScenarioSpec("scenario_king_pawn_rook_vs_king_rook", "RrP"),
+    22: ScenarioSpec("scenario_king_two_pawns_rook_vs_king_rook", "RrPP"),
+    23: ScenarioSpec("scenario_king_rook_vs_king_bishop", "Rb"),
+    24: ScenarioSpec("scenario_king_rook_vs_king_knight", "Rn"),
+    25: ScenarioSpec("scenario_king_rook_vs_king_two_pawns", "Rpp"),
+}
 
-    return board
+# Non-king pieces of each scenario, in placement order
+SCENARIO_PIECES = {number: spec.pieces for number, spec in SCENARIO_MAP.items()}
 
-# Scenario 20: King and two pawns vs King and pawn
-def scenario_king_two_pawns_vs_king_pawn():
-
-    board = chess.Board()
-    board.clear_board()
-
-    while True:
-        board.clear_board()
-        # Place White King
-        white_king_square = random.choice(list(chess.SQUARES))
-        # Place Black King (not same and not adjacent)
-        possible_black_squares = [
-            sq for sq in chess.SQUARES
-            if sq != white_king_square and chess.square_distance(sq, white_king_square) > 1
-        ]
-        black_king_square = random.choice(possible_black_squares)
-        # Place White Pawn 1 (not on 1st or 8th rank, not same as either king)
-        possible_white_pawn1_squares = [
-            sq for sq in chess.SQUARES
-            if sq not in [white_king_square, black_king_square]
-            and 0 < chess.square_rank(sq) < 7
-        ]
-        white_pawn1_square = random.choice(possible_white_pawn1_squares)
-        # Place White Pawn 2 (not on 1st or 8th rank, not same as either king or white pawn 1)
-        possible_white_pawn2_squares = [
-            sq for sq in chess.SQUARES
-            if sq not in [white_king_square, black_king_square, white_pawn1_square]
-            and 0 < chess.square_rank(sq) < 7
-        ]
-        white_pawn2_square = random.choice(possible_white_pawn2_squares)
-        # Place Black Pawn (not on 1st or 8th rank, not same as either king or either white pawn)
-        possible_black_pawn_squares = [
-            sq for sq in chess.SQUARES
-            if sq not in [white_king_square, black_king_square, white_pawn1_square, white_pawn2_square]
-            and 0 < chess.square_rank(sq) < 7
-        ]
-        black_pawn_square = random.choice(possible_black_pawn_squares)
-
-        # Check that pawns aren’t attacking the opposing kings (so not illegal “check”)
-        white_pawn1_attack_squares = list(chess.SquareSet(chess.BB_EMPTY))
-        white_pawn2_attack_squares = list(chess.SquareSet(chess.BB_EMPTY))
-        # A white pawn attacks diagonally forward
-        for pawn_square, attack_squares in [(white_pawn1_square, white_pawn1_attack_squares), (white_pawn2_square, white_pawn2_attack_squares)]:
-            if chess.square_rank(pawn_square) < 7:
-                file = chess.square_file(pawn_square)
-                rank = chess.square_rank(pawn_square)
-                if file > 0:
-                    attack_squares.append(chess.square(file - 1, rank + 1))
-                if file < 7:
-                    attack_squares.append(chess.square(file + 1, rank + 1))
-        if black_king_square in white_pawn1_attack_squares or black_king_square in white_pawn2_attack_squares:
-            continue  # illegal — white pawn attacking black king
-
-        # A black pawn attacks diagonally forward
-        black_pawn_attack_squares = list(chess.SquareSet(chess.BB_EMPTY))
-        if chess.square_rank(black_pawn_square) > 0:    
-            file = chess.square_file(black_pawn_square)
-            rank = chess.square_rank(black_pawn_square)
-            if file > 0:
-                black_pawn_attack_squares.append(chess.square(file - 1, rank - 1))
-            if file < 7:
-                black_pawn_attack_squares.append(chess.square(file + 1, rank - 1))
-        if white_king_square in black_pawn_attack_squares:
-            continue  # illegal — black pawn attacking white king
-
-        # Construct board
-        board.clear_board()
-        board.set_piece_at(white_king_square, chess.Piece(chess.KING, chess.WHITE))
-        board.set_piece_at(black_king_square, chess.Piece(chess.KING, chess.BLACK))
-        board.set_piece_at(white_pawn1_square, chess.Piece(chess.PAWN, chess.WHITE))
-        board.set_piece_at(white_pawn2_square, chess.Piece(chess.PAWN, chess.WHITE))
-        board.set_piece_at(black_pawn_square, chess.Piece(chess.PAWN, chess.BLACK)) 
-
-        # Success: found a valid simple position
-        break
 
-    return board
+# Batch generation
 
-# Scenario 21: King, Pawn and Rook vs King and Rook
-def scenario_king_pawn_rook_vs_king_rook():
-
-    board = chess.Board()
-    board.clear_board()
-
-    while True:
-        board.clear_board()
-        # Place White King
-        white_king_square = random.choice(list(chess.SQUARES))
-        # Place Black King (not same and not adjacent)
-        possible_black_squares = [
-            sq for sq in chess.SQUARES
-            if sq != white_king_square and chess.square_distance(sq, white_king_square) > 1
-        ]
-        black_king_square = random.choice(possible_black_squares)
-        # Place White Rook (not same as either king)
-        possible_white_rook_squares = [
-            sq for sq in chess.SQUARES
-            if sq not in [white_king_square, black_king_square]
-        ]
-        white_rook_square = random.choice(possible_white_rook_squares)
-        # Place Black Rook (not same as either king or white rook)
-        possible_black_rook_squares = [
-            sq for sq in chess.SQUARES
-            if sq not in [white_king_square, black_king_square, white_rook_square]
-        ]
-        black_rook_square = random.choice(possible_black_rook_squares)
-        # Place White Pawn (not on 1st or 8th rank, not same as either king or either rook)
-        possible_pawn_squares = [
-            sq for sq in chess.SQUARES
-            if sq not in [white_king_square, black_king_square, white_rook_square, black_rook_square]
-            and 0 < chess.square_rank(sq) < 7
-        ]
-        white_pawn_square = random.choice(possible_pawn_squares)
-
-        # Check that rooks and pawn aren’t attacking the opposing kings (so not illegal “check”)
-        if (chess.square_file(white_rook_square) == chess.square_file(black_king_square) or
-            chess.square_rank(white_rook_square) == chess.square_rank(black_king_square) or
-            chess.square_file(black_rook_square) == chess.square_file(white_king_square) or
-            chess.square_rank(black_rook_square) == chess.square_rank(white_king_square)):
-            continue  # illegal — rook attacking king
-
-        # A white pawn attacks diagonally forward
-        pawn_attack_squares = list(chess.SquareSet(chess.BB_EMPTY))
-        if chess.square_rank(white_pawn_square) < 7:    
-            file = chess.square_file(white_pawn_square)
-            rank = chess.square_rank(white_pawn_square)
-            if file > 0:
-                pawn_attack_squares.append(chess.square(file - 1, rank + 1))
-            if file < 7:
-                pawn_attack_squares.append(chess.square(file + 1, rank + 1))
-        if black_king_square in pawn_attack_squares:
-            continue  # illegal — pawn attacking king
-
-        # Check that black pawn is not attacking white king
-        if white_king_square in pawn_attack_squares:
-            continue  # illegal — pawn attacking king
-
-        # Construct board
-        board.clear_board()
-        board.set_piece_at(white_king_square, chess.Piece(chess.KING, chess.WHITE))
-        board.set_piece_at(black_king_square, chess.Piece(chess.KING, chess.BLACK))
-        board.set_piece_at(white_rook_square, chess.Piece(chess.ROOK, chess.WHITE))
-        board.set_piece_at(black_rook_square, chess.Piece(chess.ROOK, chess.BLACK))
-        board.set_piece_at(white_pawn_square, chess.Piece(chess.PAWN, chess.WHITE))
-
-        # Success: found a valid simple position
-        break
-
-    return board    
-
-# Scenario 22: King, Two Pawns and Rook vs King and Rook
-def scenario_king_two_pawns_rook_vs_king_rook():
-
-    board = chess.Board()
-    board.clear_board()
-
-    while True:
-        board.clear_board()
-        # Place White King
-        white_king_square = random.choice(list(chess.SQUARES))
-        # Place Black King (not same and not adjacent)
-        possible_black_squares = [
-            sq for sq in chess.SQUARES
-            if sq != white_king_square and chess.square_distance(sq, white_king_square) > 1
-        ]
-        black_king_square = random.choice(possible_black_squares)
-        # Place White Rook (not same as either king)
-        possible_white_rook_squares = [
-            sq for sq in chess.SQUARES
-            if sq not in [white_king_square, black_king_square]
-        ]
-        white_rook_square = random.choice(possible_white_rook_squares)
-        # Place Black Rook (not same as either king or white rook)
-        possible_black_rook_squares = [
-            sq for sq in chess.SQUARES
-            if sq not in [white_king_square, black_king_square, white_rook_square]
-        ]
-        black_rook_square = random.choice(possible_black_rook_squares)
-        # Place White Pawn 1 (not on 1st or 8th rank, not same as either king or either rook)
-        possible_white_pawn1_squares = [
-            sq for sq in chess.SQUARES
-            if sq not in [white_king_square, black_king_square, white_rook_square, black_rook_square]
-            and 0 < chess.square_rank(sq) < 7
-        ]
-        white_pawn1_square = random.choice(possible_white_pawn1_squares)
-        # Place White Pawn 2 (not on 1st or 8th rank, not same as either king, either rook or white pawn 1)
-        possible_white_pawn2_squares = [
-            sq for sq in chess.SQUARES
-            if sq not in [white_king_square, black_king_square, white_rook_square, black_rook_square, white_pawn1_square]
-            and 0 < chess.square_rank(sq) < 7
-        ]
-        white_pawn2_square = random.choice(possible_white_pawn2_squares)
-
-        # Check that rooks and pawns aren’t attacking the opposing kings (so not illegal “check”)
-        if (chess.square_file(white_rook_square) == chess.square_file(black_king_square) or
-            chess.square_rank(white_rook_square) == chess.square_rank(black_king_square) or
-            chess.square_file(black_rook_square) == chess.square_file(white_king_square) or
-            chess.square_rank(black_rook_square) == chess.square_rank(white_king_square)):
-            continue  # illegal — rook attacking king
-
-        white_pawn1_attack_squares = list(chess.SquareSet(chess.BB_EMPTY))
-        white_pawn2_attack_squares = list(chess.SquareSet(chess.BB_EMPTY))
-        # A white pawn attacks diagonally forward
-        for pawn_square, attack_squares in [(white_pawn1_square, white_pawn1_attack_squares), (white_pawn2_square, white_pawn2_attack_squares)]:
-            if chess.square_rank(pawn_square) < 7:
-                file = chess.square_file(pawn_square)
-                rank = chess.square_rank(pawn_square)
-                if file > 0:
-                    attack_squares.append(chess.square(file - 1, rank + 1))
-                if file < 7:
-                    attack_squares.append(chess.square(file + 1, rank + 1))
-        if black_king_square in white_pawn1_attack_squares or black_king_square in white_pawn2_attack_squares:
-            continue  # illegal — white pawn attacking black king
-
-        # Construct board
-        board.clear_board()
-        board.set_piece_at(white_king_square, chess.Piece(chess.KING, chess.WHITE))
-        board.set_piece_at(black_king_square, chess.Piece(chess.KING, chess.BLACK))
-        board.set_piece_at(white_rook_square, chess.Piece(chess.ROOK, chess.WHITE))
-        board.set_piece_at(black_rook_square, chess.Piece(chess.ROOK, chess.BLACK))
-        board.set_piece_at(white_pawn1_square, chess.Piece(chess.PAWN, chess.WHITE))
-        board.set_piece_at(white_pawn2_square, chess.Piece(chess.PAWN, chess.WHITE))
-
-        # Success: found a valid simple position
-        break
+def placement_bitboards(pieces, squares):
+    """(pawns, knights, bishops, rooks, queens, kings, white, black) bitboards per placement row.
 
-    return board
+    Placements that only swap identical pieces give the same tuple, so it
+    doubles as a key for unique positions.
+    """
+    bits = np.uint64(1) << squares.astype(np.uint64)
+    masks = np.zeros((8, len(squares)), dtype=np.uint64)
+    for column, (piece_type, color) in enumerate(KINGS + list(pieces)):
+        masks[piece_type - 1] |= bits[:, column]
+        masks[6 if color == chess.WHITE else 7] |= bits[:, column]
+    return list(zip(*masks.tolist()))
 
-#Scenario 23: King and Rook vs King and Bishop
-def scenario_king_rook_vs_king_bishop():
-
-    board = chess.Board()
-    board.clear_board()
-
-    while True:
-        board.clear_board()
-        # Place White King
-        white_king_square = random.choice(list(chess.SQUARES))
-        # Place Black King (not same and not adjacent)
-        possible_black_squares = [
-            sq for sq in chess.SQUARES
-            if sq != white_king_square and chess.square_distance(sq, white_king_square) > 1
-        ]
-        black_king_square = random.choice(possible_black_squares)
-        # Place White Rook (not same as either king)
-        possible_rook_squares = [
-            sq for sq in chess.SQUARES
-            if sq not in [white_king_square, black_king_square]
-        ]
-        white_rook_square = random.choice(possible_rook_squares)
-        # Place Black Bishop (not same as either king or rook)
-        possible_bishop_squares = [
-            sq for sq in chess.SQUARES
-            if sq not in [white_king_square, black_king_square, white_rook_square]
-        ]
-        black_bishop_square = random.choice(possible_bishop_squares)
-
-        # Check that rook and bishop aren’t attacking the opposing kings (so not illegal “check”)
-        if (chess.square_file(white_rook_square) == chess.square_file(black_king_square) or
-            chess.square_rank(white_rook_square) == chess.square_rank(black_king_square) or
-            abs(chess.square_file(black_bishop_square) - chess.square_file(white_king_square)) ==
-            abs(chess.square_rank(black_bishop_square) - chess.square_rank(white_king_square))):
-            continue  # illegal — rook or bishop attacking king
-
-        # Construct board
-        board.clear_board()
-        board.set_piece_at(white_king_square, chess.Piece(chess.KING, chess.WHITE))
-        board.set_piece_at(black_king_square, chess.Piece(chess.KING, chess.BLACK))
-        board.set_piece_at(white_rook_square, chess.Piece(chess.ROOK, chess.WHITE))
-        board.set_piece_at(black_bishop_square, chess.Piece(chess.BISHOP, chess.BLACK))
-
-        # Success: found a valid simple position
-        break
 
+def board_from_bitboards(bitboards):
+    """chess.Board with white to move and no castling rights from placement_bitboards output"""
+    board = chess.Board(None)
+    (board.pawns, board.knights, board.bishops, board.rooks,
+     board.queens, board.kings, white, black) = bitboards
+    board.occupied_co[chess.WHITE] = white
+    board.occupied_co[chess.BLACK] = black
+    board.occupied = white | black
     return board
 
-# Scenario 24: King and Rook Vs King and knight
-def scenario_king_rook_vs_king_knight():
-
-    board = chess.Board()
-    board.clear_board()
-
-    while True:
-        board.clear_board()
-        # Place White King
-        white_king_square = random.choice(list(chess.SQUARES))
-        # Place Black King (not same and not adjacent)
-        possible_black_squares = [
-            sq for sq in chess.SQUARES
-            if sq != white_king_square and chess.square_distance(sq, white_king_square) > 1
-        ]
-        black_king_square = random.choice(possible_black_squares)
-        # Place White Rook (not same as either king)
-        possible_rook_squares = [
-            sq for sq in chess.SQUARES
-            if sq not in [white_king_square, black_king_square]
-        ]
-        white_rook_square = random.choice(possible_rook_squares)
-        # Place Black Knight (not same as either king or rook)
-        possible_knight_squares = [
-            sq for sq in chess.SQUARES
-            if sq not in [white_king_square, black_king_square, white_rook_square]
-        ]
-        black_knight_square = random.choice(possible_knight_squares)
-
-        # Check that rook and knight aren’t attacking the opposing kings (so not illegal “check”)
-        if (chess.square_file(white_rook_square) == chess.square_file(black_king_square) or
-            chess.square_rank(white_rook_square) == chess.square_rank(black_king_square) or
-            knight_attacks(black_knight_square, white_king_square)):
-            continue  # illegal — rook or knight attacking king
-
-        # Construct board
-        board.clear_board()
-        board.set_piece_at(white_king_square, chess.Piece(chess.KING, chess.WHITE))
-        board.set_piece_at(black_king_square, chess.Piece(chess.KING, chess.BLACK))
-        board.set_piece_at(white_rook_square, chess.Piece(chess.ROOK, chess.WHITE))
-        board.set_piece_at(black_knight_square, chess.Piece(chess.KNIGHT, chess.BLACK))
-
-        # Success: found a valid simple position
-        break
 
-    return board
+def sample_scenario_bitboards(scenario_number, n, seed=None, max_attempts=None):
+    """Up to n unique legal placements of a scenario, sampled in batches with NumPy.
 
-#Scenario 25: King and Rook vs King and pawn
-def scenario_king_rook_vs_king_two_pawns():
-
-    board = chess.Board()
-    board.clear_board()
-
-    while True:
-        board.clear_board()
-        # Place White King
-        white_king_square = random.choice(list(chess.SQUARES))
-        # Place Black King (not same and not adjacent)
-        possible_black_squares = [
-            sq for sq in chess.SQUARES
-            if sq != white_king_square and chess.square_distance(sq, white_king_square) > 1
-        ]
-        black_king_square = random.choice(possible_black_squares)
-        # Place White Rook (not same as either king)
-        possible_rook_squares = [
-            sq for sq in chess.SQUARES
-            if sq not in [white_king_square, black_king_square]
-        ]
-        white_rook_square = random.choice(possible_rook_squares)
-        # Place Black Pawn 1 (not on 1st or 8th rank, not same as either king or rook)
-        possible_pawn1_squares = [
-            sq for sq in chess.SQUARES
-            if sq not in [white_king_square, black_king_square, white_rook_square]
-            and 0 < chess.square_rank(sq) < 7
-        ]
-        black_pawn1_square = random.choice(possible_pawn1_squares)
-        # Place Black Pawn 2 (not on 1st or 8th rank, not same as either king, rook or black pawn 1)
-        possible_pawn2_squares = [
-            sq for sq in chess.SQUARES
-            if sq not in [white_king_square, black_king_square, white_rook_square, black_pawn1_square]
-            and 0 < chess.square_rank(sq) < 7
-        ]
-        black_pawn2_square = random.choice(possible_pawn2_squares)
-
-        # Check that rook and pawns aren’t attacking the opposing kings (so not illegal “check”)
-        if (chess.square_file(white_rook_square) == chess.square_file(black_king_square) or
-            chess.square_rank(white_rook_square) == chess.square_rank(black_king_square)):
-            continue  # illegal — rook attacking king
-
-        black_pawn1_attack_squares = list(chess.SquareSet(chess.BB_EMPTY))
-        black_pawn2_attack_squares = list(chess.SquareSet(chess.BB_EMPTY))
-        # A black pawn attacks diagonally forward
-        for pawn_square, attack_squares in [(black_pawn1_square, black_pawn1_attack_squares), (black_pawn2_square, black_pawn2_attack_squares)]:
-            if chess.square_rank(pawn_square) > 0:
-                file = chess.square_file(pawn_square)
-                rank = chess.square_rank(pawn_square)
-                if file > 0:
-                    attack_squares.append(chess.square(file - 1, rank - 1))
-                if file < 7:
-                    attack_squares.append(chess.square(file + 1, rank - 1))
-        if white_king_square in black_pawn1_attack_squares or white_king_square in black_pawn2_attack_squares:
-            continue  # illegal — black pawn attacking white king
-
-        # Construct board
-        board.clear_board()
-        board.set_piece_at(white_king_square, chess.Piece(chess.KING, chess.WHITE))
-        board.set_piece_at(black_king_square, chess.Piece(chess.KING, chess.BLACK))
-        board.set_piece_at(white_rook_square, chess.Piece(chess.ROOK, chess.WHITE))
-        board.set_piece_at(black_pawn1_square, chess.Piece(chess.PAWN, chess.BLACK))
-        board.set_piece_at(black_pawn2_square, chess.Piece(chess.PAWN, chess.BLACK))
-
-        # Success: found a valid simple position
-        break
+    Same rules and distribution as calling the scenario generator until n
+    unique boards are found (at most max_attempts legal placements, n * 100
+    by default). Without a seed the draws are seeded from `random`, so
+    random.seed() still makes them reproducible. Returns placement_bitboards
+    tuples; see sample_scenario_boards for boards.
+    """
+    spec = SCENARIO_MAP[scenario_number]
+    if seed is None:
+        seed = random.getrandbits(64)
+    rng = np.random.default_rng(seed)
+    if max_attempts is None:
+        max_attempts = n * 100
 
-    return board
+    unique = {}
+    attempts = 0
+    batch = max(64, 4 * n)
+    while len(unique) < n and attempts < max_attempts:
+        squares = spec.sample(batch, rng)[:max_attempts - attempts]
+        attempts += len(squares)
+        for key in placement_bitboards(spec.pieces, squares):
+            unique.setdefault(key, None)
+            if len(unique) == n:
+                break
+        batch = min(4 * batch, 1 << 16)
+
+    return list(unique)
+
+
+def sample_scenario_boards(scenario_number, n, seed=None, max_attempts=None):
+    spec = SCENARIO_MAP[scenario_number]
+    return [spec.board(bitboards)
+            for bitboards in sample_scenario_bitboards(scenario_number, n, seed, max_attempts)]
+
+
+# Process-pool sampling
+
+# Draws per pool task. Fixed so the chunks, and their seeds, do not depend on the worker count
+CHUNK_DRAWS = 4096
+
+
+def _sample_chunk(task):
+    scenario_number, seed, draws = task
+    spec = SCENARIO_MAP[scenario_number]
+    return placement_bitboards(spec.pieces, spec.sample(draws, np.random.default_rng(seed)))
+
+
+def sample_scenarios_parallel(scenarios, n, workers=None, seed=None, max_attempts=None):
+    """Up to n unique legal placements for each scenario, sampled on a process pool.
+
+    Draws are split into chunks seeded from (seed, scenario, chunk index) and
+    duplicates are dropped in chunk order, so the result is the same for any
+    number of workers (workers=1 samples in this process, None uses every
+    core). Without a seed one is drawn from `random`. Returns one list of
+    placement_bitboards tuples per scenario, in scenario order.
+    """
+    if seed is None:
+        seed = random.getrandbits(64)
+    if max_attempts is None:
+        max_attempts = n * 100
+    draws = min(CHUNK_DRAWS, max(64, 4 * n))
+    seeds = {scenario: np.random.SeedSequence(seed, spawn_key=(scenario,)) for scenario in scenarios}
+    unique = {scenario: {} for scenario in scenarios}
+    attempts = dict.fromkeys(scenarios, 0)
+    # Enough chunks for n placements at a 50% yield, then sized from the yield so far
+    chunks = dict.fromkeys(scenarios, -(-2 * n // draws))
+
+    pool = multiprocessing.Pool(workers) if workers != 1 else None
+    try:
+        while True:
+            pending = [scenario for scenario in scenarios
+                       if len(unique[scenario]) < n and attempts[scenario] < max_attempts]
+            if not pending:
+                break
+            tasks = [(scenario, child, draws) for scenario in pending for child in seeds[scenario].spawn(chunks[scenario])]
+            results = pool.imap(_sample_chunk, tasks) if pool else map(_sample_chunk, tasks)
+            for (scenario, _, _), keys in zip(tasks, results):
+                found = unique[scenario]
+                if len(found) == n:
+                    continue
+                keys = keys[:max_attempts - attempts[scenario]]
+                attempts[scenario] += len(keys)
+                for key in keys:
+                    found.setdefault(key, None)
+                    if len(found) == n:
+                        break
+
+            for scenario in pending:
+                rate = len(unique[scenario]) / (attempts[scenario] or 1)
+                missing = (n - len(unique[scenario])) / max(rate, 0.01)
+                chunks[scenario] = max(1, min(64, -(-int(missing * 1.25) // draws)))
+    finally:
+        if pool:
+            pool.close()
+            pool.join()
+
+    return [list(unique[scenario]) for scenario in scenarios]
+
+
+# Exact enumeration
+
+# Largest position space enumerated (bound before the legality filter)
+MAX_ENUMERATION = 50_000_000
+
+
+def pack_placements(squares):
+    codes = np.zeros(len(squares), dtype=np.int64)
+    for column in range(squares.shape[1]):
+        codes |= squares[:, column].astype(np.int64) << (6 * column)
+    return codes
+
+
+def unpack_placements(codes, columns):
+    codes = np.asarray(codes, dtype=np.int64)
+    return np.stack([(codes >> (6 * column)) & 63 for column in range(columns)], axis=1)
+
+
+class ScenarioPositions:
+    """All legal positions of a scenario, for exact counts and uniform sampling.
+
+    The packed placements are enumerated once; with cache_dir they are saved
+    there as .npy and memory-mapped on later runs. len() is the exact number
+    of unique positions; sample() draws positions uniformly by index.
+    """
+
+    def __init__(self, scenario_number, cache_dir=None):
+        self.scenario_number = scenario_number
+        self.spec = SCENARIO_MAP[scenario_number]
+        self.pieces = self.spec.pieces
+        path = None
+        if cache_dir:
+            symbols = "Kk" + self.spec.symbols
+            path = os.path.join(cache_dir, f"scenario_{scenario_number}_{symbols}.npy")
+        if path and os.path.exists(path):
+            self.placements = np.load(path, mmap_mode="r")
+        else:
+            self.placements = self.spec.enumerate()
+            if path:
+                os.makedirs(cache_dir, exist_ok=True)
+                np.save(path, self.placements)
+
+    def __len__(self):
+        return len(self.placements)
+
+    def squares(self, indices=None):
+        codes = self.placements if indices is None else self.placements[indices]
+        return unpack_placements(codes, len(self.pieces) + 2)
+
+    def boards(self, indices=None):
+        squares = self.squares(indices)
+        return [self.spec.board(bitboards) for bitboards in placement_bitboards(self.pieces, squares)]
+
+    def sample(self, n, seed=None):
+        """n distinct positions drawn uniformly (all of them, shuffled, if n >= len)"""
+        if seed is None:
+            seed = random.getrandbits(64)
+        rng = np.random.default_rng(seed)
+        indices = rng.choice(len(self), size=min(n, len(self)), replace=False)
+        return self.boards(indices)
 
 
-SCENARIO_MAP = {
-    1: scenario_king_vs_king_and_pawn,
-    2: scenario_king_and_rook_vs_king,
-    3: scenario_king_and_queen_vs_king,
-    4: scenario_king_queen_rook_vs_king,
-    5: scenario_king_and_two_rooks_vs_king,
-    6: scenario_king_and_two_bishops_vs_king,
-    7: scenario_king_knight_bishop_vs_king,
-    8: scenario_king_queen_vs_king_bishop,
-    9: scenario_king_queen_vs_king_knight,
-    10: scenario_king_queen_vs_king_rook,
-    11: scenario_king_queen_vs_king_knight_bishop,
-    12: scenario_king_queen_vs_king_two_knights,
-    13: scenario_king_queen_vs_king_two_bishops,
-    14: scenario_king_and_two_pawns_vs_king,
-    15: scenario_king_bishop_vs_king_pawn,
-    16: scenario_king_knight_vs_king_pawn,
-    17: scenario_king_rook_vs_king_pawn,
-    18: scenario_king_queen_vs_king_pawn,
-    19: scenario_king_queen_pawn_vs_king_queen,
-    20: scenario_king_two_pawns_vs_king_pawn,
-    21: scenario_king_pawn_rook_vs_king_rook,
-    22: scenario_king_two_pawns_rook_vs_king_rook,
-    23: scenario_king_rook_vs_king_bishop,
-    24: scenario_king_rook_vs_king_knight,
-    25: scenario_king_rook_vs_king_two_pawns,
-}
 # Scenario Dispatcher
-def get_scenario_board(scenario_number, n):
+def get_scenario_board(scenario_number, n, batch=True, uniform=False, cache_dir=None, workers=None):
 
     selected_scenario = SCENARIO_MAP.get(scenario_number)
-    selected_scenario_name = selected_scenario.__name__ 
+    selected_scenario_name = selected_scenario.__name__
+
+    # Uniform over the enumerated positions; n=None returns all of them
+    if uniform or n is None:
+        positions = ScenarioPositions(scenario_number, cache_dir)
+        if n is None:
+            return positions.boards()
+        if len(positions) < n:
+            print(f"Warning: Scenario {scenario_number} ({selected_scenario_name}) only has {len(positions)} unique positions, {n} requested.")
+        return positions.sample(n)
+
+    if workers is not None:
+        bitboards, = sample_scenarios_parallel([scenario_number], n, workers or None)
+        boards = [selected_scenario.board(key) for key in bitboards]
+        if len(boards) < n:
+            print(f"Warning: Only generated {len(boards)} unique boards out of requested {n} for scenario {scenario_number} ({selected_scenario_name}).")
+        return boards
+
+    if batch:
+        boards = sample_scenario_boards(scenario_number, n)
+        if len(boards) < n:
+            print(f"Warning: Only generated {len(boards)} unique boards out of requested {n} for scenario {scenario_number} ({selected_scenario_name}).")
+        return boards
 
     unique_boards = set()
     boards = []
@@ -1528,11 +461,26 @@ def get_scenario_board(scenario_number, n):
 
     return boards
 
-def get_boards():
+def get_boards(batch=True, workers=None, n=100):
+    """n boards of every scenario, in scenario order.
+
+    With workers, all scenarios are sampled on one process pool of that many
+    workers (0 for every core); the boards then depend only on the `random`
+    state, not on the worker count.
+    """
+    if workers is not None:
+        all_boards = []
+        scenarios = list(SCENARIO_MAP)
+        for scenario, bitboards in zip(scenarios, sample_scenarios_parallel(scenarios, n, workers or None)):
+            spec = SCENARIO_MAP[scenario]
+            if len(bitboards) < n:
+                print(f"Warning: Only generated {len(bitboards)} unique boards out of requested {n} for scenario {scenario} ({spec.__name__}).")
+            all_boards.extend(spec.board(key) for key in bitboards)
+        return all_boards
 
     all_boards = []
     for i in range(1, 26):
-        boards = get_scenario_board(i, 100)
+        boards = get_scenario_board(i, n, batch)
         all_boards.extend(boards)
 
-    return all_boards
\ No newline at end of file
+    return all_boards
@@ -1,4 +1,5 @@
 import chess
+import numpy as np
 import torch
 import torch.nn as nn
 import torch.nn.functional as F
@@ -8,13 +9,102 @@ piece_values = {
     chess.ROOK: 5, chess.QUEEN: 9, chess.KING: 0
 }
 
+# How close a king on each square is to the edge (7 in a corner, 1 in the center)
+EDGE_CLOSENESS = [
+    7 - min(chess.square_file(sq), 7 - chess.square_file(sq))
+      - min(chess.square_rank(sq), 7 - chess.square_rank(sq))
+    for sq in chess.SQUARES
+]
+
 def material_score(board):
+    if isinstance(board, TrackedBoard):
+        return board.material
     score = 0
     for piece_type, value in piece_values.items():
         score += len(board.pieces(piece_type, chess.WHITE)) * value
         score -= len(board.pieces(piece_type, chess.BLACK)) * value
     return score
 
+class TrackedBoard(chess.Board):
+    """chess.Board that keeps material and king-edge features current.
+
+    push/pop update piece_counts[color][piece_type], material (white minus
+    black, as material_score) and king_edge[color] (EDGE_CLOSENESS of each
+    king, None without one) incrementally; like occupied_co, the per-color
+    lists are indexed by the color itself. Any other change to the position
+    goes through clear_stack, which recomputes them.
+    """
+
+    def clear_stack(self):
+        super().clear_stack()
+        self._refresh()
+
+    def _refresh(self):
+        self.piece_counts = [[0] * 7, [0] * 7]
+        self.material = 0
+        for color in chess.COLORS:
+            sign = 1 if color == chess.WHITE else -1
+            for piece_type in chess.PIECE_TYPES:
+                count = chess.popcount(self.pieces_mask(piece_type, color))
+                self.piece_counts[color][piece_type] = count
+                self.material += sign * count * piece_values[piece_type]
+        self.king_edge = [None, None]
+        for color in chess.COLORS:
+            king = self.king(color)
+            if king is not None:
+                self.king_edge[color] = EDGE_CLOSENESS[king]
+        self._feature_stack = []
+
+    def push(self, move):
+        us = self.turn
+        sign = 1 if us == chess.WHITE else -1
+        material, king_edge = self.material, tuple(self.king_edge)
+        changes = ()
+        moved = self.piece_type_at(move.from_square) if move else None
+
+        if moved and not self.is_castling(move):
+            captured = self.piece_type_at(move.to_square)
+            if captured is None and self.is_en_passant(move):
+                captured = chess.PAWN
+            if captured:
+                changes += ((not us, captured, -1),)
+                self.material += sign * piece_values[captured]
+            if move.promotion:
+                changes += ((us, chess.PAWN, -1), (us, move.promotion, 1))
+                self.material += sign * (piece_values[move.promotion] - piece_values[chess.PAWN])
+            for color, piece_type, delta in changes:
+                self.piece_counts[color][piece_type] += delta
+
+        super().push(move)
+
+        if moved == chess.KING:
+            self.king_edge[us] = EDGE_CLOSENESS[self.king(us)]
+        self._feature_stack.append((material, king_edge, changes))
+
+    def pop(self):
+        move = super().pop()
+        self.material, king_edge, changes = self._feature_stack.pop()
+        self.king_edge = list(king_edge)
+        for color, piece_type, delta in changes:
+            self.piece_counts[color][piece_type] -= delta
+        return move
+
+    def apply_mirror(self):
+        # Colors are swapped after the transform has already refreshed the features
+        super().apply_mirror()
+        self._refresh()
+
+    def copy(self, *, stack=True):
+        board = super().copy(stack=stack)
+        board.piece_counts = [list(counts) for counts in self.piece_counts]
+        board.material = self.material
+        board.king_edge = list(self.king_edge)
+        if stack:
+            stack = len(self.move_stack) if stack is True else stack
+            board._feature_stack = self._feature_stack[-stack:]
+        return board
+
+
 def pretty_print_board(fen) -> None:
     fen = fen[0]
     if isinstance(fen, str):
@@ -45,4 +135,98 @@ def board_to_tensor(board):
     
     return tensor.flatten()
 
-    
\ No newline at end of file
+
+# Rows encoded per step in boards_to_array (keeps the intermediates in cache)
+ENCODE_BLOCK = 4096
+
+
+def piece_bitboards(boards):
+    """(N, 12) uint64 array of piece bitboards in board_to_tensor channel order"""
+    rows = []
+    for board in boards:
+        white, black = board.occupied_co[chess.WHITE], board.occupied_co[chess.BLACK]
+        masks = (board.pawns, board.knights, board.bishops, board.rooks, board.queens, board.kings)
+        rows.append([mask & white for mask in masks] + [mask & black for mask in masks])
+    return np.array(rows, dtype=np.uint64).reshape(-1, 12)
+
+
+def boards_to_array(boards, out=None):
+    """board_to_tensor for many boards at once, as an (N, 768) float32 array.
+
+    boards is a list of boards or an (N, 12) uint64 array from
+    piece_bitboards. The bitboards are unpacked with np.unpackbits instead of
+    reading squares one by one. With out, an (N, 768) float32 array (or CPU
+    tensor, see boards_to_tensor) is filled in place and returned.
+    """
+    if isinstance(boards, np.ndarray):
+        bitboards = boards
+    else:
+        bitboards = piece_bitboards(boards)
+    bitboards = np.ascontiguousarray(bitboards, dtype="<u8").reshape(-1, 12)
+    n = len(bitboards)
+    if out is None:
+        out = np.empty((n, 768), dtype=np.float32)
+    if out.shape != (n, 768) or out.dtype != np.float32:
+        raise ValueError(f"out must be a float32 array of shape ({n}, 768)")
+
+    # Byte b, bit i of a little-endian bitboard is square 8 * b + i. With the
+    # bytes moved in front of the channels, unpacking gives (square, channel)
+    for start in range(0, n, ENCODE_BLOCK):
+        block = bitboards[start:start + ENCODE_BLOCK]
+        rows = len(block)
+        square_bytes = np.ascontiguousarray(block.view(np.uint8).reshape(rows, 12, 8).transpose(0, 2, 1))
+        bits = np.unpackbits(square_bytes[:, :, None, :], axis=2, bitorder="little")
+        np.copyto(out[start:start + rows].reshape(rows, 8, 8, 12), bits, casting="unsafe")
+    return out
+
+
+def boards_to_tensor(boards, out=None):
+    """boards_to_array as an (N, 768) torch tensor; rows equal board_to_tensor(board)"""
+    if out is None:
+        return torch.from_numpy(boards_to_array(boards))
+    boards_to_array(boards, out.numpy())
+    return out
+
+
+
+
+if __name__ == "__main__":
+    # Check TrackedBoard against from-scratch features on random playouts
+    import random
+    from get_board import SCENARIO_MAP, get_scenario_board
+
+    def features(board):
+        plain = chess.Board(board.fen())
+        # Indexed by color like occupied_co: [black, white]
+        counts = [[0] + [len(plain.pieces(piece_type, color)) for piece_type in chess.PIECE_TYPES]
+                  for color in (chess.BLACK, chess.WHITE)]
+        edges = [None if plain.king(color) is None else EDGE_CLOSENESS[plain.king(color)]
+                 for color in (chess.BLACK, chess.WHITE)]
+        return material_score(plain), counts, edges
+
+    random.seed(0)
+    starts = [chess.STARTING_FEN]
+    for scenario in SCENARIO_MAP:
+        starts += [board.fen() for board in get_scenario_board(scenario, 20)]
+
+    checked = 0
+    for fen in starts:
+        board = TrackedBoard(fen)
+        for _ in range(120):
+            moves = list(board.legal_moves)
+            if moves and (not board.move_stack or random.random() < 0.8):
+                board.push(random.choice(moves))
+            elif board.move_stack:
+                board.pop()
+            else:
+                break
+            if random.random() < 0.05:
+                board = board.copy(stack=random.choice([True, False, 3]))
+            assert (board.material, board.piece_counts, board.king_edge) == features(board), board.fen()
+            checked += 1
+        while board.move_stack:
+            board.pop()
+            assert (board.material, board.piece_counts, board.king_edge) == features(board), board.fen()
+            checked += 1
+
+    print(f"✅ TrackedBoard matched material_score and king edges on {checked} positions from {len(starts)} playouts")
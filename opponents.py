@@ -0,0 +1,298 @@
+import random
+import sqlite3
+from collections import OrderedDict
+
+import chess
+import chess.engine
+import chess.polyglot
+
+from helper import piece_values, TrackedBoard
+
+
+class MoveCache:
+    """Opponent replies keyed by position hash and search limit.
+
+    Lookups go through an in-memory LRU tier of `size` positions, then an
+    optional SQLite file that persists across runs and can be shared by
+    several processes. With candidates > 1 up to that many engine replies are
+    collected per position before the cache answers, and hits pick one of
+    them at random so a weak engine keeps its variety.
+
+    The key ignores the move history (repetitions, 50-move counter), and
+    `tag` should name anything else the reply depends on, like skill level.
+    """
+
+    FLUSH_EVERY = 1000
+
+    def __init__(self, size=100000, path=None, candidates=1, tag=""):
+        self.size = size
+        self.path = path
+        self.candidates = max(1, candidates)
+        self.tag = tag
+        self.memory = OrderedDict()
+        self.pending = {}
+        self.db = None
+        if path:
+            self.db = sqlite3.connect(path, timeout=30)
+            self.db.execute(
+                "CREATE TABLE IF NOT EXISTS moves "
+                "(hash INTEGER, limit_key TEXT, moves TEXT, PRIMARY KEY (hash, limit_key))"
+            )
+            self.db.commit()
+        self.reset_stats()
+
+    def reset_stats(self):
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+    def key(self, board, limit):
+        h = chess.polyglot.zobrist_hash(board)
+        # SQLite integers are signed 64-bit
+        if h >= 1 << 63:
+            h -= 1 << 64
+        return h, f"{self.tag}|{limit!r}"
+
+    def _entry(self, key):
+        moves = self.memory.get(key)
+        if moves is not None:
+            self.memory.move_to_end(key)
+            return moves, False
+        moves = self.pending.get(key)
+        if moves is None and self.db is not None:
+            row = self.db.execute(
+                "SELECT moves FROM moves WHERE hash = ? AND limit_key = ?", key
+            ).fetchone()
+            if row is not None:
+                moves = [chess.Move.from_uci(uci) for uci in row[0].split()]
+        if moves is not None:
+            self._remember(key, moves)
+            return moves, True
+        return None, False
+
+    def _remember(self, key, moves):
+        if self.size <= 0:
+            return
+        self.memory[key] = moves
+        self.memory.move_to_end(key)
+        if len(self.memory) > self.size:
+            self.memory.popitem(last=False)
+
+    def get(self, board, limit):
+        """Cached reply for board, or None if the engine has to be asked"""
+        moves, from_disk = self._entry(self.key(board, limit))
+        if moves is None or len(moves) < self.candidates:
+            self.misses += 1
+            return None
+        self.hits += 1
+        if from_disk:
+            self.disk_hits += 1
+        return moves[0] if self.candidates == 1 else random.choice(moves)
+
+    def put(self, board, limit, move):
+        """Record an engine reply for board (ignored once enough are stored)"""
+        if move is None:
+            return
+        key = self.key(board, limit)
+        moves, _ = self._entry(key)
+        if moves is None:
+            moves = []
+            self._remember(key, moves)
+        if len(moves) >= self.candidates:
+            return
+        moves.append(move)
+        if self.db is not None:
+            self.pending[key] = moves
+            if len(self.pending) >= self.FLUSH_EVERY:
+                self.flush()
+
+    def flush(self):
+        if self.db is None or not self.pending:
+            return
+        self.db.executemany(
+            "INSERT OR REPLACE INTO moves VALUES (?, ?, ?)",
+            [(h, limit_key, " ".join(m.uci() for m in moves))
+             for (h, limit_key), moves in self.pending.items()],
+        )
+        self.db.commit()
+        self.pending.clear()
+
+    def close(self):
+        self.flush()
+        if self.db is not None:
+            self.db.close()
+            self.db = None
+
+    def stats(self):
+        return {"hits": self.hits, "disk_hits": self.disk_hits, "misses": self.misses}
+
+    def merge_stats(self, stats):
+        self.hits += stats["hits"]
+        self.disk_hits += stats["disk_hits"]
+        self.misses += stats["misses"]
+
+    def summary(self):
+        lookups = self.hits + self.misses
+        rate = self.hits / lookups if lookups else 0
+        return (f"hit rate {rate:.1%} ({self.hits}/{lookups}, {self.disk_hits} from disk), "
+                f"{self.hits} engine calls avoided")
+
+
+class CachedEngine:
+    """Engine wrapper that answers play() from a MoveCache when it can"""
+
+    def __init__(self, engine, cache):
+        self.engine = engine
+        self.cache = cache
+
+    def play(self, board, limit, **kwargs):
+        move = self.cache.get(board, limit)
+        if move is not None:
+            return chess.engine.PlayResult(move, None)
+        result = self.engine.play(board, limit, **kwargs)
+        self.cache.put(board, limit, result.move)
+        return result
+
+    def quit(self):
+        self.cache.close()
+        self.engine.quit()
+
+    def __getattr__(self, name):
+        return getattr(self.engine, name)
+
+
+MATE_SCORE = 100000
+
+
+class AlphaBetaOpponent:
+    """In-process opponent: fixed-depth alpha-beta over python-chess.
+
+    Meant for the small endgames from get_board.py, where a depth-1 search
+    in a Stockfish subprocess mostly costs IPC. Positions are scored in
+    centipawns from material and piece mobility, mates and stalemates are
+    detected at the leaves, and `noise` adds a uniform random amount (in
+    pawns) to every root move so a weak setting keeps some variety.
+
+    Has the same play()/configure()/quit() interface as the SimpleEngine
+    used in QLearningChess. The search depth is set here; the depth of the
+    Limit passed to play() is ignored.
+    """
+
+    def __init__(self, depth=1, noise=0.0, mobility_weight=10, seed=None):
+        self.depth = depth
+        self.noise = noise
+        self.mobility_weight = mobility_weight
+        self.rng = random.Random(seed)
+        self.nodes = 0
+
+    def __repr__(self):
+        return f"AlphaBetaOpponent(depth={self.depth}, noise={self.noise})"
+
+    def play(self, board, limit=None, **kwargs):
+        board = board.copy(stack=False)
+        best_move, best_score = None, None
+        alpha = -MATE_SCORE - 1
+        for move in self._ordered_moves(board):
+            board.push(move)
+            score = -self._search(board, self.depth - 1, -MATE_SCORE - 1, -alpha, 1)
+            board.pop()
+            if self.noise:
+                score += self.rng.uniform(-self.noise, self.noise) * 100
+            if best_score is None or score > best_score:
+                best_move, best_score = move, score
+            # With noise every root move needs an exact score
+            if not self.noise:
+                alpha = max(alpha, score)
+        return chess.engine.PlayResult(best_move, None)
+
+    def configure(self, options):
+        pass
+
+    def quit(self):
+        pass
+
+    def _search(self, board, depth, alpha, beta, ply):
+        self.nodes += 1
+        if depth <= 0:
+            return self.evaluate(board, ply)
+        moves = self._ordered_moves(board)
+        if not moves:
+            return -(MATE_SCORE - ply) if board.is_check() else 0
+        if board.is_insufficient_material():
+            return 0
+        for move in moves:
+            board.push(move)
+            score = -self._search(board, depth - 1, -beta, -alpha, ply + 1)
+            board.pop()
+            if score >= beta:
+                return score
+            alpha = max(alpha, score)
+        return alpha
+
+    @staticmethod
+    def _ordered_moves(board):
+        # Captures (most valuable victim first) and promotions before quiet moves
+        def order(move):
+            victim = board.piece_type_at(move.to_square)
+            return -(piece_values[victim] if victim else 0) - (9 if move.promotion else 0)
+        return sorted(board.legal_moves, key=order)
+
+    def evaluate(self, board, ply=0):
+        """Static score in centipawns for the side to move"""
+        # One legal move is enough to rule out mate and stalemate
+        if not any(board.generate_legal_moves()):
+            return -(MATE_SCORE - ply) if board.is_check() else 0
+        if board.is_insufficient_material():
+            return 0
+
+        if isinstance(board, TrackedBoard):
+            material = board.material
+        else:
+            occupied_white = board.occupied_co[chess.WHITE]
+            material = 0
+            for piece_type, mask in ((chess.PAWN, board.pawns), (chess.KNIGHT, board.knights),
+                                     (chess.BISHOP, board.bishops), (chess.ROOK, board.rooks),
+                                     (chess.QUEEN, board.queens)):
+                if mask:
+                    white = chess.popcount(mask & occupied_white)
+                    material += piece_values[piece_type] * (2 * white - chess.popcount(mask))
+        if board.turn == chess.BLACK:
+            material = -material
+
+        # Mobility as attacked squares not occupied by own pieces (no move objects)
+        mobility = 0
+        for color, sign in ((board.turn, 1), (not board.turn, -1)):
+            own = board.occupied_co[color]
+            for square in chess.scan_reversed(own & ~board.pawns):
+                mobility += sign * chess.popcount(board.attacks_mask(square) & ~own)
+
+        return material * 100 + self.mobility_weight * mobility
+
+
+class TablebaseOpponent:
+    """Perfect opponent playing tablebase moves (fastest win, slowest loss).
+
+    Positions the tablebase does not cover go to `fallback` (another
+    opponent or engine) if given; otherwise no move is returned.
+    """
+
+    def __init__(self, tablebase, fallback=None):
+        self.tablebase = tablebase
+        self.fallback = fallback
+
+    def __repr__(self):
+        return f"TablebaseOpponent({self.tablebase!r})"
+
+    def play(self, board, limit=None, **kwargs):
+        move = self.tablebase.best_move(board)
+        if move is None and self.fallback is not None:
+            return self.fallback.play(board, limit, **kwargs)
+        return chess.engine.PlayResult(move, None)
+
+    def configure(self, options):
+        if self.fallback is not None:
+            self.fallback.configure(options)
+
+    def quit(self):
+        if self.fallback is not None:
+            self.fallback.quit()
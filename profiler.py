@@ -0,0 +1,108 @@
+import json
+import time
+
+# Training phases and the QLearningChess methods timed for each
+PHASES = {
+    "select": ("_epsilon_greedy_action",),
+    "state_key": ("_state_key",),
+    "engine": ("_opponent_move",),
+    "reward": ("_reward",),
+    "game_over": ("_terminal_outcome", "_decided_outcome"),
+    "bootstrap": ("_max_Q_value",),
+    "q_update": ("_q_update",),
+    "replay": ("_remember",),
+}
+
+
+class PhaseProfiler:
+    """Per-phase timers and call counters for the training loop.
+
+    attach() shadows the phase methods of an agent with timed wrappers
+    (instance attributes), and detach() removes them, so an agent that is
+    not being profiled runs the plain methods. Times are exclusive: a phase
+    called from inside another (a Q update made during replay) is only
+    counted once. Time spent outside every phase (pushing moves,
+    bookkeeping) is reported as "other".
+    """
+
+    def __init__(self):
+        self.run = dict.fromkeys(list(PHASES) + ["other"], 0.0)
+        self.calls = dict.fromkeys(PHASES, 0)
+        self.window = dict(self.run)
+        self.episodes = []
+        self._episode = dict(self.run)
+        self._inner = 0.0
+        self._episode_start = None
+
+    def wrap(self, phase, method):
+        clock = time.perf_counter
+
+        def timed(*args, **kwargs):
+            saved = self._inner
+            self._inner = 0.0
+            start = clock()
+            try:
+                return method(*args, **kwargs)
+            finally:
+                elapsed = clock() - start
+                self._episode[phase] += elapsed - self._inner
+                self.calls[phase] += 1
+                self._inner = saved + elapsed
+        return timed
+
+    def attach(self, agent):
+        for phase, names in PHASES.items():
+            for name in names:
+                setattr(agent, name, self.wrap(phase, getattr(agent, name)))
+        self._episode_start = time.perf_counter()
+
+    def detach(self, agent):
+        for names in PHASES.values():
+            for name in names:
+                agent.__dict__.pop(name, None)
+
+    def end_episode(self):
+        """Close the current episode's breakdown (called once per recorded episode)"""
+        now = time.perf_counter()
+        episode = self._episode
+        episode["other"] = max(0.0, now - self._episode_start - sum(episode[phase] for phase in PHASES))
+        self._episode_start = now
+        for phase, seconds in episode.items():
+            self.run[phase] += seconds
+            self.window[phase] += seconds
+        self.episodes.append(episode)
+        self._episode = dict.fromkeys(episode, 0.0)
+
+    def breakdown(self, times=None):
+        """Phase shares like "engine 46% | select 15%", largest first, of the run (or of times)"""
+        times = self.run if times is None else times
+        total = sum(times.values())
+        parts = sorted(times.items(), key=lambda item: -item[1])
+        return " | ".join(f"{phase} {seconds / total:.0%}" for phase, seconds in parts if seconds) if total else ""
+
+    def window_line(self):
+        """Share of each phase since the last call, for the Ep progress line"""
+        line = self.breakdown(self.window)
+        total = sum(self.window.values())
+        self.window = dict.fromkeys(self.window, 0.0)
+        return f"   ⏱  {total:.2f}s: {line}"
+
+    def summary(self):
+        total = sum(self.run.values())
+        return {
+            "episodes": len(self.episodes),
+            "seconds": total,
+            "phases": {
+                phase: {
+                    "seconds": seconds,
+                    "share": seconds / total if total else 0.0,
+                    "calls": self.calls.get(phase),
+                    "us_per_call": seconds / self.calls[phase] * 1e6 if self.calls.get(phase) else None,
+                }
+                for phase, seconds in self.run.items()
+            },
+        }
+
+    def save(self, path):
+        with open(path, "w") as f:
+            json.dump(self.summary(), f, indent=2)
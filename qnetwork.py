@@ -0,0 +1,166 @@
+import random
+
+import numpy as np
+import torch
+import torch.nn as nn
+import torch.nn.functional as F
+
+from helper import boards_to_array
+
+# board_to_tensor features plus the side to move
+FEATURES = 768 + 1
+# One output per (from, to) square pair; promotions to different pieces share one
+ACTIONS = 64 * 64
+# The network works in units of VALUE_SCALE so terminal rewards (+-100) stay near 1
+VALUE_SCALE = 100.0
+
+
+def action_index(move):
+    return move.from_square | (move.to_square << 6)
+
+
+class QNetwork(nn.Module):
+    """Board features -> Q-value of every (from, to) move"""
+
+    def __init__(self, hidden=128):
+        super().__init__()
+        self.hidden = nn.Linear(FEATURES, hidden)
+        self.out = nn.Linear(hidden, ACTIONS)
+        # Every Q-value starts at 0.0, like an empty table
+        nn.init.zeros_(self.out.weight)
+        nn.init.zeros_(self.out.bias)
+
+    def forward(self, x):
+        return self.out(F.relu(self.hidden(x)))
+
+
+class NeuralState:
+    """State key of NeuralQTable: the features and the last forward pass on them"""
+    __slots__ = ("features", "values", "version")
+
+    def __init__(self, features):
+        self.features = features
+        self.values = None
+        self.version = -1
+
+
+class NeuralQTable:
+    """Q-function backend with the Q-table interface, backed by a small torch MLP.
+
+    Memory stays constant however many positions are visited. One forward
+    pass gives the values of all legal moves, so max_q and epsilon_greedy
+    cost a single batched call per state (cached until the weights change).
+    set_q treats the value as a regression target; targets are collected
+    and fitted in mini-batches of batch_size with a Huber loss. len() is
+    the number of network weights. check_collisions is accepted for
+    make_qtable and ignored.
+    """
+
+    dirty = None
+
+    def __init__(self, hidden=128, lr=1e-3, batch_size=32, seed=None, check_collisions=False):
+        if seed is not None:
+            torch.manual_seed(seed)
+        self.net = QNetwork(hidden)
+        self.optimizer = torch.optim.Adam(self.net.parameters(), lr=lr)
+        self.batch_size = batch_size
+        self.pending = []
+        self.version = 0
+        self.updates = 0
+
+    def __len__(self):
+        return sum(p.numel() for p in self.net.parameters())
+
+    def __getstate__(self):
+        self.flush()
+        state = self.__dict__.copy()
+        state["dirty"] = None
+        return state
+
+    def state_key(self, board):
+        features = np.empty((1, FEATURES), dtype=np.float32)
+        boards_to_array([board], features[:, :768])
+        features[0, 768] = board.turn
+        return NeuralState(torch.from_numpy(features[0]))
+
+    def action_key(self, move):
+        return action_index(move)
+
+    def values(self, state):
+        if state.version != self.version:
+            with torch.no_grad():
+                state.values = self.net(state.features).numpy() * VALUE_SCALE
+            state.version = self.version
+        return state.values
+
+    def prefetch(self, states):
+        """Compute the stale values of many states with one forward pass"""
+        stale = [state for state in states if state.version != self.version]
+        if not stale:
+            return
+        with torch.no_grad():
+            values = self.net(torch.stack([state.features for state in stale])).numpy() * VALUE_SCALE
+        for state, row in zip(stale, values):
+            state.values = row
+            state.version = self.version
+
+    def get_q(self, state, move):
+        return float(self.values(state)[action_index(move)])
+
+    def set_q(self, state, move, value):
+        self.pending.append((state.features, action_index(move), value))
+        if len(self.pending) >= self.batch_size:
+            self.flush()
+
+    def flush(self):
+        """Fit the pending targets with one optimizer step"""
+        if not self.pending:
+            return
+        features, actions, targets = zip(*self.pending)
+        self.pending = []
+        q = self.net(torch.stack(features)).gather(1, torch.tensor(actions).unsqueeze(1)).squeeze(1)
+        loss = F.smooth_l1_loss(q, torch.tensor(targets, dtype=torch.float32) / VALUE_SCALE)
+        self.optimizer.zero_grad()
+        loss.backward()
+        self.optimizer.step()
+        self.version += 1
+        self.updates += len(actions)
+        if self.dirty is not None:
+            self.dirty.add(self.version)
+
+    def max_q(self, board, state):
+        legal_moves = list(board.legal_moves)
+        if not legal_moves:
+            return 0.0
+        values = self.values(state)
+        return float(max(values[action_index(move)] for move in legal_moves))
+
+    def epsilon_greedy(self, board, state, epsilon):
+        legal_moves = list(board.legal_moves)
+        if not legal_moves:
+            return None
+        if np.random.rand() < epsilon:
+            return random.choice(legal_moves)
+        values = self.values(state)[[action_index(move) for move in legal_moves]]
+        best = np.flatnonzero(values == values.max())
+        return legal_moves[random.choice(best)]
+
+    def add_state(self, board, state):
+        pass
+
+    def track_changes(self):
+        if self.dirty is None:
+            self.dirty = set()
+
+    def changes(self):
+        """The current weights as one record, if they changed since the last call"""
+        self.flush()
+        if not self.dirty:
+            return []
+        self.dirty.clear()
+        return [{name: tensor.clone() for name, tensor in self.net.state_dict().items()}]
+
+    def apply_changes(self, records):
+        for weights in records:
+            self.net.load_state_dict(weights)
+            self.version += 1
@@ -0,0 +1,675 @@
+import chess
+import chess.polyglot
+import mmap
+import os
+import pickle
+import random
+import struct
+import numpy as np
+from array import array
+
+from qnetwork import NeuralQTable
+
+
+def simplify_state(board):
+    """Use simplified FEN without halfmove/fullmove counters"""
+    fen = board.fen()
+    parts = fen.split(' ')
+    return ' '.join(parts[:4])
+
+
+# Move codes: 6 bits from-square, 6 bits to-square, 3 bits promotion piece type
+def move_code(move):
+    return move.from_square | (move.to_square << 6) | ((move.promotion or 0) << 12)
+
+
+def code_to_move(code):
+    return chess.Move(code & 0x3F, (code >> 6) & 0x3F, (code >> 12) or None)
+
+
+def position_hash(board):
+    """64-bit Zobrist hash of the position (pieces, side to move, castling, en passant)"""
+    return chess.polyglot.zobrist_hash(board)
+
+
+class QTable(dict):
+    """Q-table keyed by (simplified FEN, uci) tuples - the original layout."""
+
+    dirty = None  # keys set since the last changes() call, once tracking is on
+
+    def state_key(self, board):
+        return simplify_state(board)
+
+    def action_key(self, move):
+        return move.uci()
+
+    def entry_key(self, state, move):
+        return (state, move.uci())
+
+    def get_q(self, state, move):
+        return self.get((state, self.action_key(move)), 0.0)
+
+    def set_q(self, state, move, value):
+        key = (state, self.action_key(move))
+        self[key] = value
+        if self.dirty is not None:
+            self.dirty.add(key)
+
+    def max_q(self, board, state):
+        legal_moves = list(board.legal_moves)
+        if not legal_moves:
+            return 0.0
+        return max(self.get_q(state, move) for move in legal_moves)
+
+    def epsilon_greedy(self, board, state, epsilon):
+        legal_moves = list(board.legal_moves)
+        if not legal_moves:
+            return None
+        if np.random.rand() < epsilon:
+            return random.choice(legal_moves)
+        q_values = [self.get_q(state, move) for move in legal_moves]
+        max_q = max(q_values)
+        best_actions = [move for move, q in zip(legal_moves, q_values) if q == max_q]
+        return random.choice(best_actions)
+
+    def add_state(self, board, state):
+        """Allocate storage for a state before set_q (only row tables need it)"""
+        pass
+
+    def prefetch(self, states):
+        """Evaluate many states at once before reading them (only the neural backend needs it)"""
+        pass
+
+    def track_changes(self):
+        if self.dirty is None:
+            self.dirty = set()
+
+    def changes(self):
+        """Return (key, value) records of entries set since the last call"""
+        records = [(key, self[key]) for key in self.dirty]
+        self.dirty.clear()
+        return records
+
+    def apply_changes(self, records):
+        for key, value in records:
+            self[key] = value
+
+
+class ZobristQTable(QTable):
+    """Q-table keyed by a single int: (64-bit Zobrist hash << 16) | move code.
+
+    Avoids building a FEN string per lookup and stores one small int per entry
+    instead of a tuple of two strings. With check_collisions=True the simplified
+    FEN seen for every hash is remembered so distinct positions sharing a hash
+    are detected (at the cost of the FEN work this table otherwise avoids).
+    """
+
+    def __init__(self, *args, check_collisions=False, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.check_collisions = check_collisions
+        self.positions = {}
+        self.collisions = 0
+
+    def state_key(self, board):
+        h = position_hash(board)
+        if self.check_collisions:
+            fen = simplify_state(board)
+            seen = self.positions.setdefault(h, fen)
+            if seen != fen:
+                self.collisions += 1
+                if self.collisions == 1:
+                    print(f"⚠️  Zobrist collision: {seen!r} and {fen!r} share hash {h:016x}")
+        return h
+
+    def action_key(self, move):
+        return move_code(move)
+
+    def entry_key(self, state, move):
+        return (state << 16) | move_code(move)
+
+    def get_q(self, state, move):
+        return self.get((state << 16) | move_code(move), 0.0)
+
+    def set_q(self, state, move, value):
+        key = (state << 16) | move_code(move)
+        self[key] = value
+        if self.dirty is not None:
+            self.dirty.add(key)
+
+    def _load_entry(self, board, state, move, value):
+        self.set_q(state, move, value)
+
+    @classmethod
+    def from_fen_table(cls, table, check_collisions=False):
+        """Convert a (simplified FEN, uci)-keyed table into a Zobrist-keyed one"""
+        converted = cls(check_collisions=check_collisions)
+        states = {}
+        for (state, action), value in table.items():
+            if state not in states:
+                board = chess.Board(state + " 0 1")
+                states[state] = (board, converted.state_key(board))
+            board, h = states[state]
+            converted._load_entry(board, h, chess.Move.from_uci(action), value)
+        return converted
+
+
+class QRow:
+    """Action values of one state, aligned with its cached legal move codes"""
+    __slots__ = ("codes", "values", "written")
+
+    def __init__(self, codes):
+        self.codes = codes
+        self.values = np.zeros(len(codes))
+        self.written = 0  # bitmask of slots that were ever set
+
+
+class RowQTable(ZobristQTable):
+    """Q-table mapping each Zobrist state hash to one QRow.
+
+    Legal moves are generated once per state, when the agent first acts
+    there; afterwards exploration, max and argmax (with random tie-breaking)
+    work on the cached row with single vectorized calls. len() counts the
+    (state, action) entries that were set, like the other backends.
+
+    A table loaded from a .qtb file keeps it as `base` (a MappedQTable):
+    the file has no legal move lists, so each state's row is built when the
+    state is first seen and filled with its entries from the file.
+    """
+
+    def __init__(self, *args, base=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.base = base
+        self.entries = len(base) if base is not None else 0
+
+    def __len__(self):
+        return self.entries
+
+    def row(self, board, state):
+        row = self.get(state)
+        if row is None:
+            row = QRow(array('H', map(move_code, board.legal_moves)))
+            if row.codes:
+                if self.base is not None:
+                    self._fill(row, state)
+                self[state] = row
+        return row
+
+    def _fill(self, row, state):
+        """Copy a new row's values from the base file (they are counted in entries already)"""
+        slots = {code: i for i, code in enumerate(row.codes)}
+        for code, value in self.base.file_entries(state).items():
+            i = slots.get(code)
+            if i is None:
+                self.entries -= 1  # not a legal move here: a hash collision
+                continue
+            row.values[i] = value
+            row.written |= 1 << i
+
+    def add_state(self, board, state):
+        self.row(board, state)
+
+    def get_q(self, state, move):
+        row = self.get(state)
+        if row is None:
+            return self.base.get_q(state, move) if self.base is not None else 0.0
+        return float(row.values[row.codes.index(move_code(move))])
+
+    def set_q(self, state, move, value):
+        row = self[state]
+        i = row.codes.index(move_code(move))
+        row.values[i] = value
+        if not row.written >> i & 1:
+            row.written |= 1 << i
+            self.entries += 1
+        if self.dirty is not None:
+            self.dirty.add(state)
+
+    def max_q(self, board, state):
+        # Unseen states have no row yet: all their Q-values are still 0.0
+        row = self.get(state)
+        if row is None:
+            if self.base is None or not self.base.file_entries(state):
+                return 0.0
+            row = self.row(board, state)
+        return float(row.values.max())
+
+    def epsilon_greedy(self, board, state, epsilon):
+        row = self.row(board, state)
+        if not row.codes:
+            return None
+        if np.random.rand() < epsilon:
+            return code_to_move(random.choice(row.codes))
+        values = row.values
+        best = np.flatnonzero(values == values.max())
+        return code_to_move(row.codes[random.choice(best)])
+
+    def changes(self):
+        """Return one (state, codes, values, written) record per changed row"""
+        records = []
+        for state in self.dirty:
+            row = dict.__getitem__(self, state)
+            records.append((state, row.codes.tobytes(), row.values.tobytes(), row.written))
+        self.dirty.clear()
+        return records
+
+    def apply_changes(self, records):
+        for state, codes, values, written in records:
+            old = self.get(state)
+            if old is not None:
+                self.entries -= old.written.bit_count()
+            elif self.base is not None:
+                self.entries -= len(self.base.file_entries(state))
+            row = QRow(array('H', codes))
+            row.values = np.frombuffer(values).copy()
+            row.written = written
+            self[state] = row
+            self.entries += written.bit_count()
+
+    def _load_entry(self, board, state, move, value):
+        self.row(board, state)
+        self.set_q(state, move, value)
+
+
+class BoundedTable:
+    """Mixin capping an entry-keyed Q-table at `capacity` entries.
+
+    Every write (one per Q update of the action taken) counts as a visit
+    and stamps the entry with the current `episode` (advanced by the
+    agent). Lookups do not, so the per-move lookups of max and argmax leave
+    the metadata of the other moves alone.
+    When a write pushes the table past capacity, the coldest entries are
+    evicted in one batch, down to (1 - EVICT_FRACTION) * capacity: least
+    recently touched first with policy="lru", fewest visits first (least
+    recent among equals) with "lfu".
+
+    With change tracking on, changes() logs each set entry together with
+    its metadata, and a tombstone (value None) for each evicted entry, so a
+    replayed log reproduces the table and its eviction order.
+    """
+
+    EVICT_FRACTION = 0.1
+    POLICIES = ("lru", "lfu")
+
+    def _bound(self, capacity, policy):
+        if policy not in self.POLICIES:
+            raise ValueError(f"Unknown eviction policy {policy!r}, expected one of {list(self.POLICIES)}")
+        self.capacity = capacity
+        self.policy = policy
+        self.episode = 0
+        self.visits = {}
+        self.last_touch = {}
+        self.evictions = 0
+        self.evicted_visits = 0
+        self.evicted_once = 0
+        self.deleted = set()  # keys evicted since the last changes() call, while tracking
+
+    def set_q(self, state, move, value):
+        key = self.entry_key(state, move)
+        self[key] = value
+        self.visits[key] = self.visits.get(key, 0) + 1
+        self.last_touch[key] = self.episode
+        if self.dirty is not None:
+            self.dirty.add(key)
+            self.deleted.discard(key)
+        if len(self) > self.capacity:
+            self.evict()
+
+    def evict(self):
+        """Drop the coldest entries until the table is EVICT_FRACTION below capacity"""
+        keys = list(self.keys())
+        # Entries without metadata (loaded or replayed from a log) count as never visited
+        last = np.fromiter((self.last_touch.get(key, -1) for key in keys), dtype=np.int64, count=len(keys))
+        visits = np.fromiter((self.visits.get(key, 0) for key in keys), dtype=np.int64, count=len(keys))
+        if self.policy == "lru":
+            order = np.argsort(last, kind="stable")
+        else:
+            order = np.lexsort((last, visits))
+        count = len(keys) - int(self.capacity * (1 - self.EVICT_FRACTION))
+        for i in order[:count]:
+            key = keys[i]
+            del self[key]
+            self.visits.pop(key, None)
+            self.last_touch.pop(key, None)
+            if self.dirty is not None:
+                self.dirty.discard(key)
+                self.deleted.add(key)
+        evicted = visits[order[:count]]
+        self.evictions += len(evicted)
+        self.evicted_visits += int(evicted.sum())
+        self.evicted_once += int((evicted <= 1).sum())
+
+    def changes(self):
+        """Return (key, value, visits, last touch) records of entries set since
+        the last call, and (key, None, 0, -1) records of entries evicted since"""
+        records = [(key, self[key], self.visits[key], self.last_touch[key]) for key in self.dirty]
+        records += [(key, None, 0, -1) for key in self.deleted]
+        self.dirty.clear()
+        self.deleted.clear()
+        return records
+
+    def apply_changes(self, records):
+        for key, value, visits, touch in records:
+            if value is None:
+                self.pop(key, None)
+                self.visits.pop(key, None)
+                self.last_touch.pop(key, None)
+            else:
+                self[key] = value
+                self.visits[key] = visits
+                self.last_touch[key] = touch
+                self.episode = max(self.episode, touch)
+
+    def stats(self):
+        return {"capacity": self.capacity, "policy": self.policy, "evictions": self.evictions,
+                "evicted_visits": self.evicted_visits, "evicted_once": self.evicted_once}
+
+    def summary(self):
+        mean = self.evicted_visits / self.evictions if self.evictions else 0
+        return (f"{self.evictions} evicted ({self.policy}, capacity {self.capacity}), "
+                f"{mean:.1f} visits on average, {self.evicted_once} visited at most once")
+
+
+class BoundedQTable(BoundedTable, QTable):
+    """QTable (FEN-keyed) with a capacity, see BoundedTable"""
+
+    def __init__(self, *args, capacity=100000, policy="lru", **kwargs):
+        super().__init__(*args, **kwargs)
+        self._bound(capacity, policy)
+
+
+class BoundedZobristQTable(BoundedTable, ZobristQTable):
+    """ZobristQTable with a capacity, see BoundedTable"""
+
+    def __init__(self, *args, capacity=100000, policy="lru", **kwargs):
+        super().__init__(*args, **kwargs)
+        self._bound(capacity, policy)
+
+
+# Binary .qtb format (little endian):
+#   header  magic b"QTB1", uint16 version, uint16 reserved, uint64 entry count n
+#   index   uint64[65537] start offset of each bucket (top 16 bits of the hash)
+#   hashes  uint64[n]  sorted by (hash, code)
+#   values  float64[n]
+#   codes   uint16[n]
+QTB_MAGIC = b"QTB1"
+QTB_VERSION = 1
+_QTB_HEADER = struct.Struct("<4sHHQ")
+_QTB_BUCKETS = 1 << 16
+
+
+def _table_entries(table):
+    """Return (hashes, codes, values) arrays of a Zobrist-keyed table, unsorted"""
+    if isinstance(table, MappedQTable):
+        return table.entries()
+    if isinstance(table, RowQTable):
+        hashes, codes, values = [], [], []
+        for h, row in dict.items(table):
+            for i, code in enumerate(row.codes):
+                if row.written >> i & 1:
+                    hashes.append(h)
+                    codes.append(code)
+                    values.append(row.values[i])
+        hashes, codes, values = (np.array(hashes, dtype=np.uint64), np.array(codes, dtype=np.uint16),
+                                 np.array(values, dtype=np.float64))
+        if table.base is None:
+            return hashes, codes, values
+        # Rows come first, so they replace the file entries of their states
+        base = table.base.entries()
+        return (np.concatenate([hashes, base[0]]), np.concatenate([codes, base[1]]),
+                np.concatenate([values, base[2]]))
+    if not isinstance(table, ZobristQTable):
+        table = ZobristQTable.from_fen_table(table)
+    n = dict.__len__(table)
+    hashes = np.fromiter((k >> 16 for k in table.keys()), dtype=np.uint64, count=n)
+    codes = np.fromiter((k & 0xFFFF for k in table.keys()), dtype=np.uint16, count=n)
+    values = np.fromiter(table.values(), dtype=np.float64, count=n)
+    return hashes, codes, values
+
+
+def write_qtb(table, path):
+    """Write any Q-table as sorted fixed-width arrays, without pickling"""
+    hashes, codes, values = _table_entries(table)
+    # Stable sort: for duplicate keys the first entry (an in-memory update) wins
+    order = np.lexsort((codes, hashes))
+    hashes, codes, values = hashes[order], codes[order], values[order]
+    if len(hashes) > 1:
+        keep = np.ones(len(hashes), dtype=bool)
+        keep[1:] = (hashes[1:] != hashes[:-1]) | (codes[1:] != codes[:-1])
+        hashes, codes, values = hashes[keep], codes[keep], values[keep]
+    counts = np.bincount((hashes >> np.uint64(48)).astype(np.int64), minlength=_QTB_BUCKETS)
+    index = np.zeros(_QTB_BUCKETS + 1, dtype=np.uint64)
+    np.cumsum(counts, out=index[1:])
+
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(_QTB_HEADER.pack(QTB_MAGIC, QTB_VERSION, 0, len(hashes)))
+        index.tofile(f)
+        hashes.tofile(f)
+        values.tofile(f)
+        codes.tofile(f)
+    # Replace atomically; a table still mapping the old file keeps its pages
+    os.replace(tmp_path, path)
+    return len(hashes)
+
+
+class MappedQTable(ZobristQTable):
+    """Zobrist-keyed Q-table backed by a read-only mmap of a .qtb file.
+
+    Nothing is parsed on open beyond the header: lookups binary-search the
+    mapped arrays within one hash bucket, and pages are read in by the OS
+    as they are touched. Updates go to the in-memory dict (this object) and
+    take precedence over the file; write_qtb merges both.
+    """
+
+    def __init__(self, path=None, check_collisions=False):
+        super().__init__(check_collisions=check_collisions)
+        self.open(path)
+
+    def open(self, path):
+        """(Re)map a .qtb file and drop in-memory updates"""
+        self.clear()
+        self.path = path
+        self.added = 0  # in-memory keys that are not in the file
+        self._mmap = None
+        self.file_index = np.zeros(_QTB_BUCKETS + 1, dtype=np.uint64)
+        self.file_hashes = np.zeros(0, dtype=np.uint64)
+        self.file_values = np.zeros(0, dtype=np.float64)
+        self.file_codes = np.zeros(0, dtype=np.uint16)
+        if path is None:
+            return
+        with open(path, "rb") as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, _, n = _QTB_HEADER.unpack_from(self._mmap)
+        if magic != QTB_MAGIC or version != QTB_VERSION:
+            raise ValueError(f"{path} is not a version {QTB_VERSION} .qtb Q-table")
+        offset = _QTB_HEADER.size
+        self.file_index = np.frombuffer(self._mmap, np.uint64, _QTB_BUCKETS + 1, offset)
+        offset += self.file_index.nbytes
+        self.file_hashes = np.frombuffer(self._mmap, np.uint64, n, offset)
+        offset += 8 * n
+        self.file_values = np.frombuffer(self._mmap, np.float64, n, offset)
+        offset += 8 * n
+        self.file_codes = np.frombuffer(self._mmap, np.uint16, n, offset)
+
+    def __len__(self):
+        return len(self.file_hashes) + self.added
+
+    def __reduce__(self):
+        # Pickle by path: the receiver maps the same file and replays updates
+        state = {"added": self.added, "positions": self.positions, "collisions": self.collisions}
+        return (self.__class__, (self.path, self.check_collisions), state, None, iter(self.items()))
+
+    def _span(self, state):
+        """[i, j) range of the file entries of one state hash"""
+        bucket = state >> 48
+        lo, hi = int(self.file_index[bucket]), int(self.file_index[bucket + 1])
+        if lo == hi:
+            return lo, lo
+        hashes = self.file_hashes[lo:hi]
+        h = np.uint64(state)
+        return lo + int(hashes.searchsorted(h)), lo + int(hashes.searchsorted(h, "right"))
+
+    def _find(self, state, code):
+        i, j = self._span(state)
+        for k in range(i, j):
+            if self.file_codes[k] == code:
+                return k
+        return -1
+
+    def file_entries(self, state):
+        """{move code: value} of the entries of one state in the file"""
+        i, j = self._span(state)
+        return dict(zip(self.file_codes[i:j].tolist(), self.file_values[i:j].tolist()))
+
+    def get_q(self, state, move):
+        code = move_code(move)
+        value = self.get((state << 16) | code)
+        if value is not None:
+            return value
+        i = self._find(state, code)
+        return float(self.file_values[i]) if i >= 0 else 0.0
+
+    def set_q(self, state, move, value):
+        self._set_key((state << 16) | move_code(move), value)
+
+    def _set_key(self, key, value):
+        if key not in self and self._find(key >> 16, key & 0xFFFF) < 0:
+            self.added += 1
+        self[key] = value
+        if self.dirty is not None:
+            self.dirty.add(key)
+
+    def apply_changes(self, records):
+        for key, value in records:
+            self._set_key(key, value)
+
+    def entries(self):
+        """(hashes, codes, values) of in-memory updates followed by the file"""
+        n = dict.__len__(self)
+        hashes = np.fromiter((k >> 16 for k in self.keys()), dtype=np.uint64, count=n)
+        codes = np.fromiter((k & 0xFFFF for k in self.keys()), dtype=np.uint16, count=n)
+        values = np.fromiter(self.values(), dtype=np.float64, count=n)
+        return (np.concatenate([hashes, self.file_hashes]),
+                np.concatenate([codes, self.file_codes]),
+                np.concatenate([values, self.file_values]))
+
+
+def load_qtable(path, check_collisions=False):
+    """Load a pickled (.pkl) or memory-map a binary (.qtb) Q-table"""
+    if path.endswith(".qtb"):
+        return MappedQTable(path, check_collisions=check_collisions)
+    with open(path, "rb") as f:
+        return pickle.load(f)
+
+
+def save_qtable(table, path):
+    if path.endswith(".qtb"):
+        write_qtb(table, path)
+        if isinstance(table, MappedQTable):
+            # Updates are in the file now; map it instead of keeping them in memory
+            table.open(path)
+    else:
+        with open(path, "wb") as f:
+            pickle.dump(table, f)
+
+
+QTABLE_BACKENDS = {
+    "fen": QTable,
+    "zobrist": ZobristQTable,
+    "rows": RowQTable,
+    "mmap": MappedQTable,
+    "neural": NeuralQTable,
+}
+
+
+def make_qtable(backend="fen", check_collisions=False):
+    if backend not in QTABLE_BACKENDS:
+        raise ValueError(f"Unknown Q-table backend {backend!r}, expected one of {list(QTABLE_BACKENDS)}")
+    if backend == "fen":
+        return QTable()
+    return QTABLE_BACKENDS[backend](check_collisions=check_collisions)
+
+
+def bound_qtable(table, capacity, policy="lru"):
+    """Cap a FEN- or Zobrist-keyed table at capacity entries (see BoundedTable)"""
+    if isinstance(table, BoundedTable):
+        if policy not in BoundedTable.POLICIES:
+            raise ValueError(f"Unknown eviction policy {policy!r}, expected one of {list(BoundedTable.POLICIES)}")
+        table.capacity = capacity
+        table.policy = policy
+    elif type(table) is QTable:
+        bounded = BoundedQTable(capacity=capacity, policy=policy)
+        dict.update(bounded, table)
+        table = bounded
+    elif type(table) is ZobristQTable:
+        bounded = BoundedZobristQTable(capacity=capacity, policy=policy, check_collisions=table.check_collisions)
+        bounded.positions = table.positions
+        dict.update(bounded, table)
+        table = bounded
+    else:
+        raise ValueError(f"Only the 'fen' and 'zobrist' backends can be bounded, not {type(table).__name__}")
+    if len(table) > capacity:
+        table.evict()
+    return table
+
+
+def as_backend(table, backend="fen", check_collisions=False):
+    """Wrap or convert a loaded table (possibly a legacy plain dict) for the requested backend"""
+    if isinstance(table, NeuralQTable) or backend == "neural":
+        if isinstance(table, NeuralQTable) and backend == "neural":
+            return table
+        raise ValueError("Neural Q-functions and Q-tables cannot be converted into each other")
+    if backend == "fen":
+        return table if isinstance(table, QTable) else QTable(table)
+    target = QTABLE_BACKENDS[backend]
+    if type(table) is target or (backend == "zobrist" and isinstance(table, (MappedQTable, BoundedZobristQTable))):
+        return table
+    if backend == "rows" and type(table) is MappedQTable:
+        return RowQTable(base=table, check_collisions=check_collisions)
+    if backend == "mmap" and type(table) is ZobristQTable:
+        mapped = MappedQTable(check_collisions=check_collisions)
+        dict.update(mapped, table)
+        mapped.added = len(table)
+        return mapped
+    if type(table) in (dict, QTable, BoundedQTable):
+        return target.from_fen_table(table, check_collisions=check_collisions)
+    raise ValueError(f"Cannot convert a {type(table).__name__} to the {backend!r} backend")
+
+
+def convert_qtable_file(src, dst=None, check_collisions=False):
+    """Convert a pickled (FEN, uci)-keyed Q-table file into a Zobrist-keyed one.
+
+    The output format follows dst's extension: a pickled ZobristQTable, or
+    the memory-mappable binary format for .qtb.
+    """
+    if dst is None:
+        root, ext = os.path.splitext(src)
+        dst = f"{root}_zobrist{ext}"
+    with open(src, "rb") as f:
+        table = pickle.load(f)
+    if isinstance(table, ZobristQTable):
+        converted = table
+    else:
+        converted = ZobristQTable.from_fen_table(table, check_collisions=check_collisions)
+    save_qtable(converted, dst)
+    print(f"🔄 Converted {src} ({len(table)} entries) -> {dst} ({len(converted)} entries)")
+    if converted.collisions:
+        print(f"⚠️  {converted.collisions} Zobrist collisions detected")
+    return dst
+
+
+if __name__ == "__main__":
+    import argparse
+    import glob
+
+    parser = argparse.ArgumentParser(description="Convert pickled Q-tables to Zobrist-keyed tables")
+    parser.add_argument("files", nargs="*", help="defaults to agents/Q_table_scenario_*.pkl")
+    parser.add_argument("--qtb", action="store_true", help="write the memory-mappable .qtb format")
+    args = parser.parse_args()
+
+    files = args.files or sorted(glob.glob("agents/Q_table_scenario_*.pkl"))
+    for path in files:
+        if path.endswith("_zobrist.pkl"):
+            continue
+        dst = os.path.splitext(path)[0] + ".qtb" if args.qtb else None
+        convert_qtable_file(path, dst, check_collisions=True)
@@ -0,0 +1,158 @@
+import chess
+import numpy as np
+
+from qtable import move_code, code_to_move
+
+# Compact position of a transition: occupied squares, one 4-bit piece code per
+# occupied square (square order, up to 32 pieces), side to move, castling rights
+# of the four corner rooks and the en passant square (255 for none). Move
+# counters and history are not kept.
+POSITION_DTYPE = np.dtype([
+    ("occupied", "<u8"), ("pieces", "<u8", (2,)), ("turn", "u1"), ("castling", "u1"), ("ep", "u1"),
+])
+
+CASTLING_SQUARES = (chess.A1, chess.H1, chess.A8, chess.H8)
+NO_EP = 255
+
+
+def encode_position(board):
+    """POSITION_DTYPE fields of a board, as a tuple"""
+    white = board.occupied_co[chess.WHITE]
+    codes = 0
+    shift = 0
+    for square in chess.scan_forward(board.occupied):
+        codes |= (board.piece_type_at(square) | (8 if white >> square & 1 else 0)) << shift
+        shift += 4
+    castling = 0
+    for i, square in enumerate(CASTLING_SQUARES):
+        if board.castling_rights >> square & 1:
+            castling |= 1 << i
+    ep = NO_EP if board.ep_square is None else board.ep_square
+    return (board.occupied, (codes & 0xFFFFFFFFFFFFFFFF, codes >> 64), board.turn, castling, ep)
+
+
+def decode_position(row):
+    """chess.Board of a POSITION_DTYPE row"""
+    occupied = int(row["occupied"])
+    low, high = row["pieces"]
+    codes = int(low) | int(high) << 64
+    masks = [0] * 7
+    white = 0
+    for square in chess.scan_forward(occupied):
+        code = codes & 15
+        codes >>= 4
+        masks[code & 7] |= 1 << square
+        if code & 8:
+            white |= 1 << square
+
+    board = chess.Board(None)
+    board.pawns, board.knights, board.bishops, board.rooks, board.queens, board.kings = masks[1:]
+    board.occupied_co[chess.WHITE] = white
+    board.occupied_co[chess.BLACK] = occupied & ~white
+    board.occupied = occupied
+    board.turn = bool(row["turn"])
+    castling = int(row["castling"])
+    for i, square in enumerate(CASTLING_SQUARES):
+        if castling >> i & 1:
+            board.castling_rights |= chess.BB_SQUARES[square]
+    ep = int(row["ep"])
+    board.ep_square = None if ep == NO_EP else ep
+    return board
+
+
+class ReplayBuffer:
+    """Fixed-capacity ring buffer of agent transitions in preallocated NumPy arrays.
+
+    Each transition stores the position, the agent's move code, the reward,
+    and how the update target continues: terminal transitions set Q to the
+    reward; others bootstrap from `future` when it is known (the opponent
+    ended the game or had no reply) or else from the max Q of next_state.
+    The oldest transitions are overwritten once the buffer is full.
+
+    With prioritized=True, transitions are drawn with probability
+    proportional to (|TD error| + eps) ** alpha (new ones get the current
+    maximum priority), and sample() returns importance weights
+    (N * P) ** -beta normalized by their maximum. Uniform sampling returns
+    weights of 1.
+    """
+
+    def __init__(self, capacity=100000, prioritized=False, alpha=0.6, beta=0.4, eps=0.01):
+        self.capacity = capacity
+        self.prioritized = prioritized
+        self.alpha = alpha
+        self.beta = beta
+        self.eps = eps
+        self.states = np.zeros(capacity, dtype=POSITION_DTYPE)
+        self.next_states = np.zeros(capacity, dtype=POSITION_DTYPE)
+        self.actions = np.zeros(capacity, dtype=np.uint16)
+        self.rewards = np.zeros(capacity, dtype=np.float32)
+        self.futures = np.full(capacity, np.nan, dtype=np.float32)
+        self.terminal = np.zeros(capacity, dtype=bool)
+        self.priorities = np.zeros(capacity, dtype=np.float64) if prioritized else None
+        self.max_priority = 1.0
+        self.size = 0
+        self.position = 0
+
+    def __len__(self):
+        return self.size
+
+    @property
+    def nbytes(self):
+        arrays = [self.states, self.next_states, self.actions, self.rewards, self.futures, self.terminal]
+        if self.prioritized:
+            arrays.append(self.priorities)
+        return sum(array.nbytes for array in arrays)
+
+    def add(self, position, move, reward, max_future=None, next_position=None):
+        """Store a transition as recorded by _episode (positions from encode_position).
+
+        max_future=None marks a terminal transition; with a next_position the
+        future value is bootstrapped from it when the transition is replayed.
+        """
+        i = self.position
+        self.states[i] = position
+        self.actions[i] = move_code(move)
+        self.rewards[i] = reward
+        self.terminal[i] = max_future is None and next_position is None
+        if next_position is not None:
+            self.next_states[i] = next_position
+            self.futures[i] = np.nan
+        else:
+            self.futures[i] = 0.0 if max_future is None else max_future
+        if self.prioritized:
+            self.priorities[i] = self.max_priority
+        self.position = (i + 1) % self.capacity
+        self.size = min(self.size + 1, self.capacity)
+
+    def sample(self, n):
+        """(indices, importance weights) of n transitions drawn with replacement"""
+        if not self.prioritized:
+            return np.random.randint(self.size, size=n), np.ones(n)
+        p = self.priorities[:self.size]
+        p = p / p.sum()
+        indices = np.random.choice(self.size, size=n, p=p)
+        weights = (self.size * p[indices]) ** -self.beta
+        return indices, weights / weights.max()
+
+    def update_priorities(self, indices, errors):
+        if not self.prioritized:
+            return
+        priorities = (np.abs(errors) + self.eps) ** self.alpha
+        self.priorities[indices] = priorities
+        self.max_priority = max(self.max_priority, float(priorities.max()))
+
+    def transition(self, i):
+        """(board, move, reward, max_future, next_board) of transition i.
+
+        max_future is None for terminal transitions and when it has to be
+        bootstrapped from next_board (which is None otherwise).
+        """
+        board = decode_position(self.states[i])
+        move = code_to_move(int(self.actions[i]))
+        reward = float(self.rewards[i])
+        if self.terminal[i]:
+            return board, move, reward, None, None
+        future = float(self.futures[i])
+        if np.isnan(future):
+            return board, move, reward, None, decode_position(self.next_states[i])
+        return board, move, reward, future, None
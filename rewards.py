@@ -1,18 +1,112 @@
 import chess
-from helper import material_score
+from helper import material_score, piece_values, EDGE_CLOSENESS
+
+# Edge-closeness bonus of a king on each square
+EDGE_BONUS = [edge * 0.1 for edge in EDGE_CLOSENESS]
+
+PIECE_VALUE = [0] + [piece_values[piece_type] for piece_type in chess.PIECE_TYPES]
 
 
 def reward_function(board: chess.Board, move: chess.Move | None, turn: bool) -> float:
-    
+
     if move is None:
         return 0.0
-    
+
+    if not board.is_legal(move):
+        return -10
+
+    return move_reward(board, move, turn)
+
+
+def move_reward(board: chess.Board, move: chess.Move, turn: bool) -> float:
+    """reward_function for a move known to be legal, without copying the board.
+
+    Check, material change and edge closeness are read from the move and
+    precomputed tables; castling (and a turn other than the side to move)
+    goes through the push-based version.
+    """
+    if turn != board.turn or board.is_castling(move):
+        return _reward_after_push(board, move, turn)
+
+    from_square, to_square = move.from_square, move.to_square
+    piece_type = move.promotion or board.piece_type_at(from_square)
+
+    reward = 0.0
+
+    if _gives_check(board, move, piece_type):
+        reward += 2.0
+
+    # Material gained by the side to move
+    captured = board.piece_type_at(to_square)
+    if captured:
+        gain = PIECE_VALUE[captured]
+    elif board.is_en_passant(move):
+        gain = PIECE_VALUE[chess.PAWN]
+    else:
+        gain = 0
+    if move.promotion:
+        gain += PIECE_VALUE[move.promotion] - PIECE_VALUE[chess.PAWN]
+    reward += gain
+
+    # The opponent's king does not move; a king on a1 (square 0) gets no bonus, as before
+    king = board.king(not turn)
+    if king:
+        reward += EDGE_BONUS[king]
+
+    return reward
+
+
+def _rook_attacks(square, occupied):
+    return (chess.BB_RANK_ATTACKS[square][chess.BB_RANK_MASKS[square] & occupied]
+            | chess.BB_FILE_ATTACKS[square][chess.BB_FILE_MASKS[square] & occupied])
+
+
+def _bishop_attacks(square, occupied):
+    return chess.BB_DIAG_ATTACKS[square][chess.BB_DIAG_MASKS[square] & occupied]
+
+
+def _gives_check(board, move, piece_type):
+    """Whether the (non-castling) move checks the opponent's king"""
+    us = board.turn
+    king = board.king(not us)
+    if king is None:
+        return False
+
+    from_bb = chess.BB_SQUARES[move.from_square]
+    occupied = (board.occupied & ~from_bb) | chess.BB_SQUARES[move.to_square]
+    if board.is_en_passant(move):
+        occupied &= ~chess.BB_SQUARES[chess.square(chess.square_file(move.to_square),
+                                                   chess.square_rank(move.from_square))]
+
+    # Direct check by the moved (or promoted) piece
+    to_square = move.to_square
+    if piece_type == chess.PAWN:
+        attacks = chess.BB_PAWN_ATTACKS[us][to_square]
+    elif piece_type == chess.KNIGHT:
+        attacks = chess.BB_KNIGHT_ATTACKS[to_square]
+    elif piece_type == chess.BISHOP:
+        attacks = _bishop_attacks(to_square, occupied)
+    elif piece_type == chess.ROOK:
+        attacks = _rook_attacks(to_square, occupied)
+    elif piece_type == chess.QUEEN:
+        attacks = _bishop_attacks(to_square, occupied) | _rook_attacks(to_square, occupied)
+    else:
+        attacks = 0
+    if attacks & chess.BB_SQUARES[king]:
+        return True
+
+    # Discovered check by one of our other sliders
+    ours = board.occupied_co[us] & ~from_bb
+    queens = board.queens & ours
+    return bool(_rook_attacks(king, occupied) & ((board.rooks & ours) | queens)
+                or _bishop_attacks(king, occupied) & ((board.bishops & ours) | queens))
+
+
+def _reward_after_push(board, move, turn):
+    """Original version of the reward for a legal move: copy, push and compare"""
     temp_board = board.copy()
-    if move not in temp_board.legal_moves:
-        return -10  
-    
     temp_board.push(move)
-    
+
     reward = 0.0
 
     if temp_board.is_check():
@@ -21,12 +115,12 @@ def reward_function(board: chess.Board, move: chess.Move | None, turn: bool) ->
     material_before = material_score(board)
     material_after = material_score(temp_board)
     material_change = material_after - material_before
-    
+
     if turn == chess.WHITE:
         reward += material_change
     else:
         reward -= material_change
-    
+
 
     if turn == chess.WHITE:
         black_king = temp_board.king(chess.BLACK)
@@ -34,7 +128,7 @@ def reward_function(board: chess.Board, move: chess.Move | None, turn: bool) ->
             file_dist = min(chess.square_file(black_king), 7 - chess.square_file(black_king))
             rank_dist = min(chess.square_rank(black_king), 7 - chess.square_rank(black_king))
             edge_closeness = (7 - file_dist - rank_dist)
-            reward += edge_closeness * 0.1  
+            reward += edge_closeness * 0.1
     else:
         white_king = temp_board.king(chess.WHITE)
         if white_king:
@@ -44,3 +138,49 @@ def reward_function(board: chess.Board, move: chess.Move | None, turn: bool) ->
             reward += edge_closeness * 0.1
 
     return reward
+
+
+if __name__ == "__main__":
+    # Parity check: the fast path against the push-based version on every
+    # legal move of generated scenario positions and random continuations
+    import random
+    import time
+    from get_board import SCENARIO_MAP, get_scenario_board
+
+    random.seed(0)
+    boards = []
+    for scenario in SCENARIO_MAP:
+        for board in get_scenario_board(scenario, 40):
+            boards.append(board.copy())
+            for _ in range(20):
+                moves = list(board.legal_moves)
+                if not moves:
+                    break
+                board.push(random.choice(moves))
+                boards.append(board.copy())
+    for fen in [chess.STARTING_FEN,
+                "r3k2r/pppq1ppp/2n2n2/3pp3/1bPP4/2N1PN2/PP1BQPPP/R3K2R w KQkq d6 0 8",
+                "8/2P1k3/8/3pP3/8/8/5K2/8 w - d6 0 1"]:
+        boards.append(chess.Board(fen))
+
+    checked = mismatches = 0
+    fast_time = slow_time = 0.0
+    for board in boards:
+        for move in board.legal_moves:
+            start = time.perf_counter()
+            fast = move_reward(board, move, board.turn)
+            fast_time += time.perf_counter() - start
+            start = time.perf_counter()
+            slow = _reward_after_push(board, move, board.turn)
+            slow_time += time.perf_counter() - start
+            checked += 1
+            if fast != slow:
+                mismatches += 1
+                print(f"❌ {board.fen()} {move}: {fast} != {slow}")
+        # Illegal moves keep the -10 penalty
+        for move in board.pseudo_legal_moves:
+            if not board.is_legal(move):
+                assert reward_function(board, move, board.turn) == -10
+
+    print(f"✅ {checked} move rewards checked on {len(boards)} positions, {mismatches} mismatches")
+    print(f"   fast {fast_time / checked * 1e6:.1f} us/move, push-based {slow_time / checked * 1e6:.1f} us/move")
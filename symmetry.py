@@ -0,0 +1,168 @@
+import chess
+import chess.polyglot
+
+# Symmetry frames: one of the 8 dihedral board transforms, optionally followed
+# by a color flip (vertical mirror + swapped colors and side to move).
+# Frame 0 is the identity.
+
+_R = chess.polyglot.POLYGLOT_RANDOM_ARRAY
+_HASHER = chess.polyglot.ZobristHasher(_R)
+
+
+def _flip_h(sq):
+    return sq ^ 7
+
+
+def _flip_v(sq):
+    return sq ^ 56
+
+
+def _flip_d(sq):
+    return ((sq >> 3) | (sq << 3)) & 63
+
+
+_SQUARE_OPS = {"h": _flip_h, "v": _flip_v, "d": _flip_d}
+_BITBOARD_OPS = {"h": chess.flip_horizontal, "v": chess.flip_vertical, "d": chess.flip_diagonal}
+
+# Dihedral group as sequences of basic flips; the first two keep pawn
+# directions (and so are the only ones valid when pawns are on the board)
+_DIHEDRAL = ["", "h", "v", "hv", "d", "dh", "dv", "dhv"]
+
+
+def _compose(ops, table):
+    def f(x):
+        for op in ops:
+            x = table[op](x)
+        return x
+    return f
+
+
+class Frame:
+    __slots__ = ("ops", "color_flip", "squares", "inverse", "piece_keys")
+
+    def __init__(self, ops, color_flip):
+        self.ops = ops
+        self.color_flip = color_flip
+        square_fn = _compose(ops + ("v" if color_flip else ""), _SQUARE_OPS)
+        self.squares = [square_fn(sq) for sq in chess.SQUARES]
+        self.inverse = [0] * 64
+        for sq, mapped in enumerate(self.squares):
+            self.inverse[mapped] = sq
+        # Polyglot key of (piece index, square) after transforming into this frame
+        self.piece_keys = [
+            _R[64 * (piece_index ^ color_flip) + self.squares[sq]]
+            for piece_index in range(12) for sq in chess.SQUARES
+        ]
+
+    def apply(self, board):
+        if self.ops:
+            board = board.transform(_compose(self.ops, _BITBOARD_OPS))
+        elif self.color_flip:
+            board = board.copy(stack=False)
+        if self.color_flip:
+            board.apply_mirror()
+        return board
+
+
+FRAMES = [Frame(ops, color_flip) for color_flip in (0, 1) for ops in _DIHEDRAL]
+
+_ALL_FRAMES = list(range(len(FRAMES)))
+_PAWN_FRAMES = [i for i, frame in enumerate(FRAMES) if frame.ops in ("", "h")]
+_CASTLING_FRAMES = [i for i, frame in enumerate(FRAMES) if frame.ops == ""]
+
+
+def valid_frames(board):
+    """Frames that map the position to an equivalent one"""
+    if board.clean_castling_rights():
+        return _CASTLING_FRAMES
+    if board.pawns:
+        return _PAWN_FRAMES
+    return _ALL_FRAMES
+
+
+def canonical_frame(board):
+    """Return (frame index, Zobrist hash of the board in that frame).
+
+    The canonical frame is the valid frame giving the smallest hash, so all
+    symmetric variants of a position share one representative. Hashes are
+    built from per-frame key tables instead of transforming the board.
+    """
+    pieces = []
+    for pivot, squares in enumerate(board.occupied_co):
+        for square in chess.scan_reversed(squares):
+            pieces.append(((board.piece_type_at(square) - 1) * 2 + pivot) * 64 + square)
+
+    white_turn = board.turn == chess.WHITE
+    castling = board.clean_castling_rights()
+    ep_file = None
+    if board.ep_square and _HASHER.hash_ep_square(board):
+        ep_file = chess.square_file(board.ep_square)
+
+    best_frame, best_hash = 0, None
+    for i in valid_frames(board):
+        frame = FRAMES[i]
+        keys = frame.piece_keys
+        h = 0
+        for p in pieces:
+            h ^= keys[p]
+        if white_turn != frame.color_flip:
+            h ^= _R[780]
+        if castling:
+            h ^= _castling_key(board, frame.color_flip)
+        if ep_file is not None:
+            h ^= _R[772 + chess.square_file(frame.squares[ep_file])]
+        if best_hash is None or h < best_hash:
+            best_frame, best_hash = i, h
+    return best_frame, best_hash
+
+
+def _castling_key(board, color_flip):
+    h = 0
+    for color, offset in ((chess.WHITE, 0), (chess.BLACK, 2)):
+        if color_flip:
+            offset ^= 2
+        if board.has_kingside_castling_rights(color):
+            h ^= _R[768 + offset]
+        if board.has_queenside_castling_rights(color):
+            h ^= _R[768 + offset + 1]
+    return h
+
+
+def canonical_board(board):
+    """Return (frame index, board transformed into its canonical frame)"""
+    frame, _ = canonical_frame(board)
+    return frame, FRAMES[frame].apply(board)
+
+
+def to_frame(move, frame):
+    squares = FRAMES[frame].squares
+    return chess.Move(squares[move.from_square], squares[move.to_square], move.promotion)
+
+
+def from_frame(move, frame):
+    inverse = FRAMES[frame].inverse
+    return chess.Move(inverse[move.from_square], inverse[move.to_square], move.promotion)
+
+
+class FramedBoard:
+    """View of a board in a symmetry frame.
+
+    legal_moves are mapped into the frame without copying the board; any
+    other attribute is read from a transformed copy built on first use.
+    """
+
+    def __init__(self, board, frame):
+        self.board = board
+        self.frame = frame
+        self._transformed = None
+
+    @property
+    def legal_moves(self):
+        squares = FRAMES[self.frame].squares
+        return [chess.Move(squares[m.from_square], squares[m.to_square], m.promotion)
+                for m in self.board.legal_moves]
+
+    def __getattr__(self, name):
+        if self._transformed is None:
+            self._transformed = FRAMES[self.frame].apply(self.board)
+        return getattr(self._transformed, name)
@@ -0,0 +1,581 @@
+import os
+import struct
+import time
+import argparse
+
+import numpy as np
+import chess
+
+from symmetry import FRAMES
+
+# Endgame tablebases by retrograde analysis, for the small material sets in
+# SCENARIO_MAP. A table holds, for every position of one material signature,
+# the result with perfect play and the distance to mate (DTM) in plies.
+# The 50-move rule is ignored, and so is en passant (probe() refuses
+# positions where it is possible).
+
+# Scores while solving, from the side to move: MATE - d wins in d plies,
+# -(MATE - d) loses in d plies, 0 is a draw
+MATE = 1000
+ILLEGAL = -32000
+NO_MOVE = -32767
+
+# File layout: header, name, then int8 values of shape (2, regions, 64, ...)
+# indexed by [side to move (0 white, 1 black), white king region square,
+# squares of the other pieces]. 0 is a draw, n > 0 mate in n moves,
+# n < 0 mated in -n - 1 moves, -128 an illegal position.
+HEADER = struct.Struct("<4sHHH")
+MAGIC = b"TBL1"
+VERSION = 1
+ILLEGAL_CODE = -128
+
+PIECE_SYMBOLS = " PNBRQK"
+PROMOTIONS = [chess.QUEEN, chess.ROOK, chess.BISHOP, chess.KNIGHT]
+
+
+def sort_slots(slots):
+    """Canonical slot order: white king, black king, then white and black pieces, strongest first"""
+    kings = [(chess.KING, chess.WHITE), (chess.KING, chess.BLACK)]
+    rest = [slot for slot in slots if slot[0] != chess.KING]
+    rest.sort(key=lambda slot: (not slot[1], -slot[0]))
+    return kings + rest
+
+
+def material_name(slots):
+    """Name like 'KQvKR' (white pieces, then black pieces)"""
+    slots = sort_slots(slots)
+    white = "".join(PIECE_SYMBOLS[t] for t, color in slots if color == chess.WHITE)
+    black = "".join(PIECE_SYMBOLS[t] for t, color in slots if color == chess.BLACK)
+    return f"{white}v{black}"
+
+
+def material_slots(name):
+    white, black = name.upper().split("V")
+    slots = [(PIECE_SYMBOLS.index(c), chess.WHITE) for c in white]
+    slots += [(PIECE_SYMBOLS.index(c), chess.BLACK) for c in black]
+    return sort_slots(slots)
+
+
+def board_slots(board):
+    slots = []
+    for color in chess.COLORS:
+        for square in chess.scan_forward(board.occupied_co[color]):
+            slots.append((board.piece_type_at(square), color))
+    return sort_slots(slots)
+
+
+# White king squares kept in a table (the rest follow by symmetry) and, for
+# every square, the region index it maps to and the square permutation
+_PAWNLESS_REGION = [sq for sq in chess.SQUARES if chess.square_file(sq) <= 3
+                    and chess.square_rank(sq) <= chess.square_file(sq)]
+_PAWN_REGION = [sq for sq in chess.SQUARES if chess.square_file(sq) <= 3]
+
+
+def _symmetries(has_pawns):
+    region = _PAWN_REGION if has_pawns else _PAWNLESS_REGION
+    region_index = {sq: i for i, sq in enumerate(region)}
+    frames = [frame for frame in FRAMES
+              if not frame.color_flip and (not has_pawns or frame.ops in ("", "h"))]
+    maps = []
+    for sq in chess.SQUARES:
+        for frame in frames:
+            if frame.squares[sq] in region_index:
+                maps.append((region_index[frame.squares[sq]], np.array(frame.squares, dtype=np.intp)))
+                break
+    return region, maps
+
+
+def _ray_moves(directions, slide):
+    """(from, to, squares in between) for a piece moving along directions"""
+    moves = []
+    for a in chess.SQUARES:
+        for df, dr in directions:
+            between = []
+            f, r = chess.square_file(a) + df, chess.square_rank(a) + dr
+            while 0 <= f < 8 and 0 <= r < 8:
+                b = chess.square(f, r)
+                moves.append((a, b, tuple(between)))
+                if not slide:
+                    break
+                between.append(b)
+                f, r = f + df, r + dr
+    return moves
+
+
+_KING_DIRS = [(-1, -1), (-1, 0), (-1, 1), (0, -1), (0, 1), (1, -1), (1, 0), (1, 1)]
+_KNIGHT_DIRS = [(-2, -1), (-2, 1), (-1, -2), (-1, 2), (1, -2), (1, 2), (2, -1), (2, 1)]
+_DIAGONAL = [(-1, -1), (-1, 1), (1, -1), (1, 1)]
+_ORTHOGONAL = [(-1, 0), (1, 0), (0, -1), (0, 1)]
+
+_PIECE_MOVES = {
+    chess.KING: _ray_moves(_KING_DIRS, False),
+    chess.KNIGHT: _ray_moves(_KNIGHT_DIRS, False),
+    chess.BISHOP: _ray_moves(_DIAGONAL, True),
+    chess.ROOK: _ray_moves(_ORTHOGONAL, True),
+    chess.QUEEN: _ray_moves(_DIAGONAL + _ORTHOGONAL, True),
+}
+
+
+def _pawn_moves(color):
+    """(from, to, between, quiet, capture, promotion) for pawns of color"""
+    step = 8 if color == chess.WHITE else -8
+    start_rank = 1 if color == chess.WHITE else 6
+    last_rank = 7 if color == chess.WHITE else 0
+    moves = []
+    for a in chess.SQUARES:
+        rank = chess.square_rank(a)
+        if rank in (0, 7):
+            continue
+        b = a + step
+        promotion = chess.square_rank(b) == last_rank
+        moves.append((a, b, (), True, False, promotion))
+        if rank == start_rank:
+            moves.append((a, b + step, (b,), True, False, False))
+        for df in (-1, 1):
+            if 0 <= chess.square_file(a) + df < 8:
+                moves.append((a, b + df, (), False, True, promotion))
+    return moves
+
+
+def _moves(piece_type, color):
+    if piece_type == chess.PAWN:
+        return _pawn_moves(color)
+    return [(a, b, between, True, True, False) for a, b, between in _PIECE_MOVES[piece_type]]
+
+
+_MOVES = {(piece_type, color): _moves(piece_type, color)
+          for piece_type in chess.PIECE_TYPES for color in chess.COLORS}
+_KING_TARGETS = [[b for a, b, _ in _PIECE_MOVES[chess.KING] if a == w] for w in chess.SQUARES]
+
+
+def _attacks(piece_type, color):
+    """(from, to, between) for squares attacked by the piece"""
+    return [(a, b, between) for a, b, between, _, capture, _ in _moves(piece_type, color) if capture]
+
+
+def _index(ndim, fixed):
+    """Index tuple with the given {axis: index} fixed and full slices elsewhere.
+
+    The trailing Ellipsis keeps even a fully fixed index a (0-d) view.
+    """
+    return tuple(fixed.get(axis, slice(None)) for axis in range(ndim)) + (Ellipsis,)
+
+
+def _block(arr, axes, squares):
+    """Mark positions with a piece on any of squares (along axes) as having no move"""
+    if not squares:
+        return
+    squares = list(squares)
+    for axis in axes:
+        arr[_index(arr.ndim, {axis: squares})] = NO_MOVE
+
+
+class Table:
+    """Values of one material signature, while solving or loaded from disk"""
+
+    def __init__(self, slots, values=None):
+        self.slots = sort_slots(slots)
+        self.name = material_name(self.slots)
+        self.k = len(self.slots)
+        self.has_pawns = any(t == chess.PAWN for t, _ in self.slots)
+        self.region, self.maps = _symmetries(self.has_pawns)
+        self.shape = (2, len(self.region)) + (64,) * (self.k - 1)
+        self.values = values
+        self.cand = None
+
+    # --- solving ---
+
+    def _invalid(self, w):
+        """Positions that cannot occur whoever is to move, for the white king on w"""
+        ndim = self.k - 1
+        invalid = np.zeros((64,) * ndim, dtype=bool)
+        eye = np.eye(64, dtype=bool)
+        for s in range(1, self.k):
+            invalid[_index(ndim, {s - 1: w})] = True
+            if self.slots[s][0] == chess.PAWN:
+                invalid[_index(ndim, {s - 1: list(range(8)) + list(range(56, 64))})] = True
+            for t in range(s + 1, self.k):
+                shape = [1] * ndim
+                shape[s - 1] = shape[t - 1] = 64
+                invalid |= eye.reshape(shape)
+        return invalid
+
+    def _attacked(self, stm, w):
+        """Whether the king of the side to move is attacked, for the white king on w"""
+        ndim = self.k - 1
+        color = chess.WHITE if stm == 0 else chess.BLACK
+        attacked = np.zeros((64,) * ndim, dtype=bool)
+        for e, (piece_type, attacker_color) in enumerate(self.slots):
+            if attacker_color == color:
+                continue
+            hits = np.zeros_like(attacked)
+            for a, b, between in _attacks(piece_type, attacker_color):
+                if color == chess.WHITE:
+                    # Attacks on the fixed white king
+                    if b != w:
+                        continue
+                    fixed = {e - 1: a}
+                elif e == 0:
+                    if a != w:
+                        continue
+                    fixed = {0: b}
+                else:
+                    if w in between or a == w:
+                        continue
+                    fixed = {e - 1: a, 0: b}
+                hits[_index(ndim, fixed)] = True
+                for q in between:
+                    for axis in range(ndim):
+                        if axis not in fixed:
+                            hits[_index(ndim, {**fixed, axis: q})] = False
+            attacked |= hits
+        return attacked
+
+    def _slice(self, cand, stm, wk, slots):
+        """cand values for the white king on wk, axes ordered as the caller's slots"""
+        r, perm = self.maps[wk]
+        arr = cand[stm, r]
+        order, used = [], set()
+        for slot in slots:
+            for i, own in enumerate(self.slots[1:]):
+                if own == slot and i not in used:
+                    used.add(i)
+                    order.append(i)
+                    break
+        if order != sorted(order):
+            arr = arr.transpose(order)
+        if perm[wk] != wk:
+            arr = arr[np.ix_(*[perm] * len(order))]
+        return arr
+
+    @staticmethod
+    def _candidates(values):
+        """Parent scores for each child position (NO_MOVE for illegal ones)"""
+        cand = np.sign(values) - values
+        cand[values == ILLEGAL] = NO_MOVE
+        return cand.astype(np.int16)
+
+    def solve(self, tables):
+        """Solve the table by value iteration; sub-tables must already be in tables.
+
+        Unknown positions start as draws. Every pass recomputes each side's
+        values from its moves, so a win or loss in d plies is known after
+        about d passes; the table is solved when a full sweep changes nothing.
+        """
+        illegal = np.zeros(self.shape, dtype=bool)
+        in_check = np.zeros(self.shape, dtype=bool)
+        for r, w in enumerate(self.region):
+            invalid = self._invalid(w)
+            attacked = [self._attacked(stm, w) for stm in (0, 1)]
+            for stm in (0, 1):
+                in_check[stm, r] = attacked[stm]
+                illegal[stm, r] = invalid | attacked[1 - stm]
+
+        values = np.zeros(self.shape, dtype=np.int16)
+        values[illegal] = ILLEGAL
+        sub_slices = {}
+
+        def sub_slice(slots, stm, wk, caller_slots):
+            # Sub-tables are final, so their slices are computed once
+            key = (material_name(slots), stm, wk, tuple(caller_slots))
+            if key not in sub_slices:
+                table = tables[key[0]]
+                sub_slices[key] = table._slice(table.cand, stm, wk, caller_slots)
+            return sub_slices[key]
+
+        self.passes = 0
+        changed = True
+        while changed:
+            changed = False
+            for stm in (0, 1):
+                color = chess.WHITE if stm == 0 else chess.BLACK
+                cand = self._candidates(values)
+                new = np.full(self.shape[1:], NO_MOVE, dtype=np.int16)
+                for r, w in enumerate(self.region):
+                    for j, (_, piece_color) in enumerate(self.slots):
+                        if piece_color != color:
+                            continue
+                        if j == 0:
+                            self._king_moves(new[r], cand, stm, w, sub_slice)
+                        else:
+                            self._piece_moves(new[r], cand, stm, r, w, j, sub_slice)
+
+                no_move = new == NO_MOVE
+                new[no_move] = 0
+                new[no_move & in_check[stm]] = -MATE
+                new[illegal[stm]] = ILLEGAL
+                self.passes += 1
+                if not np.array_equal(new, values[stm]):
+                    changed = True
+                    values[stm] = new
+
+        self.values = values
+        self.cand = self._candidates(values)
+        return self
+
+    def _king_moves(self, best, cand, stm, w, sub_slice):
+        """White king moves from w; best has the other slots as axes"""
+        others = self.slots[1:]
+        for b in _KING_TARGETS[w]:
+            child = np.array(self._slice(cand, 1 - stm, b, others))
+            _block(child, range(child.ndim), [b])
+            np.maximum(best, child, out=best)
+            for e, (piece_type, piece_color) in enumerate(self.slots):
+                if piece_color == chess.WHITE or piece_type == chess.KING:
+                    continue
+                remaining = [slot for s, slot in enumerate(self.slots) if s != e]
+                child = sub_slice(remaining, 1 - stm, b, remaining[1:])
+                target = best[_index(best.ndim, {e - 1: b})]
+                np.maximum(target, child, out=target)
+
+    def _piece_moves(self, best, cand, stm, r, w, j, sub_slice):
+        """Moves of the piece in slot j, with the white king on w"""
+        piece_type, color = self.slots[j]
+        rest = [s for s in range(1, self.k) if s != j]
+        enemies = [e for e in rest if self.slots[e][1] != color and self.slots[e][0] != chess.KING]
+        promoted = [[(p, color) if s == j else slot for s, slot in enumerate(self.slots)]
+                    for p in PROMOTIONS]
+        own = cand[1 - stm, r]
+
+        for a, b, between, quiet, capture, promotion in _MOVES[piece_type, color]:
+            if b == w or w in between:
+                continue
+            view = best[_index(best.ndim, {j - 1: a})]
+            if quiet:
+                if promotion:
+                    sources = [sub_slice(slots, 1 - stm, w, slots[1:]) for slots in promoted]
+                else:
+                    sources = [own]
+                for source in sources:
+                    child = np.array(source[_index(source.ndim, {j - 1: b})])
+                    _block(child, range(child.ndim), between + (b,))
+                    np.maximum(view, child, out=view)
+            if capture:
+                for e in enemies:
+                    target = view[_index(view.ndim, {rest.index(e): b})]
+                    axis = [s for s in range(1, self.k) if s != e].index(j)
+                    for slots in (promoted if promotion else [self.slots]):
+                        remaining = [slot for s, slot in enumerate(slots) if s != e]
+                        source = sub_slice(remaining, 1 - stm, w, remaining[1:])
+                        child = np.array(source[_index(source.ndim, {axis: b})])
+                        _block(child, range(child.ndim), between)
+                        np.maximum(target, child, out=target)
+
+    # --- storage ---
+
+    def encode(self):
+        """Values as int8 codes (see the file layout above)"""
+        values = self.values.astype(np.int32)
+        codes = np.zeros(self.shape, dtype=np.int8)
+        win = (values > 0)
+        loss = (values < 0) & (values != ILLEGAL)
+        codes[win] = (MATE - values[win] + 1) // 2
+        codes[loss] = -((MATE + values[loss]) // 2) - 1
+        codes[values == ILLEGAL] = ILLEGAL_CODE
+        return codes
+
+    def save(self, path):
+        name = self.name.encode()
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(HEADER.pack(MAGIC, VERSION, len(self.region), len(name)))
+            f.write(name)
+            f.write(self.encode().tobytes())
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def open(cls, path):
+        """Memory-map a table file written by save()"""
+        with open(path, "rb") as f:
+            magic, version, regions, name_length = HEADER.unpack(f.read(HEADER.size))
+            if magic != MAGIC or version != VERSION:
+                raise ValueError(f"{path} is not a tablebase file")
+            name = f.read(name_length).decode()
+        table = cls(material_slots(name))
+        table.codes = np.memmap(path, dtype=np.int8, mode="r",
+                                offset=HEADER.size + name_length, shape=table.shape)
+        return table
+
+    def probe_code(self, board):
+        """int8 code of the board, which must have this table's material"""
+        squares = {}
+        for color in chess.COLORS:
+            for square in chess.scan_forward(board.occupied_co[color]):
+                squares.setdefault((board.piece_type_at(square), color), []).append(square)
+        wk = squares[chess.KING, chess.WHITE][0]
+        r, perm = self.maps[wk]
+        index = [0 if board.turn == chess.WHITE else 1, r]
+        for slot in self.slots[1:]:
+            index.append(perm[squares[slot].pop()])
+        return int(self.codes[tuple(index)])
+
+
+def decode(code):
+    """(wdl, plies to mate) from the side to move, None for an illegal position"""
+    if code == ILLEGAL_CODE:
+        return None
+    if code > 0:
+        return 1, 2 * code - 1
+    if code < 0:
+        return -1, 2 * (-code - 1)
+    return 0, 0
+
+
+def _sub_materials(slots):
+    """Materials reachable by one capture or promotion"""
+    subs = []
+    for e, (piece_type, _) in enumerate(slots):
+        if piece_type != chess.KING:
+            subs.append([slot for s, slot in enumerate(slots) if s != e])
+    for j, (piece_type, color) in enumerate(slots):
+        if piece_type == chess.PAWN:
+            for p in PROMOTIONS:
+                promoted = [(p, color) if s == j else slot for s, slot in enumerate(slots)]
+                subs.append(promoted)
+    return subs
+
+
+def generate(name, directory="tablebases", tables=None, verbose=True):
+    """Solve a material signature (and everything it can convert into) and save the tables.
+
+    Returns {name: (seconds, bytes)} for the tables solved in this call.
+    """
+    os.makedirs(directory, exist_ok=True)
+    tables = {} if tables is None else tables
+    report = {}
+
+    def solve(slots):
+        key = material_name(slots)
+        if key in tables:
+            return
+        for sub in _sub_materials(slots):
+            solve(sub)
+        start = time.perf_counter()
+        table = Table(slots).solve(tables)
+        seconds = time.perf_counter() - start
+        path = os.path.join(directory, f"{key}.tbl")
+        table.save(path)
+        tables[key] = table
+        report[key] = (seconds, os.path.getsize(path))
+        if verbose:
+            print(f"🧮 {key}: {seconds:.1f}s, {table.passes} passes, "
+                  f"{os.path.getsize(path) / 1e6:.2f} MB -> {path}")
+
+    solve(material_slots(name))
+    return report
+
+
+class Tablebase:
+    """Probe tables generated into a directory (opened lazily by material)"""
+
+    def __init__(self, directory="tablebases"):
+        self.directory = directory
+        self.tables = {}
+
+    def __reduce__(self):
+        return Tablebase, (self.directory,)
+
+    def __repr__(self):
+        return f"Tablebase({self.directory!r})"
+
+    def _table(self, name):
+        if name not in self.tables:
+            path = os.path.join(self.directory, f"{name}.tbl")
+            self.tables[name] = Table.open(path) if os.path.exists(path) else None
+        return self.tables[name]
+
+    def probe(self, board):
+        """(wdl, plies to mate) for the side to move, or None if not covered.
+
+        wdl is 1 (win), 0 (draw) or -1 (loss); a checkmated side gets (-1, 0).
+        """
+        if board.clean_castling_rights() or board.has_legal_en_passant():
+            return None
+        table = self._table(material_name(board_slots(board)))
+        if table is None:
+            if board.is_insufficient_material():
+                return 0, 0
+            return None
+        return decode(table.probe_code(board))
+
+    def probe_wdl(self, board):
+        result = self.probe(board)
+        return None if result is None else result[0]
+
+    def best_moves(self, board):
+        """All moves keeping the best result (fastest win, slowest loss), or None"""
+        if self.probe(board) is None:
+            return None
+        best, best_key = [], None
+        for move in board.legal_moves:
+            board.push(move)
+            result = self.probe(board)
+            board.pop()
+            if result is None:
+                return None
+            wdl, plies = result
+            # From the mover's side: win soon, lose late
+            key = (-wdl, -plies if wdl < 0 else plies if wdl > 0 else 0)
+            if best_key is None or key > best_key:
+                best, best_key = [move], key
+            elif key == best_key:
+                best.append(move)
+        return best
+
+    def best_move(self, board):
+        moves = self.best_moves(board)
+        return moves[0] if moves else None
+
+
+def policy_accuracy(tablebase, boards, choose_move):
+    """Compare a policy with the tablebase on covered positions.
+
+    choose_move(board) returns the policy's move. Returns the number of
+    positions checked, how many moves were optimal (best DTM) and how many
+    kept the position's result.
+    """
+    positions = optimal = kept = 0
+    for board in boards:
+        best = tablebase.best_moves(board)
+        if not best:
+            continue
+        move = choose_move(board)
+        positions += 1
+        if move in best:
+            optimal += 1
+        if move is not None:
+            before = tablebase.probe_wdl(board)
+            board.push(move)
+            after = tablebase.probe_wdl(board)
+            board.pop()
+            if after is not None and -after == before:
+                kept += 1
+    return {"positions": positions, "optimal": optimal, "result_kept": kept}
+
+
+def scenario_material(scenario):
+    from get_board import SCENARIO_MAP
+    return material_name(board_slots(SCENARIO_MAP[scenario]()))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Generate endgame tablebases by retrograde analysis")
+    parser.add_argument("materials", nargs="*", help="material signatures, e.g. KQvK KRvKB")
+    parser.add_argument("--scenarios", type=int, nargs="*", default=[],
+                        help="generate the material of these get_board scenarios")
+    parser.add_argument("--max-pieces", type=int, default=4,
+                        help="skip scenario materials with more pieces (default 4)")
+    parser.add_argument("--dir", default="tablebases")
+    args = parser.parse_args()
+
+    materials = list(args.materials)
+    for scenario in args.scenarios:
+        name = scenario_material(scenario)
+        if len(name) - 1 > args.max_pieces:
+            print(f"⚠️  Scenario {scenario} ({name}) has more than {args.max_pieces} pieces, skipped")
+        elif name not in materials:
+            materials.append(name)
+
+    tables = {}
+    for name in materials:
+        generate(name, args.dir, tables)